@@ -0,0 +1,139 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from bulk_import import lkpd_questions
+from report import is_graded
+
+# ========== CONSTANTS ==========
+SCORE_BINS = [0, 50, 60, 70, 80, 90, 101]
+SCORE_LABELS = ["<50", "50-59", "60-69", "70-79", "80-89", "90-100"]
+WAKTU_FORMAT = "%d/%m/%Y %H:%M:%S"
+
+SUBMISSION_COLUMNS = ['lkpd_id', 'filename', 'nama_siswa', 'siswa_key', 'waktu_submit', 'total_score',
+                      'dinilai', 'dijawab', 'jumlah_pertanyaan']
+ANSWER_COLUMNS = ['lkpd_id', 'filename', 'siswa_key', 'pertanyaan', 'dijawab', 'score']
+
+
+# ========== LOADING (ONE PASS PER LKPD) ==========
+def build_frames(lkpd_id: str, lkpd: Optional[Dict[str, Any]],
+                 docs: Iterable[Dict[str, Any]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Columnar frames for one LKPD: one row per submission, one row per (submission, question).
+
+    This is the only per-document pass; every statistic below is computed on the frames.
+    """
+    questions = lkpd_questions(lkpd)
+    submissions: Dict[str, List[Any]] = {c: [] for c in SUBMISSION_COLUMNS}
+    answers: Dict[str, List[Any]] = {c: [] for c in ANSWER_COLUMNS}
+    for doc in docs:
+        jawaban = doc.get('jawaban') or {}
+        scores = doc.get('question_scores') or {}
+        asked = questions or list(jawaban)
+        filename, nama = doc.get('filename'), doc.get('nama_siswa') or 'Anonim'
+        siswa_key = " ".join(nama.casefold().split())
+        answered = [bool((jawaban.get(q) or '').strip()) for q in asked]
+        score = doc.get('total_score')
+
+        submissions['lkpd_id'].append(lkpd_id)
+        submissions['filename'].append(filename)
+        submissions['nama_siswa'].append(nama)
+        submissions['siswa_key'].append(siswa_key)
+        submissions['waktu_submit'].append(doc.get('waktu_submit'))
+        submissions['total_score'].append(score if isinstance(score, (int, float)) else None)
+        submissions['dinilai'].append(is_graded(doc))
+        submissions['dijawab'].append(sum(answered))
+        submissions['jumlah_pertanyaan'].append(len(asked))
+
+        n = len(asked)
+        answers['lkpd_id'].extend([lkpd_id] * n)
+        answers['filename'].extend([filename] * n)
+        answers['siswa_key'].extend([siswa_key] * n)
+        answers['pertanyaan'].extend(asked)
+        answers['dijawab'].extend(answered)
+        answers['score'].extend(scores.get(q) for q in asked)
+
+    subs = pd.DataFrame(submissions, columns=SUBMISSION_COLUMNS)
+    subs['waktu_submit'] = pd.to_datetime(subs['waktu_submit'], format=WAKTU_FORMAT, errors='coerce')
+    subs['total_score'] = pd.to_numeric(subs['total_score'], errors='coerce')
+    subs['dinilai'] = subs['dinilai'].astype(bool)
+    ans = pd.DataFrame(answers, columns=ANSWER_COLUMNS)
+    ans['score'] = pd.to_numeric(ans['score'], errors='coerce')
+    ans['dijawab'] = ans['dijawab'].astype(bool)
+    return subs, ans
+
+
+# ========== STATISTICS (VECTORIZED) ==========
+def score_distribution(subs: pd.DataFrame) -> pd.DataFrame:
+    """Count of scored submissions per score band, one column per LKPD"""
+    scored = subs[subs['dinilai']]
+    bands = pd.cut(scored['total_score'], bins=SCORE_BINS, labels=SCORE_LABELS, right=False)
+    return (pd.crosstab(bands, scored['lkpd_id'])
+            .reindex(index=SCORE_LABELS, columns=subs['lkpd_id'].unique(), fill_value=0)
+            .rename_axis(index='Rentang Nilai', columns=None))
+
+
+def class_summary(subs: pd.DataFrame) -> pd.DataFrame:
+    """Per LKPD: submissions, scored count, mean/median score and completion rate"""
+    grouped = subs.assign(
+        nilai=subs['total_score'].where(subs['dinilai']),
+        lengkap=subs['dijawab'] >= subs['jumlah_pertanyaan'],
+        kelengkapan=subs['dijawab'] / subs['jumlah_pertanyaan'].where(subs['jumlah_pertanyaan'] > 0),
+    ).groupby('lkpd_id', sort=False)
+    return pd.DataFrame({
+        'Siswa Submit': grouped.size(),
+        'Sudah Dinilai': grouped['dinilai'].sum(),
+        'Rata-rata Nilai': grouped['nilai'].mean().round(1),
+        'Median Nilai': grouped['nilai'].median(),
+        'Kelengkapan (%)': (grouped['kelengkapan'].mean() * 100).round(1),
+        'Jawab Lengkap (%)': (grouped['lengkap'].mean() * 100).round(1),
+    }).rename_axis('ID LKPD')
+
+
+def question_stats(ans: pd.DataFrame) -> pd.DataFrame:
+    """Per LKPD and question: share of students who answered it and its average AI score"""
+    grouped = ans.groupby(['lkpd_id', 'pertanyaan'], sort=False)
+    return pd.DataFrame({
+        'Dijawab (%)': (grouped['dijawab'].mean() * 100).round(1),
+        'Rata-rata Skor': grouped['score'].mean().round(1),
+        'Jumlah Dinilai': grouped['score'].count(),
+    }).rename_axis(['ID LKPD', 'Pertanyaan']).reset_index()
+
+
+def submission_timeline(subs: pd.DataFrame, freq: str = "h") -> pd.DataFrame:
+    """Submissions per time bucket (`freq` is a pandas offset alias), one column per LKPD"""
+    timed = subs.dropna(subset=['waktu_submit'])
+    if timed.empty:
+        return pd.DataFrame()
+    return (timed.groupby([timed['waktu_submit'].dt.floor(freq), 'lkpd_id'])
+            .size().unstack(fill_value=0).rename_axis(index='Waktu', columns=None))
+
+
+def student_trends(subs: pd.DataFrame) -> pd.DataFrame:
+    """Students x LKPD score matrix (LKPDs in order of first submission) and the change first → last"""
+    scored = subs[subs['dinilai']]
+    if scored.empty:
+        return pd.DataFrame()
+    order = scored.groupby('lkpd_id')['waktu_submit'].min().sort_values().index
+    # Nama tampilan: ejaan terakhir untuk tiap siswa (dicocokkan tanpa beda huruf besar/spasi)
+    names = scored.drop_duplicates('siswa_key', keep='last').set_index('siswa_key')['nama_siswa']
+    matrix = scored.pivot_table(index='siswa_key', columns='lkpd_id', values='total_score', aggfunc='max')
+    matrix = matrix.reindex(columns=order)
+    first = matrix.bfill(axis=1).iloc[:, 0]
+    last = matrix.ffill(axis=1).iloc[:, -1]
+    matrix['Perubahan'] = last - first
+    matrix.index = names.reindex(matrix.index).values
+    return matrix.rename_axis(index='Nama', columns=None)
+
+
+def analyze(frames: List[Tuple[pd.DataFrame, pd.DataFrame]], timeline_freq: str = "h") -> Dict[str, pd.DataFrame]:
+    """All dashboard statistics for one or many LKPDs (frames from build_frames)"""
+    subs = pd.concat([f[0] for f in frames], ignore_index=True) if frames else build_frames("", None, [])[0]
+    ans = pd.concat([f[1] for f in frames], ignore_index=True) if frames else build_frames("", None, [])[1]
+    return {
+        'submissions': subs,
+        'summary': class_summary(subs),
+        'distribution': score_distribution(subs),
+        'questions': question_stats(ans),
+        'timeline': submission_timeline(subs, timeline_freq),
+        'trends': student_trends(subs),
+    }
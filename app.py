@@ -1,16 +1,18 @@
 import streamlit as st
 import os
-import json
 import uuid
-import pandas as pd
 from datetime import datetime
 from typing import Optional, Dict, Any
 
 # Impor model dan fungsi dari gemini_config
-from gemini_config import get_model, load_lkpd, save_jawaban_siswa, load_all_jawaban, generate_lkpd, score_all_jawaban
-
-# Dapatkan model yang sudah diinisialisasi (menggunakan st.cache_resource)
-model = get_model()
+from gemini_config import (
+    initialize_app, get_model, load_lkpd, save_lkpd, save_jawaban_siswa, class_analytics,
+    generate_lkpd_stream, enqueue_scoring_job, get_scoring_job, cancel_job,
+    metrics_snapshot, metrics_text, doc_cache_stats, query_jawaban_page, load_jawaban_detail, export_report,
+    find_similar_answers, token_budget_status, import_jawaban, event_cursor, read_changes, MONITOR_REFRESH_SECONDS
+)
+from jobs import ACTIVE_STATUSES, DONE, CANCELLED, RUNNING, job_eta
+from report import EXPORT_MIME, xlsx_available
 
 # ========== PAGE CONFIG ==========
 st.set_page_config(
@@ -20,6 +22,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Setup ringan (storage, metrik); model Gemini dan pandas baru dimuat di mode Guru
+initialize_app()
+
 # ========== SESSION STATE ==========
 if 'role' not in st.session_state:
     st.session_state.role = None
@@ -36,10 +41,22 @@ with st.sidebar:
         st.session_state.lkpd_id = None # Reset ID saat ganti peran
         st.rerun()
 
-# Cek inisialisasi model
-if model is None:
-    st.warning("⚠️ **Gemini AI Belum Siap.** Pastikan API Key dimasukkan dengan benar di Streamlit Secrets dan akun tidak diblokir.")
-    st.stop()
+    # PANEL ADMIN: metrik performa (hanya untuk Guru)
+    if st.session_state.role == "👨‍🏫 Guru":
+        with st.expander("📈 Admin: Metrik Performa"):
+            import pandas as pd
+
+            snapshot = metrics_snapshot()
+            cache_stats = doc_cache_stats()
+            st.caption(f"Cache dokumen: {cache_stats['hit_rate']:.0%} hit ({cache_stats['entries']} entri)")
+            budget = token_budget_status()
+            st.caption(f"Token Gemini hari ini: {budget['today']:,}"
+                       + (f" / {budget['daily_limit']:,}" if budget['daily_limit'] else ""))
+            if snapshot['latency']:
+                st.dataframe(pd.DataFrame(snapshot['latency']), use_container_width=True, hide_index=True)
+            if snapshot['counters']:
+                st.dataframe(pd.DataFrame(snapshot['counters']), use_container_width=True, hide_index=True)
+            st.download_button("📥 Prometheus metrics", metrics_text(), "metrics.prom", "text/plain")
 
 # ========== MAIN PAGE DISPLAY ==========
 st.title("🚀 LMS Interaktif EduAI")
@@ -53,8 +70,141 @@ if not st.session_state.role:
     st.warning("👈 Silakan pilih peran Anda di sidebar.")
     st.stop()
 
+# ========== HELPERS ==========
+REPORT_SORT_OPTIONS = {"Waktu Submit": "waktu", "Nama": "nama", "Nilai": "nilai"}
+
+def render_kegiatan(i: int, kegiatan: Dict[str, Any]) -> None:
+    with st.expander(f"Kegiatan {i}: {kegiatan.get('nama', '')}"):
+        st.markdown(f"**Petunjuk:** {kegiatan.get('petunjuk', '')}")
+        st.markdown("**Tugas Interaktif:**")
+        for tugas in kegiatan.get('tugas_interaktif', []):
+            st.markdown(f"• {tugas}")
+        st.markdown("**Pertanyaan Pemantik:**")
+        for q in kegiatan.get('pertanyaan_pemantik', []):
+            st.markdown(f"❓ {q['pertanyaan']}")
+
+def render_jawaban_detail(jawaban: Dict[str, Any]) -> None:
+    with st.container(border=True):
+        st.markdown(f"#### 👤 {jawaban.get('nama_siswa', 'Anonim')} - **Nilai: {jawaban.get('total_score', 'N/A')}**")
+        st.info(f"**Feedback AI:** {jawaban.get('feedback') or 'Belum ada feedback.'}")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("**Kelebihan (Strengths):**")
+            for strength in jawaban.get('strengths', []):
+                st.success(f"• {strength}")
+        with col2:
+            st.write("**Perbaikan (Improvements):**")
+            for imp in jawaban.get('improvements', []):
+                st.warning(f"• {imp}")
+
+@st.fragment(run_every=2)
+def render_scoring_job(lkpd_id: str) -> None:
+    """Progress of the latest background scoring job, polled every 2 seconds"""
+    job = get_scoring_job(lkpd_id)
+    if not job:
+        return
+    watch_key = f"job_watch_{job['id']}"
+
+    if job['status'] in ACTIVE_STATUSES:
+        st.session_state[watch_key] = True
+        if job['total']:
+            eta = job_eta(job)
+            label = f"🤖 Menilai {job['done']}/{job['total']} siswa"
+            if eta is not None:
+                label += f" • sisa ±{eta:.0f} detik"
+            if job['errors']:
+                label += f" • {job['errors']} gagal"
+            st.progress(min(job['done'] / job['total'], 1.0), text=label)
+        else:
+            st.progress(0.0, text="⏳ Menunggu antrean penilaian...")
+        if st.button("⏹️ Batalkan Penilaian", key=f"cancel_{job['id']}"):
+            cancel_job(job['id'])
+        return
+
+    if job['status'] == DONE:
+        st.success(f"✅ **PENILAIAN SELESAI!** {job['message']}")
+    elif job['status'] == CANCELLED:
+        st.warning(f"⏹️ Penilaian dibatalkan ({job['done']}/{job['total']} siswa sudah dinilai).")
+    else:
+        st.error(f"❌ Gagal dalam proses penilaian: {job['message']}")
+
+    # Rerun penuh sekali saat job yang sedang dipantau selesai, agar daftar nilai ikut diperbarui
+    if st.session_state.pop(watch_key, False):
+        st.rerun()
+
+# Kolom tabel pemantauan yang ikut diperbarui dari feed perubahan
+LIVE_COLUMNS = ['lkpd_id', 'nama_siswa', 'waktu_submit', 'total_score', 'dinilai']
+
+@st.fragment(run_every=MONITOR_REFRESH_SECONDS)
+def render_live_monitor() -> None:
+    """Submission metrics and table, patched with new submit/score events without a full rerun"""
+    from analytics import WAKTU_FORMAT
+
+    monitor = st.session_state.live_monitor
+    events, monitor['cursor'] = read_changes(monitor['cursor'], monitor['ids'])
+    rows = monitor['rows']
+    for event in events:
+        # Impor ulang file yang sama tidak boleh menimpa nilai yang sudah ada
+        if event['type'] == 'imported' and event['filename'] in rows:
+            continue
+        row = {col: event.get(col) for col in LIVE_COLUMNS}
+        row['waktu_submit'] = pd.to_datetime(row['waktu_submit'], format=WAKTU_FORMAT, errors='coerce')
+        rows[event['filename']] = row
+        monitor['changed'].add(event['filename'])
+
+    if not rows:
+        st.info("⏳ **Belum ada siswa submit** - Bagikan ID ke kelas!")
+        return
+    if monitor['judul']:
+        st.success(f"✅ **{len(rows)} SISWA** sudah submit untuk LKPD: **{monitor['judul']}**")
+    else:
+        st.success(f"✅ **{len(rows)} SUBMISSION** dari **{len(monitor['ids'])} LKPD**")
+
+    submissions = pd.DataFrame(list(rows.values()), columns=LIVE_COLUMNS)
+    submissions['total_score'] = pd.to_numeric(submissions['total_score'], errors='coerce')
+    dinilai = submissions['dinilai'].astype(bool)
+    # Rata-rata hanya dari jawaban yang sudah dinilai
+    rata_rata = submissions.loc[dinilai, 'total_score'].mean()
+
+    # DASHBOARD
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("👥 Total Siswa Submit", len(submissions))
+    with col2:
+        st.metric("✅ Sudah Dinilai", int(dinilai.sum()))
+    with col3:
+        st.metric("⭐ Rata-rata Nilai", f"{rata_rata:.1f}" if pd.notna(rata_rata) else "-")
+
+    # Grafik & ringkasan dihitung ulang hanya atas permintaan (beban penuh analytics)
+    if monitor['changed']:
+        col_info, col_refresh = st.columns([3, 1])
+        col_info.info(f"🔔 {len(monitor['changed'])} perubahan baru sejak statistik dimuat")
+        if col_refresh.button("🔄 Perbarui statistik", key="refresh_monitor_stats"):
+            st.rerun()
+
+    # TABLE SISWA
+    status = dinilai.map({True: '✅ Dinilai', False: '⏳ Belum Dinilai'})
+    is_new = pd.Series([filename in monitor['changed'] for filename in rows], index=submissions.index)
+    df = pd.DataFrame({
+        'ID LKPD': submissions['lkpd_id'],
+        'Nama': submissions['nama_siswa'],
+        'Waktu Submit': submissions['waktu_submit'],
+        'Nilai (0-100)': submissions['total_score'].where(dinilai),
+        'Status': status.where(~is_new, status + ' 🔔'),
+    })
+    if len(monitor['ids']) == 1:
+        df = df.drop(columns='ID LKPD')
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
 # ========== MODE GURU ==========
 if st.session_state.role == "👨‍🏫 Guru":
+    import pandas as pd
+
+    # Cek inisialisasi model (dibuat saat Guru pertama kali membuka halaman; mode Siswa tidak memakainya)
+    if get_model() is None:
+        st.warning("⚠️ **Gemini AI Belum Siap.** Pastikan API Key dimasukkan dengan benar di Streamlit Secrets dan akun tidak diblokir.")
+        st.stop()
     
     # TABS GURU
     tab1, tab2, tab3 = st.tabs(["📝 Buat LKPD", "📊 Pemantauan Siswa", "📈 Penilaian & Report"])
@@ -65,93 +215,98 @@ if st.session_state.role == "👨‍🏫 Guru":
         col1, col2 = st.columns([2, 1])
         with col1:
             theme = st.text_input("Masukkan Tema", placeholder="Gerak Lurus")
+            fresh_lkpd = st.checkbox("Buat versi baru (abaikan LKPD tersimpan untuk tema ini)", value=False)
         with col2:
             if st.button("🚀 Generate LKPD", use_container_width=True):
                 if theme:
-                    with st.spinner("🤖 AI merancang LKPD..."):
-                        lkpd_data = generate_lkpd(theme) 
+                    # STREAMING: tampilkan judul, materi & kegiatan begitu selesai dibuat AI
+                    status_box = st.empty()
+                    id_box = st.empty()
+                    status_box.info("🤖 AI merancang LKPD...")
+                    st.markdown("---")
+                    judul_box = st.empty()
+                    materi_box = st.empty()
+                    kegiatan_box = st.container()
+
+                    lkpd_data = None
+                    error_msg = None
+                    for event in generate_lkpd_stream(theme, use_cache=not fresh_lkpd):
+                        if event[0] == 'field' and event[1] == 'judul':
+                            judul_box.subheader(f"📋 {event[2]}")
+                        elif event[0] == 'field' and event[1] == 'materi_singkat':
+                            materi_box.info(event[2])
+                        elif event[0] == 'kegiatan':
+                            with kegiatan_box:
+                                render_kegiatan(event[1] + 1, event[2])
+                        elif event[0] == 'done':
+                            lkpd_data = event[1]
+                        elif event[0] == 'error':
+                            error_msg = event[1]
 
                     if lkpd_data:
                         try:
                             lkpd_id = str(uuid.uuid4())[:8]
-                            os.makedirs("lkpd_outputs", exist_ok=True)
-                            filepath = f"lkpd_outputs/{lkpd_id}.json"
-                            
-                            with open(filepath, 'w', encoding='utf-8') as f:
-                                json.dump(lkpd_data, f, ensure_ascii=False, indent=2)
+                            if not save_lkpd(lkpd_id, lkpd_data):
+                                raise IOError("LKPD tidak dapat disimpan")
                             
                             st.session_state.lkpd_id = lkpd_id # Update session state
-                            st.success(f"✅ **LKPD SIAP!** ID: `{lkpd_id}`")
-                            st.info(f"**Share ke siswa:** `{lkpd_id}`")
-                            
-                            # DISPLAY LKPD
-                            st.markdown("---")
-                            st.subheader(f"📋 {lkpd_data['judul']}")
-                            st.info(lkpd_data['materi_singkat'])
-                            # ... (Tampilkan detail kegiatan) ...
-                            for i, kegiatan in enumerate(lkpd_data.get('kegiatan', []), 1):
-                                with st.expander(f"Kegiatan {i}: {kegiatan['nama']}"):
-                                    st.markdown(f"**Petunjuk:** {kegiatan['petunjuk']}")
-                                    st.markdown("**Tugas Interaktif:**")
-                                    for tugas in kegiatan.get('tugas_interaktif', []):
-                                        st.markdown(f"• {tugas}")
-                                    st.markdown("**Pertanyaan Pemantik:**")
-                                    for q in kegiatan.get('pertanyaan_pemantik', []):
-                                        st.markdown(f"❓ {q['pertanyaan']}")
+                            status_box.success(f"✅ **LKPD SIAP!** ID: `{lkpd_id}`")
+                            id_box.info(f"**Share ke siswa:** `{lkpd_id}`")
                                     
                         except Exception as e:
-                            st.error(f"❌ Error saat menyimpan/menampilkan LKPD: {e}")
+                            status_box.error(f"❌ Error saat menyimpan/menampilkan LKPD: {e}")
                     else:
-                        st.error("❌ Gagal mendapatkan respons LKPD dari AI.")
+                        status_box.error(f"❌ Gagal mendapatkan respons LKPD dari AI. {error_msg or ''}")
 
     # --- Tab 2: Pemantauan Siswa ---
     with tab2:
         st.header("📊 Pemantauan Siswa Real-time")
         # Sinkronisasi ID LKPD dengan session state
         default_monitor_id = st.session_state.get('lkpd_id', '')
-        lkpd_monitor_id = st.text_input("Masukkan ID LKPD untuk Monitor:", 
+        lkpd_monitor_id = st.text_input("Masukkan ID LKPD untuk Monitor (pisahkan dengan koma untuk beberapa kelas):", 
                                          value=default_monitor_id, 
                                          key="monitor_id")
         
-        if lkpd_monitor_id:
-            lkpd_data = load_lkpd(lkpd_monitor_id)
-            if lkpd_data:
-                all_jawaban = load_all_jawaban(lkpd_monitor_id)
-                
-                if all_jawaban:
-                    st.success(f"✅ **{len(all_jawaban)} SISWA** sudah submit untuk LKPD: **{lkpd_data['judul']}**")
-                    
-                    # Hitung rata-rata nilai
-                    scored_answers = [j.get('total_score', 0) for j in all_jawaban if isinstance(j.get('total_score'), (int, float)) and j.get('total_score') > 0]
-                    total_nilai = sum(scored_answers)
-                    rata_rata = total_nilai / len(scored_answers) if scored_answers else 0
-
-                    # DASHBOARD
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("👥 Total Siswa Submit", len(all_jawaban))
-                    with col2:
-                        st.metric("✅ Status LKPD", "Tersedia")
-                    with col3:
-                        st.metric("⭐ Rata-rata Nilai", f"**{rata_rata:.1f}**")
-                    
-                    # TABLE SISWA
-                    data_siswa = []
-                    for jawaban in all_jawaban:
-                        data_siswa.append({
-                            'Nama': jawaban.get('nama_siswa', 'Anonim'),
-                            'Waktu Submit': jawaban.get('waktu_submit', 'N/A'),
-                            'Nilai (0-100)': jawaban.get('total_score', 'Belum Dinilai'),
-                            'Status': '✅ Selesai'
-                        })
-                    
-                    df = pd.DataFrame(data_siswa)
-                    st.dataframe(df, use_container_width=True)
-                    
-                else:
-                    st.info("⏳ **Belum ada siswa submit** - Bagikan ID ke kelas!")
-            else:
-                st.error("❌ ID LKPD tidak ditemukan!")
+        monitor_ids = list(dict.fromkeys(i.strip() for i in lkpd_monitor_id.split(',') if i.strip()))
+        if monitor_ids:
+            found_ids = [i for i in monitor_ids if load_lkpd(i)]
+            missing_ids = [i for i in monitor_ids if i not in found_ids]
+            if missing_ids:
+                st.error(f"❌ ID LKPD tidak ditemukan: {', '.join(missing_ids)}")
+            if found_ids:
+                # Cursor diambil sebelum memuat statistik: perubahan di antaranya tetap terbaca fragment
+                cursor = event_cursor()
+                stats = class_analytics(found_ids)
+                submissions = stats['submissions']
+                st.session_state.live_monitor = {
+                    'ids': found_ids,
+                    'judul': load_lkpd(found_ids[0])['judul'] if len(found_ids) == 1 else None,
+                    'cursor': cursor,
+                    'rows': {row['filename']: {col: row[col] for col in LIVE_COLUMNS}
+                             for row in submissions.to_dict('records')},
+                    'changed': set(),
+                }
+                render_live_monitor()
+
+                if len(submissions):
+                    st.subheader("📈 Ringkasan Kelas")
+                    st.dataframe(stats['summary'], use_container_width=True)
+
+                    col_dist, col_time = st.columns(2)
+                    with col_dist:
+                        st.markdown("**Distribusi Nilai**")
+                        st.bar_chart(stats['distribution'])
+                    with col_time:
+                        st.markdown("**Waktu Submit**")
+                        if not stats['timeline'].empty:
+                            st.line_chart(stats['timeline'])
+
+                    st.markdown("**Per Pertanyaan**")
+                    st.dataframe(stats['questions'], use_container_width=True, hide_index=True)
+
+                    if len(found_ids) > 1 and not stats['trends'].empty:
+                        st.markdown("**Tren Nilai Siswa antar LKPD**")
+                        st.dataframe(stats['trends'], use_container_width=True)
     
     # --- Tab 3: Penilaian & Report ---
     with tab3:
@@ -163,60 +318,136 @@ if st.session_state.role == "👨‍🏫 Guru":
                                    key="report_id")
         
         if report_id:
-            all_jawaban = load_all_jawaban(report_id)
+            # IMPORT JAWABAN OFFLINE (kertas / Google Forms)
+            with st.expander("📥 Import Jawaban dari CSV/XLSX"):
+                st.caption("Kolom: `nama_siswa`, `pertanyaan`, `jawaban` (satu baris per jawaban), atau `nama_siswa` "
+                           "+ satu kolom per pertanyaan (mis. export Google Forms). Pertanyaan boleh ditulis nomornya.")
+                upload = st.file_uploader("File jawaban", type=["csv", "xlsx"], key=f"import_file_{report_id}")
+                import_score = st.checkbox("Langsung nilai jawaban yang diimpor", value=True, key="import_score")
+                if upload is not None and st.button("📥 Import", key="import_button"):
+                    with st.spinner("Mengimpor jawaban..."):
+                        st.session_state.import_result = (report_id, import_jawaban(
+                            report_id, upload, upload.name, score=import_score, background=True))
+                    st.rerun()
+                imported_id, result = st.session_state.get('import_result') or (None, None)
+                if result and imported_id == report_id:
+                    if result['imported']:
+                        st.success(f"✅ {result['imported']} siswa diimpor dari {result['rows']} baris "
+                                   "(file yang sama tidak akan menggandakan jawaban)")
+                    if result.get('existing'):
+                        st.info(f"↩️ {result['existing']} siswa sudah ada dengan jawaban yang sama, dilewati")
+                    for error in result['errors'][:20]:
+                        st.warning(error)
+                    if len(result['errors']) > 20:
+                        st.caption(f"... dan {len(result['errors']) - 20} peringatan lain")
+
+            # Hanya hitung jumlah submission (tanpa memuat isi jawaban)
+            _, total_submit = query_jawaban_page(report_id, page_size=1)
             
-            if all_jawaban:
+            if total_submit:
                 
                 # AI SCORING
-                if st.button("🤖 **Nilai Semua Jawaban**", use_container_width=True):
-                    with st.spinner("🤖 AI menilai semua jawaban. Mohon tunggu..."):
-                        success = score_all_jawaban(report_id)
-                    
-                    if success:
-                        st.success("✅ **PENILAIAN SELESAI!** Data telah diperbarui.")
-                        st.rerun() # Refresh untuk memuat skor yang baru
-                    else:
-                        st.error("❌ Gagal dalam proses penilaian. Cek log.")
+                col_all, col_pending = st.columns(2)
+                with col_all:
+                    score_all_clicked = st.button("🤖 **Nilai Semua Jawaban**", use_container_width=True)
+                with col_pending:
+                    score_pending_clicked = st.button("⏩ **Nilai yang Belum Dinilai**", use_container_width=True)
 
-                # SHOW SCORES
+                # Penilaian berjalan di background worker; progres dipantau lewat fragment
+                for clicked, incremental in ((score_all_clicked, False), (score_pending_clicked, True)):
+                    if not clicked:
+                        continue
+                    running = get_scoring_job(report_id)
+                    job = enqueue_scoring_job(report_id, incremental=incremental)
+                    if running and running['status'] == RUNNING and running['id'] != job['id']:
+                        st.info("📋 Penilaian diantrekan dan dimulai setelah penilaian yang sedang berjalan selesai.")
+
+                render_scoring_job(report_id)
+
+                # SHOW SCORES (per halaman, diurutkan & difilter di query penyimpanan)
                 st.subheader("📋 Detail Penilaian")
-                
-                # Muat ulang jawaban untuk menampilkan skor terbaru (setelah rerun)
-                all_jawaban_scored = load_all_jawaban(report_id)
-                
-                if all_jawaban_scored:
-                    
-                    for jawaban in all_jawaban_scored:
-                        score = jawaban.get('total_score', 'N/A')
-                        nama = jawaban['nama_siswa']
-                        
-                        with st.expander(f"👤 {nama} - **Nilai: {score}**"):
-                            st.info(f"**Feedback AI:** {jawaban.get('feedback', 'Belum ada feedback.')}")
-                            
-                            col1, col2 = st.columns(2)
-                            with col1:
-                                st.write("**Kelebihan (Strengths):**")
-                                for strength in jawaban.get('strengths', []):
-                                    st.success(f"• {strength}")
-                            with col2:
-                                st.write("**Perbaikan (Improvements):**")
-                                for imp in jawaban.get('improvements', []):
-                                    st.warning(f"• {imp}")
-                
-                    # EXPORT CSV
-                    df_export = pd.DataFrame([{
-                        'Nama Siswa': j['nama_siswa'],
-                        'Nilai': j.get('total_score', 'N/A'),
-                        'Feedback Singkat': j.get('feedback', '')[:70] + '...' if j.get('feedback') else ''
-                    } for j in all_jawaban_scored])
-
-                    csv = df_export.to_csv(index=False).encode('utf-8')
-                    st.download_button(
-                        "📥 Download Report CSV",
-                        csv,
-                        f"report_{report_id}_{datetime.now().strftime('%Y%m%d')}.csv",
-                        "text/csv"
-                    )
+                col_search, col_sort, col_order = st.columns([2, 1, 1])
+                with col_search:
+                    search = st.text_input("🔍 Cari nama siswa", key="report_search")
+                with col_sort:
+                    sort_label = st.selectbox("Urutkan", list(REPORT_SORT_OPTIONS), key="report_sort")
+                with col_order:
+                    descending = st.toggle("Menurun", value=True, key="report_desc")
+                col_range, col_size = st.columns([3, 1])
+                with col_range:
+                    min_score, max_score = st.slider("Rentang nilai", 0, 100, (0, 100), key="report_range")
+                with col_size:
+                    page_size = st.selectbox("Baris per halaman", [10, 25, 50, 100], index=1, key="report_page_size")
+
+                filters = dict(search=search, min_score=min_score, max_score=max_score,
+                               sort=REPORT_SORT_OPTIONS[sort_label], descending=descending)
+                # Kembali ke halaman 1 setiap kali filter berubah
+                filter_key = (report_id, tuple(filters.items()), page_size)
+                if st.session_state.get('report_filter_key') != filter_key:
+                    st.session_state.report_filter_key = filter_key
+                    st.session_state.report_page = 1
+                _, total_match = query_jawaban_page(report_id, page_size=1, **filters)
+                page_count = max(1, -(-total_match // page_size))
+                page = st.number_input(f"Halaman (dari {page_count})", min_value=1, max_value=page_count,
+                                       step=1, key="report_page")
+                rows, _ = query_jawaban_page(report_id, page=int(page), page_size=page_size, **filters)
+
+                if rows:
+                    df_page = pd.DataFrame([{
+                        'Nama': r['nama_siswa'] or 'Anonim',
+                        'Waktu Submit': r['waktu_submit'] or 'N/A',
+                        'Nilai': r['total_score'] if r['total_score'] is not None else 'N/A',
+                    } for r in rows])
+                    st.caption(f"{total_match} dari {total_submit} siswa · pilih baris untuk melihat detail")
+                    selection = st.dataframe(df_page, use_container_width=True, hide_index=True,
+                                             on_select="rerun", selection_mode="single-row", key="report_table")
+                    selected = selection.selection.rows if selection else []
+
+                    # Detail hanya dimuat untuk siswa yang dipilih
+                    if selected:
+                        jawaban = load_jawaban_detail(rows[selected[0]]['filename'])
+                        if jawaban:
+                            render_jawaban_detail(jawaban)
+                else:
+                    st.info("Tidak ada siswa yang cocok dengan filter.")
+
+                # PLAGIARISME (dihitung hanya saat diminta, di-cache sampai ada jawaban baru)
+                if st.toggle("🔎 Periksa kemiripan jawaban (kemungkinan plagiarisme)", key="report_similarity"):
+                    findings = find_similar_answers(report_id)
+                    if not findings:
+                        st.success("Tidak ditemukan jawaban yang hampir sama.")
+                    for finding in findings:
+                        sumber = "materi LKPD" if finding['sumber'] == 'materi' else "sesama siswa"
+                        with st.expander(f"⚠️ {len(finding['siswa'])} siswa · mirip {sumber} "
+                                         f"({finding['kemiripan']:.0%}) · {finding['pertanyaan'][:60]}"):
+                            st.write("**Siswa:** " + ", ".join(finding['siswa']))
+                            st.caption(finding['contoh'][:500])
+
+                # EXPORT (dibuat hanya saat diminta)
+                st.subheader("📥 Export Report")
+                export_formats = ["csv", "xlsx"] if xlsx_available() else ["csv"]
+                col_fmt, col_btn = st.columns([1, 2])
+                with col_fmt:
+                    export_fmt = st.radio("Format", export_formats, horizontal=True, key="report_export_fmt",
+                                          format_func=str.upper)
+                with col_btn:
+                    if st.button("📄 Siapkan File Export", use_container_width=True):
+                        with st.spinner("Menyusun report..."):
+                            previous = st.session_state.pop('report_export', None)
+                            # File export sebelumnya (file sementara) dihapus saat diganti
+                            if previous and os.path.exists(previous[2]):
+                                os.remove(previous[2])
+                            st.session_state.report_export = (report_id, export_fmt, export_report(report_id, export_fmt))
+                export = st.session_state.get('report_export')
+                if export and export[0] == report_id and os.path.exists(export[2]):
+                    _, fmt, path = export
+                    with open(path, 'rb') as payload:
+                        st.download_button(
+                            f"📥 Download Report {fmt.upper()}",
+                            payload,
+                            f"report_{report_id}_{datetime.now().strftime('%Y%m%d')}.{fmt}",
+                            EXPORT_MIME[fmt]
+                        )
             else:
                 st.info("Tidak ada jawaban siswa yang ditemukan untuk ID LKPD ini.")
 
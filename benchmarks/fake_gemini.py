@@ -0,0 +1,141 @@
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# ========== CANNED RESPONSES ==========
+CANNED_LKPD = {
+    "judul": "LKPD Gerak Lurus",
+    "tujuan_pembelajaran": ["Menjelaskan GLB", "Menjelaskan GLBB"],
+    "materi_singkat": "Gerak lurus adalah gerak benda pada lintasan lurus. " * 8,
+    "kegiatan": [
+        {
+            "nama": f"Kegiatan {i}",
+            "petunjuk": "Amati gerak troli dan catat jarak tiap detik.",
+            "tugas_interaktif": ["Ukur jarak", "Hitung kecepatan"],
+            "pertanyaan_pemantik": [{"pertanyaan": f"Pertanyaan {i}.{j}: mengapa kecepatan berubah?"} for j in range(1, 3)],
+        }
+        for i in range(1, 4)
+    ],
+}
+
+_BATCH_ID = re.compile(r'"id": "([^"]+)"')
+
+
+def _score_object(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "score": rng.randint(40, 100),
+        "feedback": "Jawaban sudah menjelaskan konsep utama, tambahkan contoh nyata.",
+        "strengths": ["Konsep benar", "Bahasa jelas"],
+        "improvements": ["Tambahkan contoh", "Perjelas satuan"],
+    }
+
+
+# ========== LATENCY MODELS ==========
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """'fixed:0.5', 'uniform:0.2,1.5' or 'lognormal:0.8,0.4' (median seconds, sigma) -> sampler"""
+    kind, _, args = spec.partition(':')
+    values = [float(v) for v in args.split(',')] if args else []
+    if kind == 'fixed':
+        return lambda rng: values[0]
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'lognormal':
+        median, sigma = values
+        return lambda rng: rng.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+# ========== FAKE SDK OBJECTS ==========
+class FakeAPIError(Exception):
+    """Mimics google.api_core exceptions: carries the HTTP status in `.code`"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeUsage:
+    def __init__(self, prompt_tokens: int, output_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.total_token_count = prompt_tokens + output_tokens
+
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeResponse:
+    def __init__(self, text: str, usage: FakeUsage, chunks: Optional[List[str]] = None,
+                 chunk_delay: float = 0.0):
+        self.text = text
+        self.usage_metadata = usage
+        self._chunks = chunks
+        self._chunk_delay = chunk_delay
+
+    def __iter__(self) -> Iterator[FakeChunk]:
+        for chunk in self._chunks or [self.text]:
+            if self._chunk_delay:
+                time.sleep(self._chunk_delay)
+            yield FakeChunk(chunk)
+
+
+class FakeGenerativeModel:
+    """Local stand-in for genai.GenerativeModel used by the benchmark suite.
+
+    Latency is sampled per call from `latency`; `rate_limit_rate` / `error_rate`
+    inject 429 / 503 errors. Responses are canned JSON matching the app's
+    LKPD, single-answer and batch scoring prompts. Thread-safe.
+    """
+
+    def __init__(self, latency: str = "lognormal:0.8,0.4", rate_limit_rate: float = 0.0,
+                 error_rate: float = 0.0, stream_chunks: int = 20, seed: Optional[int] = None,
+                 lkpd: Optional[Dict[str, Any]] = None):
+        self.sample_latency = parse_latency(latency)
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.stream_chunks = stream_chunks
+        self.lkpd = lkpd or CANNED_LKPD
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _roll(self) -> tuple:
+        with self._lock:
+            self.calls += 1
+            return self.sample_latency(self._rng), self._rng.random(), random.Random(self._rng.random())
+
+    def _respond(self, prompt: str, rng: random.Random) -> str:
+        if "NILAI BEBERAPA" in prompt:
+            return json.dumps([dict(_score_object(rng), id=item_id) for item_id in _BATCH_ID.findall(prompt)])
+        if "NILAI JAWABAN" in prompt:
+            return json.dumps(_score_object(rng))
+        return "```json\n" + json.dumps(self.lkpd, ensure_ascii=False, indent=2) + "\n```"
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs: Any) -> FakeResponse:
+        latency, roll, rng = self._roll()
+        if roll < self.rate_limit_rate + self.error_rate:
+            time.sleep(latency * 0.1)
+            with self._lock:
+                self.failures += 1
+            if roll < self.rate_limit_rate:
+                raise FakeAPIError(429, "Resource has been exhausted (e.g. check quota).")
+            raise FakeAPIError(503, "The service is currently unavailable.")
+
+        text = self._respond(prompt, rng)
+        usage = FakeUsage(len(prompt) // 4, len(text) // 4)
+        if not stream:
+            time.sleep(latency)
+            return FakeResponse(text, usage)
+
+        # Stream: ±20% latensi sampai chunk pertama, sisanya tersebar di chunk berikutnya
+        size = max(1, math.ceil(len(text) / self.stream_chunks))
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        time.sleep(latency * 0.2)
+        return FakeResponse(text, usage, chunks, chunk_delay=latency * 0.8 / len(chunks))
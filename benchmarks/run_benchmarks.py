@@ -0,0 +1,261 @@
+"""EduAI benchmark suite (no real Gemini quota used).
+
+Drives generate_lkpd, score_jawaban, score_all_jawaban, save_jawaban_siswa and
+load_all_jawaban against FakeGenerativeModel in an isolated temp directory and
+reports throughput, p50/p95/p99 latency and peak traced memory per scenario.
+
+    python -m benchmarks.run_benchmarks --scale quick
+    python -m benchmarks.run_benchmarks --scale full --save-baseline benchmarks/baselines/full.json
+    python -m benchmarks.run_benchmarks --scale full --compare benchmarks/baselines/full.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_gemini import FakeGenerativeModel  # noqa: E402
+
+# ========== SCALES ==========
+SCALES = {
+    'quick': dict(lkpds=50, submissions=2_000, submitters=40, saves_per_submitter=5,
+                  generate_calls=10, score_calls=50, classes=2, class_size=35, questions=6, load_samples=50),
+    'full': dict(lkpds=1_000, submissions=100_000, submitters=40, saves_per_submitter=25,
+                 generate_calls=50, score_calls=500, classes=5, class_size=35, questions=6, load_samples=200),
+}
+
+
+# ========== MEASUREMENT ==========
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+def run_scenario(name: str, fn: Callable[[], List[float]], extra: Optional[Callable[[], Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Run `fn` (returns per-op latencies in seconds) under tracemalloc and summarize it"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    latencies = fn()
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    ordered = sorted(latencies)
+    result = {
+        'ops': len(latencies),
+        'wall_s': round(wall, 4),
+        'throughput_ops_s': round(len(latencies) / wall, 3) if wall else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'peak_mb': round(peak / 1024 / 1024, 2),
+    }
+    if extra:
+        result.update(extra())
+    print(f"{name:<28} {result['ops']:>7} {result['throughput_ops_s']:>10.1f} "
+          f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['peak_mb']:>8.1f}")
+    return result
+
+def timed_calls(fn: Callable[[int], Any], count: int) -> List[float]:
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+# ========== ENVIRONMENT ==========
+def setup_environment(workdir: str, args: argparse.Namespace):
+    """Isolated working dir + secrets, then import gemini_config and install the fake model"""
+    os.makedirs(os.path.join(workdir, ".streamlit"), exist_ok=True)
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), 'w', encoding='utf-8') as f:
+        f.write(
+            f'GEMINI_API_KEY = "benchmark"\n'
+            f'GEMINI_RPM = {args.rpm}\n'
+            f'GEMINI_TPM = {args.tpm}\n'
+            f'GEMINI_MAX_RETRIES = 6\n'
+            f'SCORING_CONCURRENCY = {args.concurrency}\n'
+            f'SCORING_BATCH_MODE = "{args.batch_mode}"\n'
+            f'STORAGE_BACKEND = "{args.backend}"\n'
+            f'STORAGE_FORMAT = "{args.storage_format}"\n'
+            f'STORAGE_COMPRESSION = "{args.storage_compression}"\n'
+            f'JOB_WORKERS = 0\n'
+        )
+    os.chdir(workdir)
+
+    import gemini_config
+    model = FakeGenerativeModel(latency=args.latency, rate_limit_rate=args.rate_limit_rate,
+                                error_rate=args.error_rate, seed=args.seed)
+    gemini_config.set_model(model)
+    return gemini_config, model
+
+def make_answers(questions: int, tag: str) -> Dict[str, str]:
+    return {
+        f"Pertanyaan {q}: jelaskan konsep nomor {q}?":
+            f"Jawaban {tag} untuk pertanyaan {q}: benda bergerak dengan kecepatan tetap karena resultan gaya nol."
+        for q in range(questions)
+    }
+
+
+# ========== SCENARIOS ==========
+def run_all(g, model: FakeGenerativeModel, scale: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+    results: Dict[str, Dict[str, Any]] = {}
+    run_id = uuid.uuid4().hex[:6]
+    print(f"{'scenario':<28} {'ops':>7} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak MB':>8}")
+
+    themes = [f"Tema benchmark {run_id} {i}" for i in range(scale['generate_calls'])]
+    results['generate_lkpd'] = run_scenario(
+        'generate_lkpd', lambda: timed_calls(lambda i: g.generate_lkpd(themes[i]), len(themes)))
+    results['generate_lkpd_cached'] = run_scenario(
+        'generate_lkpd_cached', lambda: timed_calls(lambda i: g.generate_lkpd(themes[i]), len(themes)))
+
+    results['score_jawaban'] = run_scenario('score_jawaban', lambda: timed_calls(
+        lambda i: g.score_jawaban(f"Jawaban unik {run_id}-{i} tentang gaya dan gerak.", "Apa itu GLB?"),
+        scale['score_calls']))
+
+    class_ids = [f"cls{run_id}{c}" for c in range(scale['classes'])]
+    for lkpd_id in class_ids:
+        for s in range(scale['class_size']):
+            g.save_jawaban_siswa(lkpd_id, f"Siswa {s}", {'jawaban': make_answers(scale['questions'], f"{lkpd_id}-{s}")})
+    calls_before = model.calls
+    results['score_all_jawaban'] = run_scenario(
+        'score_all_jawaban', lambda: timed_calls(lambda i: g.score_all_jawaban(class_ids[i]), len(class_ids)),
+        extra=lambda: {'model_calls_per_class': (model.calls - calls_before) / len(class_ids)})
+
+    burst_id = f"burst{run_id}"
+
+    def submit_burst() -> List[float]:
+        def submitter(n: int) -> List[float]:
+            return timed_calls(lambda i: g.save_jawaban_siswa(
+                burst_id, f"Siswa {n}", {'jawaban': make_answers(scale['questions'], f"b{n}-{i}")}),
+                scale['saves_per_submitter'])
+        with ThreadPoolExecutor(max_workers=scale['submitters']) as pool:
+            return [lat for lats in pool.map(submitter, range(scale['submitters'])) for lat in lats]
+    results['save_jawaban_siswa_burst'] = run_scenario('save_jawaban_siswa_burst', submit_burst)
+
+    # Arsip besar: seed langsung lewat backend (tidak diukur sebagai latensi per-submit)
+    storage = g.get_storage()
+    lkpd_ids = [f"arc{run_id}{i:04d}" for i in range(scale['lkpds'])]
+    per_lkpd = max(1, scale['submissions'] // scale['lkpds'])
+    answers = make_answers(scale['questions'], "arsip")
+
+    def seed() -> List[float]:
+        latencies = []
+        for lkpd_id in lkpd_ids:
+            storage.save_lkpd(lkpd_id, dict(model.lkpd))
+            for s in range(per_lkpd):
+                start = time.perf_counter()
+                storage.save_jawaban(f"{lkpd_id}_Siswa_{s}_{s:06x}.json", {
+                    'jawaban': answers, 'lkpd_id': lkpd_id, 'nama_siswa': f"Siswa {s}",
+                    'waktu_submit': datetime.now().strftime("%d/%m/%Y %H:%M:%S"), 'total_score': s % 100,
+                    'feedback': "Cukup baik. " * 10, 'strengths': ["a", "b"], 'improvements': ["c"],
+                })
+                latencies.append(time.perf_counter() - start)
+        return latencies
+    results['seed_archive'] = run_scenario('seed_archive', seed)
+
+    sample = [lkpd_ids[i % len(lkpd_ids)] for i in range(scale['load_samples'])]
+
+    def load(fn: Callable[[str], Any], cold: bool) -> List[float]:
+        if not cold:
+            for lkpd_id in set(sample):
+                fn(lkpd_id)
+
+        def call(i: int) -> None:
+            if cold:
+                g._doc_cache.clear()
+            fn(sample[i])
+        return timed_calls(call, len(sample))
+    results['load_all_jawaban_cold'] = run_scenario('load_all_jawaban_cold', lambda: load(g.load_all_jawaban, True))
+    results['load_all_jawaban_warm'] = run_scenario('load_all_jawaban_warm', lambda: load(g.load_all_jawaban, False))
+    results['load_summary_cold'] = run_scenario('load_summary_cold', lambda: load(g.load_jawaban_summary, True))
+    results['load_lkpd_warm'] = run_scenario('load_lkpd_warm', lambda: load(g.load_lkpd, False))
+    return results
+
+
+# ========== BASELINES ==========
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Scenarios whose p95 grew or throughput dropped by more than `threshold` (fraction)"""
+    regressions = []
+    for name, base in baseline.get('results', {}).items():
+        current = results.get(name)
+        if not current:
+            continue
+        if base['p95_ms'] and current['p95_ms'] > base['p95_ms'] * (1 + threshold):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+        if base['throughput_ops_s'] and current['throughput_ops_s'] < base['throughput_ops_s'] * (1 - threshold):
+            regressions.append(f"{name}: throughput {base['throughput_ops_s']:.1f} -> {current['throughput_ops_s']:.1f} ops/s")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="EduAI benchmark suite with a fake Gemini model")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="quick")
+    parser.add_argument("--latency", default="lognormal:0.8,0.4", help="fixed:S | uniform:A,B | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of calls failing with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls failing with 503")
+    parser.add_argument("--rpm", type=float, default=0, help="Limiter RPM (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=0, help="Limiter TPM (0 = unlimited)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-mode", default="siswa", choices=["off", "siswa", "pertanyaan"])
+    parser.add_argument("--backend", default="sqlite", choices=["sqlite", "json"])
+    parser.add_argument("--storage-format", default="", choices=["", "json", "compact", "msgpack"])
+    parser.add_argument("--storage-compression", default="none", choices=["none", "gzip", "zstd"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="Working directory (default: fresh temp dir)")
+    parser.add_argument("--save-baseline", help="Write results JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed regression fraction")
+    args = parser.parse_args(argv)
+
+    for attr in ("save_baseline", "compare"):
+        if getattr(args, attr):
+            setattr(args, attr, os.path.abspath(getattr(args, attr)))
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="eduai-bench-")
+    g, model = setup_environment(workdir, args)
+    print(f"📂 {workdir} • scale={args.scale} • backend={args.backend} • latency={args.latency}")
+    results = run_all(g, model, SCALES[args.scale])
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'scale': args.scale, 'backend': args.backend, 'latency': args.latency,
+            'batch_mode': args.batch_mode, 'concurrency': args.concurrency,
+            'fake_model_calls': model.calls, 'fake_model_failures': model.failures,
+        },
+        'results': results,
+    }
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or ".", exist_ok=True)
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("❌ Regressions:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""EduAI import-time and cold-start benchmark.
+
+Every sample is a fresh Python process in an isolated temp directory, so module
+import cost is paid each time (as on a new Streamlit replica or container):
+
+- import_gemini_config: `import gemini_config` only
+- student_start: import + initialize_app + load_lkpd (the Siswa page)
+- guru_start: student_start + get_model + analytics (the Guru dashboard), using
+  FakeGenerativeModel as MODEL_PROVIDER
+
+Also reports which heavy modules each path loaded and the slowest imports from
+`python -X importtime`.
+
+    python -m benchmarks.run_startup --runs 20
+    python -m benchmarks.run_startup --save-baseline benchmarks/baselines/startup.json
+    python -m benchmarks.run_startup --compare benchmarks/baselines/startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.run_benchmarks import compare, percentile  # noqa: E402
+
+HEAVY_MODULES = ["google.generativeai", "pandas", "numpy"]
+LKPD_ID = "startup"
+
+# Kode yang dijalankan di proses anak; mencetak satu baris JSON berisi durasi tiap tahap
+_CHILD_TEMPLATE = """
+import json, sys, time
+start = time.perf_counter()
+import gemini_config
+stages = {{'import': time.perf_counter() - start}}
+if {student}:
+    gemini_config.initialize_app()
+    assert gemini_config.load_lkpd({lkpd_id!r}) is not None
+    stages['student'] = time.perf_counter() - start
+if {guru}:
+    assert gemini_config.get_model() is not None
+    gemini_config.class_analytics([{lkpd_id!r}])
+    stages['guru'] = time.perf_counter() - start
+stages['heavy'] = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps(stages))
+"""
+
+SCENARIOS = {
+    'import_gemini_config': dict(student=False, guru=False, stage='import'),
+    'student_start': dict(student=True, guru=False, stage='student'),
+    'guru_start': dict(student=True, guru=True, stage='guru'),
+}
+
+
+# ========== ENVIRONMENT ==========
+def setup_environment(workdir: str, args: argparse.Namespace) -> None:
+    """Isolated working dir + secrets (fake model provider) and one stored LKPD"""
+    os.makedirs(os.path.join(workdir, ".streamlit"), exist_ok=True)
+    with open(os.path.join(workdir, ".streamlit", "secrets.toml"), 'w', encoding='utf-8') as f:
+        f.write(
+            f'GEMINI_API_KEY = "benchmark"\n'
+            f'MODEL_PROVIDER = "benchmarks.fake_gemini:FakeGenerativeModel"\n'
+            f'STORAGE_BACKEND = "{args.backend}"\n'
+            f'JOB_WORKERS = 0\n'
+            f'\n[MODEL_OPTIONS]\nlatency = "fixed:0"\n'
+        )
+    seed = ("import gemini_config\n"
+            "from benchmarks.fake_gemini import FakeGenerativeModel\n"
+            f"gemini_config.save_lkpd({LKPD_ID!r}, dict(FakeGenerativeModel().lkpd))\n")
+    run_child(workdir, seed)
+
+def run_child(workdir: str, code: str, *flags: str) -> Tuple[str, str]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get('PYTHONPATH')])))
+    proc = subprocess.run([sys.executable, *flags, "-c", code], cwd=workdir, env=env,
+                          capture_output=True, text=True, check=False)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Child process failed:\n{proc.stderr[-2000:]}")
+    return proc.stdout, proc.stderr
+
+
+# ========== SCENARIOS ==========
+def run_scenario(workdir: str, name: str, runs: int) -> Dict[str, Any]:
+    """`runs` fresh processes: in-process time to the scenario's last stage and total process wall time"""
+    spec = SCENARIOS[name]
+    code = _CHILD_TEMPLATE.format(student=spec['student'], guru=spec['guru'], lkpd_id=LKPD_ID, heavy=HEAVY_MODULES)
+    latencies, process_times, heavy = [], [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        stdout, _ = run_child(workdir, code)
+        process_times.append(time.perf_counter() - start)
+        stages = json.loads(stdout.strip().splitlines()[-1])
+        latencies.append(stages[spec['stage']])
+        heavy = stages['heavy']
+
+    ordered, wall = sorted(latencies), sum(process_times)
+    result = {
+        'ops': runs,
+        'wall_s': round(wall, 4),
+        'throughput_ops_s': round(runs / wall, 3) if wall else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'process_p50_ms': round(percentile(sorted(process_times), 0.50) * 1000, 3),
+        'heavy_modules': heavy,
+    }
+    print(f"{name:<24} {runs:>5} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+          f"{result['process_p50_ms']:>11.1f}  {', '.join(heavy) or '-'}")
+    return result
+
+def slowest_imports(workdir: str, top: int) -> List[Tuple[str, float]]:
+    """(module, cumulative ms) of the `top` slowest imports under `import gemini_config`"""
+    _, stderr = run_child(workdir, "import gemini_config", "-X", "importtime")
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = (part.strip() for part in line[len("import time:"):].split("|"))
+        rows.append((module, int(cumulative) / 1000))
+    return sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="EduAI import-time and cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh processes per scenario")
+    parser.add_argument("--backend", default="sqlite", choices=["sqlite", "json"])
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list (0 = skip)")
+    parser.add_argument("--workdir", help="Working directory (default: fresh temp dir)")
+    parser.add_argument("--save-baseline", help="Write results JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed regression fraction")
+    args = parser.parse_args(argv)
+
+    for attr in ("save_baseline", "compare"):
+        if getattr(args, attr):
+            setattr(args, attr, os.path.abspath(getattr(args, attr)))
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="eduai-startup-")
+    setup_environment(workdir, args)
+    print(f"📂 {workdir} • runs={args.runs} • backend={args.backend}")
+    print(f"{'scenario':<24} {'runs':>5} {'p50 ms':>9} {'p95 ms':>9} {'process ms':>11}  heavy modules")
+    results = {name: run_scenario(workdir, name, args.runs) for name in SCENARIOS}
+
+    if args.top:
+        print("\nSlowest imports (cumulative) for `import gemini_config`:")
+        for module, ms in slowest_imports(workdir, args.top):
+            print(f"  {ms:>9.1f} ms  {module}")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'runs': args.runs, 'backend': args.backend,
+        },
+        'results': results,
+    }
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or ".", exist_ok=True)
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("❌ Regressions:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
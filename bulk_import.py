@@ -0,0 +1,160 @@
+import argparse
+import csv
+import hashlib
+import io
+import itertools
+import json
+import re
+import logging
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# ========== LOGGING SETUP ==========
+logger = logging.getLogger(__name__)
+
+# ========== CONSTANTS ==========
+# Nama kolom yang dikenali (dibandingkan tanpa beda huruf besar/spasi/garis bawah)
+NAME_HEADERS = {"nama siswa", "nama", "name", "student", "siswa"}
+QUESTION_HEADERS = {"pertanyaan", "question", "soal"}
+ANSWER_HEADERS = {"jawaban", "answer"}
+IMPORT_EXTENSIONS = ("csv", "xlsx")
+_NUMBERED = re.compile(r"^(?:no\.?|q|soal)?\s*(\d+)[.)]?$")
+
+
+def _header_key(value: Any) -> str:
+    return " ".join(str(value or "").replace('_', ' ').split()).casefold()
+
+
+def lkpd_questions(lkpd: Optional[Dict[str, Any]]) -> List[str]:
+    """All pertanyaan_pemantik of an LKPD, in kegiatan order"""
+    return [q['pertanyaan'] for k in (lkpd or {}).get('kegiatan', [])
+            for q in k.get('pertanyaan_pemantik', []) if q.get('pertanyaan')]
+
+
+def normalize_question(text: str) -> str:
+    """Casefold, collapse whitespace and drop trailing punctuation so retyped questions still match"""
+    return " ".join((text or "").split()).casefold().rstrip(" ?.:!")
+
+
+# ========== STREAMING READERS ==========
+def iter_rows(fileobj: IO[bytes], filename: str) -> Iterator[List[str]]:
+    """Rows of a CSV (UTF-8, optional BOM; comma or semicolon) or XLSX upload as lists of strings"""
+    ext = filename.rsplit('.', 1)[-1].lower()
+    if ext == "xlsx":
+        yield from _iter_xlsx(fileobj)
+        return
+    if ext != "csv":
+        raise ValueError(f"Format file tidak didukung: .{ext} (gunakan {', '.join(IMPORT_EXTENSIONS)})")
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    header = text.readline()
+    # Excel berbahasa Indonesia menyimpan CSV dengan ';' sebagai pemisah
+    delimiter = max((",", ";", "\t"), key=header.count)
+    for row in csv.reader(itertools.chain([header], text), delimiter=delimiter):
+        yield [cell.strip() for cell in row]
+
+
+def _iter_xlsx(fileobj: IO[bytes]) -> Iterator[List[str]]:
+    # openpyxl opsional (sama seperti export XLSX); read_only membaca baris demi baris
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ["" if cell is None else str(cell).strip() for cell in row]
+    finally:
+        workbook.close()
+
+
+# ========== PARSING & VALIDATION ==========
+def parse_answers(rows: Iterator[List[str]], questions: Sequence[str],
+                  max_rows: int = 20_000) -> Tuple[Dict[str, Tuple[str, Dict[str, str]]], List[str], int]:
+    """Group answer rows per student, matched against the LKPD's pertanyaan_pemantik.
+
+    Accepts a long table (nama_siswa, pertanyaan, jawaban: one row per answer) or a
+    wide one (nama_siswa plus one column per question, e.g. a Google Forms export).
+    A question is identified by its text (normalized) or its 1-based number.
+    Returns ({student key: (nama_siswa, {pertanyaan: jawaban})}, errors, data rows read).
+    """
+    by_text = {normalize_question(q): q for q in questions}
+
+    def match(label: str) -> Optional[str]:
+        numbered = _NUMBERED.match(_header_key(label))
+        if numbered and 1 <= int(numbered.group(1)) <= len(questions):
+            return questions[int(numbered.group(1)) - 1]
+        return by_text.get(normalize_question(label))
+
+    header = next(rows, None)
+    if not header:
+        return {}, ["File kosong"], 0
+    keys = [_header_key(h) for h in header]
+    name_col = next((i for i, k in enumerate(keys) if k in NAME_HEADERS), None)
+    if name_col is None:
+        return {}, [f"Kolom nama siswa tidak ditemukan (mis. 'nama_siswa'); header: {header}"], 0
+    question_col = next((i for i, k in enumerate(keys) if k in QUESTION_HEADERS), None)
+    answer_col = next((i for i, k in enumerate(keys) if k in ANSWER_HEADERS), None)
+    long_format = question_col is not None and answer_col is not None
+    wide_cols = {} if long_format else {i: match(h) for i, h in enumerate(header) if i != name_col and match(h)}
+    if not long_format and not wide_cols:
+        return {}, ["Butuh kolom 'pertanyaan' + 'jawaban', atau satu kolom per pertanyaan LKPD"], 0
+
+    students: Dict[str, Tuple[str, Dict[str, str]]] = {}
+    errors: List[str] = []
+    count = 0
+    for line_no, row in enumerate(rows, start=2):
+        if not any(row):
+            continue
+        count += 1
+        if count > max_rows:
+            errors.append(f"Lebih dari {max_rows} baris; sisa file diabaikan")
+            break
+        row += [""] * (len(header) - len(row))
+        nama = " ".join(row[name_col].split())
+        if not nama:
+            errors.append(f"Baris {line_no}: nama siswa kosong")
+            continue
+        pairs = ([(match(row[question_col]), row[answer_col], row[question_col])] if long_format
+                 else [(q, row[i], header[i]) for i, q in wide_cols.items()])
+        entry = students.setdefault(" ".join(nama.casefold().split()), (nama, {}))
+        for pertanyaan, jawaban, label in pairs:
+            if pertanyaan is None:
+                errors.append(f"Baris {line_no}: pertanyaan tidak ada di LKPD: '{label[:60]}'")
+            elif jawaban:
+                if pertanyaan in entry[1] and entry[1][pertanyaan] != jawaban:
+                    errors.append(f"Baris {line_no}: jawaban ganda {nama} untuk '{pertanyaan[:40]}', dipakai yang terakhir")
+                entry[1][pertanyaan] = jawaban
+    return {key: entry for key, entry in students.items() if entry[1]}, errors, count
+
+
+def submission_id(lkpd_id: str, nama_siswa: str, jawaban: Dict[str, str]) -> str:
+    """Content-addressed id: re-importing the same file does not duplicate submissions"""
+    clean_nama = "".join(c if c.isalnum() or c.isspace() else '_' for c in nama_siswa).strip().replace(' ', '_')
+    digest = hashlib.sha1(json.dumps([lkpd_id, nama_siswa.casefold(), sorted(jawaban.items())],
+                                     ensure_ascii=False).encode('utf-8')).hexdigest()[:6]
+    return f"{lkpd_id}_{clean_nama}_{digest}.json"
+
+
+# ========== CLI ==========
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk import of offline student answers (CSV/XLSX)")
+    parser.add_argument("lkpd_id")
+    parser.add_argument("file", help="CSV/XLSX: nama_siswa, pertanyaan, jawaban (or one column per question)")
+    parser.add_argument("--score", action="store_true", help="Score the imported answers (batched) right away")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, write nothing")
+    args = parser.parse_args(argv)
+
+    # Impor di sini: gemini_config membaca Streamlit secrets
+    import gemini_config
+
+    with open(args.file, 'rb') as f:
+        result = gemini_config.import_jawaban(args.lkpd_id, f, args.file, score=args.score, dry_run=args.dry_run)
+    for error in result['errors']:
+        print(f"⚠️ {error}")
+    print(f"{'Valid' if args.dry_run else 'Diimpor'}: {result['imported']} siswa dari {result['rows']} baris")
+    if result.get('existing'):
+        print(f"↩️ {result['existing']} siswa sudah ada (jawaban sama), dilewati")
+    if result.get('scoring'):
+        print(f"🤖 Penilaian: {result['scoring']}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,148 @@
+import hashlib
+import random
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from scoring_cache import normalize_answer
+
+# NumPy mempercepat MinHash; tanpa NumPy dipakai versi Python murni
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ========== CONSTANTS ==========
+NUM_PERM = 64
+SHINGLE_SIZE = 3
+_MASK = (1 << 64) - 1
+_WORD = re.compile(r"\w+")
+
+
+# ========== SHINGLING & MINHASH ==========
+def words(text: str) -> List[str]:
+    return _WORD.findall(normalize_answer(text))
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> Set[str]:
+    """Word k-grams of the normalized text (the whole text for answers shorter than k words)"""
+    tokens = words(text)
+    if len(tokens) <= k:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def containment(a: Set[str], b: Set[str]) -> float:
+    """Share of `a`'s shingles that also occur in `b`"""
+    return len(a & b) / len(a) if a else 0.0
+
+
+def _hash64(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class MinHasher:
+    """MinHash signatures over 64-bit shingle hashes with `num_perm` (a*x + b) mod 2^64 permutations"""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.a = [rng.getrandbits(64) | 1 for _ in range(num_perm)]
+        self.b = [rng.getrandbits(64) for _ in range(num_perm)]
+        if np is not None:
+            self._a = np.array(self.a, dtype=np.uint64)[:, None]
+            self._b = np.array(self.b, dtype=np.uint64)[:, None]
+
+    def signature(self, shingle_set: Set[str]) -> Any:
+        hashes = [_hash64(s) for s in shingle_set]
+        if np is not None:
+            # Overflow uint64 = modulo 2^64, sesuai versi Python murni di bawah
+            return (self._a * np.array(hashes, dtype=np.uint64)[None, :] + self._b).min(axis=1)
+        return tuple(min((a * x + b) & _MASK for x in hashes) for a, b in zip(self.a, self.b))
+
+    @staticmethod
+    def similarity_row(signatures: Any, i: int) -> List[float]:
+        """Estimated Jaccard similarity of signature `i` to every signature"""
+        if np is not None:
+            return (signatures == signatures[i]).mean(axis=1).tolist()
+        own = signatures[i]
+        return [sum(x == y for x, y in zip(own, other)) / len(own) for other in signatures]
+
+
+_HASHER = MinHasher()
+
+
+# ========== CLUSTERING ==========
+def cluster_texts(texts: Sequence[str], threshold: float = 0.9, min_words: int = 8) -> List[int]:
+    """Representative index for every text (its own index if it has no near-duplicate).
+
+    Texts with the same normalized form always share a representative. Texts of at
+    least `min_words` words are also merged when their shingle Jaccard similarity to
+    the representative is >= `threshold`: MinHash finds candidates, the exact Jaccard
+    confirms them. Every cluster member is within `threshold` of its representative.
+    """
+    reps = list(range(len(texts)))
+    first_by_norm: Dict[str, int] = {}
+    uniques: List[int] = []
+    for i, text in enumerate(texts):
+        norm = normalize_answer(text)
+        if norm in first_by_norm:
+            reps[i] = first_by_norm[norm]
+        else:
+            first_by_norm[norm] = i
+            if len(words(text)) >= min_words:
+                uniques.append(i)
+    if len(uniques) < 2:
+        return reps
+
+    sets = [shingles(texts[i]) for i in uniques]
+    sigs = [_HASHER.signature(s) for s in sets]
+    signatures = np.stack(sigs) if np is not None else sigs
+    leader_of: Dict[int, int] = {}
+    for pos in range(len(uniques)):
+        if pos in leader_of:
+            continue
+        leader_of[pos] = pos
+        estimates = MinHasher.similarity_row(signatures, pos)
+        for other in range(pos + 1, len(uniques)):
+            # Estimasi MinHash (galat ±0.1) menyaring kandidat, Jaccard eksak memutuskan
+            if other not in leader_of and estimates[other] >= threshold - 0.1 \
+                    and jaccard(sets[pos], sets[other]) >= threshold:
+                leader_of[other] = pos
+    for pos, leader in leader_of.items():
+        reps[uniques[pos]] = uniques[leader]
+    # Duplikat persis mengikuti perwakilan teks pertamanya
+    return [reps[r] for r in reps]
+
+
+def similar_groups(owners: Sequence[str], texts: Sequence[str], threshold: float = 0.9,
+                   min_words: int = 8) -> List[Tuple[List[int], float]]:
+    """Clusters (member indices, min similarity to the representative) spanning >= 2 owners.
+
+    Answers shorter than `min_words` are ignored: identical short answers ("ya", "10 m/s")
+    are expected, not copied.
+    """
+    long_idx = [i for i, t in enumerate(texts) if len(words(t)) >= min_words]
+    reps = cluster_texts([texts[i] for i in long_idx], threshold, min_words)
+    clusters: Dict[int, List[int]] = {}
+    for pos, rep in enumerate(reps):
+        clusters.setdefault(rep, []).append(pos)
+    groups = []
+    for rep, members in clusters.items():
+        if len({owners[long_idx[m]] for m in members}) < 2:
+            continue
+        rep_set = shingles(texts[long_idx[rep]])
+        similarity = min(jaccard(rep_set, shingles(texts[long_idx[m]])) for m in members)
+        groups.append(([long_idx[m] for m in members], similarity))
+    return groups
+
+
+def copied_from(text: str, source: str, threshold: float = 0.9, min_words: int = 8,
+                source_shingles: Optional[Set[str]] = None) -> Optional[float]:
+    """Containment of the answer in `source` (e.g. materi_singkat) if >= threshold, else None"""
+    if len(words(text)) < min_words:
+        return None
+    score = containment(shingles(text), source_shingles if source_shingles is not None else shingles(source))
+    return score if score >= threshold else None
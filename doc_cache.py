@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+# Penanda "belum ada di cache" (None adalah nilai sah, mis. LKPD tidak ditemukan)
+_MISSING = object()
+
+
+class DocumentCache:
+    """Process-wide LRU cache validated by a version token.
+
+    `get_or_load(key, token, loader)` returns the cached value while the stored
+    token equals `token`; otherwise it calls `loader()` and caches the result.
+    A `token` of None disables caching for that call. Writers call
+    `invalidate(key)` for write-through invalidation inside this process.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: Hashable, token: Any, loader: Callable[[], Any]) -> Any:
+        if token is None:
+            return loader()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] == token:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            self._entries[key] = (token, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
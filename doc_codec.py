@@ -0,0 +1,94 @@
+import gzip
+import json
+from typing import Any, Optional, Union
+
+# Dependensi opsional: orjson (JSON lebih cepat), msgpack (format biner), zstandard (kompresi)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ========== CONSTANTS ==========
+# "json" = format lama (indent=2), "compact" = JSON tanpa spasi, "msgpack" = biner
+FORMATS = ("json", "compact", "msgpack")
+COMPRESSIONS = ("none", "gzip", "zstd")
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_JSON_START = b"{[ \t\r\n"
+
+
+def _loads_json(raw: Union[bytes, str]) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def decode(raw: Union[bytes, str]) -> Any:
+    """Decode a stored document in any supported format (detected from its leading bytes)"""
+    if isinstance(raw, str):
+        return _loads_json(raw)
+    if raw[:2] == _GZIP_MAGIC:
+        raw = gzip.decompress(raw)
+    elif raw[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError("Document is zstd-compressed but 'zstandard' is not installed")
+        raw = zstandard.ZstdDecompressor().decompress(raw)
+    if raw[:1] in _JSON_START:
+        return _loads_json(raw)
+    if msgpack is None:
+        raise RuntimeError("Document is msgpack-encoded but 'msgpack' is not installed")
+    return msgpack.unpackb(raw, raw=False)
+
+
+class DocCodec:
+    """Serializer for LKPD / submission documents: `fmt` in FORMATS, `compression` in COMPRESSIONS.
+
+    Reading never depends on the configured codec (see `decode`), so switching the
+    format only affects newly written documents.
+    """
+
+    def __init__(self, fmt: str = "json", compression: str = "none", level: Optional[int] = None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown storage format: {fmt}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown storage compression: {compression}")
+        if fmt == "msgpack" and msgpack is None:
+            raise RuntimeError("STORAGE_FORMAT=msgpack needs the 'msgpack' package")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("STORAGE_COMPRESSION=zstd needs the 'zstandard' package")
+        self.fmt = fmt
+        self.compression = compression
+        self.level = level
+
+    @property
+    def is_text(self) -> bool:
+        """True when encoded documents are plain UTF-8 JSON"""
+        return self.fmt != "msgpack" and self.compression == "none"
+
+    def _serialize(self, data: Any) -> bytes:
+        if self.fmt == "msgpack":
+            return msgpack.packb(data, use_bin_type=True)
+        if orjson is not None:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if self.fmt == "json" else 0)
+        if self.fmt == "json":
+            return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def encode(self, data: Any) -> bytes:
+        raw = self._serialize(data)
+        if self.compression == "gzip":
+            return gzip.compress(raw, compresslevel=self.level or 6, mtime=0)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=self.level or 3).compress(raw)
+        return raw
+
+    def __repr__(self) -> str:
+        return f"DocCodec({self.fmt!r}, {self.compression!r})"
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# flock tersedia di Linux/macOS; di Windows penulisan hanya dikunci per proses
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+Cursor = Tuple[str, int]  # (nama segmen, offset byte)
+
+
+# ========== APPEND-ONLY EVENT LOG ==========
+class EventLog:
+    """Append-only JSONL change feed shared by all processes using `directory`.
+
+    One segment file per day (events-YYYYMMDD.jsonl); segments older than
+    `retention_days` are deleted when a new one starts. Readers keep a cursor
+    and only read what was appended after it, so a poll costs O(new events)
+    (a single stat when nothing changed). Events are notifications, not the
+    source of truth: they are not fsynced, and a reader that misses some
+    simply reloads from storage.
+    """
+
+    def __init__(self, directory: str, retention_days: int = 7):
+        self.directory = directory
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _segment(self, ts: Optional[float] = None) -> str:
+        return time.strftime("events-%Y%m%d.jsonl", time.localtime(ts))
+
+    def _segments(self) -> List[str]:
+        return sorted(n for n in os.listdir(self.directory) if n.startswith("events-") and n.endswith(".jsonl"))
+
+    def _prune(self) -> None:
+        oldest = self._segment(time.time() - self.retention_days * 86400)
+        for name in self._segments():
+            if name < oldest:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def publish(self, events: Iterable[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(e, ensure_ascii=False, separators=(',', ':')) + "\n" for e in events)
+        if not lines:
+            return
+        path = os.path.join(self.directory, self._segment())
+        is_new = not os.path.exists(path)
+        with self._lock, open(path, 'ab') as f:
+            # Satu write per batch dengan O_APPEND + flock: baris dari proses lain tidak tercampur
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            f.write(lines.encode('utf-8'))
+        if is_new:
+            self._prune()
+
+    def position(self) -> Cursor:
+        """Cursor at the current end of the log (subscribe from now on)"""
+        name = self._segment()
+        try:
+            return name, os.path.getsize(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            return name, 0
+
+    def read_since(self, cursor: Cursor, lkpd_ids: Optional[Iterable[str]] = None) -> Tuple[List[Dict[str, Any]], Cursor]:
+        """Events appended after `cursor` (optionally only for `lkpd_ids`) and the new cursor"""
+        wanted = set(lkpd_ids) if lkpd_ids is not None else None
+        name, offset = cursor
+        today = self._segment()
+        if name == today:
+            try:
+                if os.path.getsize(os.path.join(self.directory, name)) <= offset:
+                    return [], cursor
+            except FileNotFoundError:
+                return [], cursor
+
+        events: List[Dict[str, Any]] = []
+        # Cursor dari hari sebelumnya: sisa segmen itu, lalu semua segmen sesudahnya
+        segments = ([name] + [s for s in self._segments() if s > name]) if name < today else [name]
+        for segment in segments:
+            start = offset if segment == name else 0
+            try:
+                with open(os.path.join(self.directory, segment), 'rb') as f:
+                    f.seek(start)
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            # Baris terakhir yang belum lengkap (sedang ditulis) dibaca pada poll berikutnya
+            complete = data[:data.rfind(b"\n") + 1]
+            for line in complete.splitlines():
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if wanted is None or event.get('lkpd_id') in wanted:
+                    events.append(event)
+            cursor = (segment, start + len(complete))
+        return events, cursor
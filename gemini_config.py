@@ -1,33 +1,231 @@
-import google.generativeai as genai
 import streamlit as st
 import os
 import json
 import uuid
+import hashlib
 from datetime import datetime
 import logging
-from typing import Optional, Dict, Any, List
+import threading
+import tempfile
+import time
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Iterator, Tuple, Callable
+
+from scoring_engine import RateLimiter, retry_call, run_grouped
+from scoring_cache import ScoringCache, make_key
+from storage import StorageBackend, VersionConflict, create_backend
+from doc_cache import DocumentCache
+from doc_codec import DocCodec
+from json_stream import IncrementalJsonParser
+from report import is_graded, iter_csv, write_xlsx
+from lkpd_cache import LkpdCache, load_aliases
+from jobs import RUNNING, JobQueue, JobStore
+from events import Cursor, EventLog
+from model_client import ModelClient
+from routing import BudgetExceeded, ModelRouter, Route, TokenBudget, is_quota_error
+from metrics import REGISTRY, timed, start_http_server, start_file_writer
+
+# google.generativeai, pandas (analytics) dan numpy (dedup) baru diimpor saat pertama dipakai:
+# halaman siswa (buka LKPD, isi, submit) tidak membutuhkannya
+if TYPE_CHECKING:
+    import google.generativeai as genai
 
 # ========== LOGGING SETUP ==========
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ========== CONSTANTS & SECRETS ==========
-LKPD_DIR = "lkpd_outputs"
-JAWABAN_DIR = "jawaban_siswa"
+# Path data relatif di bawah DATA_DIR. State lokal (SQLite WAL: jobs, cache, anggaran token; flock: log
+# group-commit dan feed perubahan) di bawah LOCAL_DIR, default sama dengan DATA_DIR.
+# Beberapa node: pakai STORAGE_BACKEND "postgres"/"s3" dan arahkan LOCAL_DIR ke disk lokal tiap node,
+# karena WAL SQLite dan flock tidak andal di NFS/volume jaringan. Konsekuensinya semua itu per node:
+# antrean job, cache penilaian/LKPD, anggaran token (batas berlaku per node) dan feed perubahan
+# (tab Pemantauan hanya melihat perubahan dari node sendiri; "Perbarui statistik" memuat ulang semuanya).
+DATA_DIR = st.secrets.get("DATA_DIR", ".")
+LOCAL_DIR = st.secrets.get("LOCAL_DIR", DATA_DIR)
+
+def _data_path(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.normpath(os.path.join(DATA_DIR, path))
+
+def _local_path(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.normpath(os.path.join(LOCAL_DIR, path))
+
+LKPD_DIR = _data_path("lkpd_outputs")
+JAWABAN_DIR = _data_path("jawaban_siswa")
+CACHE_DIR = _local_path(st.secrets.get("CACHE_DIR", ".cache"))
+# Backend penyimpanan: "sqlite" (default, terindeks per lkpd_id), "json" (satu file per dokumen),
+# atau bersama untuk banyak replika: "postgres" (STORAGE_DSN) / "s3" (S3_BUCKET, mis. MinIO)
+STORAGE_BACKEND = st.secrets.get("STORAGE_BACKEND", "sqlite")
+STORAGE_DB_PATH = _data_path(st.secrets.get("STORAGE_DB_PATH", "eduai.sqlite"))
+STORAGE_DSN = st.secrets.get("STORAGE_DSN", "")
+S3_BUCKET = st.secrets.get("S3_BUCKET", "")
+S3_PREFIX = st.secrets.get("S3_PREFIX", "eduai/")
+S3_ENDPOINT_URL = st.secrets.get("S3_ENDPOINT_URL", "")
+# Group commit: submission baru dikumpulkan lalu ditulis ke log dengan satu fsync per batch
+STORAGE_GROUP_COMMIT = bool(st.secrets.get("STORAGE_GROUP_COMMIT", False))
+STORAGE_WAL_DIR = _local_path(st.secrets.get("STORAGE_WAL_DIR", "wal"))
+# Format dokumen: "" (default backend), "json", "compact" atau "msgpack"; kompresi "none", "gzip" atau "zstd"
+STORAGE_FORMAT = st.secrets.get("STORAGE_FORMAT", "")
+STORAGE_COMPRESSION = st.secrets.get("STORAGE_COMPRESSION", "none")
+DOC_CACHE_MAX_ENTRIES = int(st.secrets.get("DOC_CACHE_MAX_ENTRIES", 256))
+# Halaman report (per kombinasi filter) punya cache sendiri agar tidak mendesak LKPD/daftar jawaban
+PAGE_CACHE_MAX_ENTRIES = int(st.secrets.get("PAGE_CACHE_MAX_ENTRIES", 32))
+JOBS_DB_PATH = _local_path(st.secrets.get("JOBS_DB_PATH", "jobs.sqlite"))
+JOB_WORKERS = int(st.secrets.get("JOB_WORKERS", 2))
+# Feed perubahan (submit/nilai) untuk tab Pemantauan: log append-only per hari + interval refresh (detik)
+EVENTS_DIR = _local_path(st.secrets.get("EVENTS_DIR", "events"))
+EVENTS_RETENTION_DAYS = int(st.secrets.get("EVENTS_RETENTION_DAYS", 7))
+MONITOR_REFRESH_SECONDS = float(st.secrets.get("MONITOR_REFRESH_SECONDS", 3))
+# Ekspor metrik Prometheus: port HTTP (/metrics) dan/atau file textfile collector (kosong = nonaktif)
+METRICS_PORT = int(st.secrets.get("METRICS_PORT", 0))
+METRICS_FILE = st.secrets.get("METRICS_FILE", "")
 # Ambil dari Streamlit Secrets, aman untuk deployment
 API_KEY = st.secrets.get("GEMINI_API_KEY", None) 
-MODEL_NAME = "gemini-2.5-flash"
+MODEL_NAME = st.secrets.get("MODEL_NAME", "gemini-2.5-flash")
+# "gemini" atau path "modul:callable" (mis. "benchmarks.fake_gemini:FakeGenerativeModel") + MODEL_OPTIONS
+MODEL_PROVIDER = st.secrets.get("MODEL_PROVIDER", "gemini")
+MODEL_OPTIONS = dict(st.secrets.get("MODEL_OPTIONS", {}))
+
+# Kuota & paralelisme penilaian (default: Tier 1; free tier pakai RPM=10, TPM=250000)
+SCORING_CONCURRENCY = int(st.secrets.get("SCORING_CONCURRENCY", 8))
+GEMINI_RPM = float(st.secrets.get("GEMINI_RPM", 1000))
+GEMINI_TPM = float(st.secrets.get("GEMINI_TPM", 1_000_000))
+GEMINI_MAX_RETRIES = int(st.secrets.get("GEMINI_MAX_RETRIES", 4))
+
+# Penilaian batch: "siswa" (semua jawaban 1 siswa), "pertanyaan" (1 pertanyaan, semua siswa) atau "off"
+SCORING_BATCH_MODE = st.secrets.get("SCORING_BATCH_MODE", "siswa")
+SCORING_BATCH_MAX_ITEMS = int(st.secrets.get("SCORING_BATCH_MAX_ITEMS", 10))
+SCORING_BATCH_MAX_CHARS = int(st.secrets.get("SCORING_BATCH_MAX_CHARS", 12000))
+# Jawaban (hampir) sama untuk pertanyaan yang sama hanya dinilai sekali; juga dipakai untuk deteksi plagiarisme
+SCORING_DEDUP = bool(st.secrets.get("SCORING_DEDUP", True))
+SCORING_DEDUP_THRESHOLD = float(st.secrets.get("SCORING_DEDUP_THRESHOLD", 0.9))
+SCORING_DEDUP_MIN_WORDS = int(st.secrets.get("SCORING_DEDUP_MIN_WORDS", 8))
+LKPD_REQUIRED_KEYS = ['judul', 'tujuan_pembelajaran', 'materi_singkat', 'kegiatan']
+# Naikkan versi ini setiap kali prompt LKPD berubah agar cache generasi lama tidak dipakai
+LKPD_PROMPT_VERSION = "v1"
+LKPD_CACHE_TTL_DAYS = float(st.secrets.get("LKPD_CACHE_TTL_DAYS", 30))
+LKPD_CACHE_MAX_MB = float(st.secrets.get("LKPD_CACHE_MAX_MB", 200))
+LKPD_THEME_ALIASES = st.secrets.get("LKPD_THEME_ALIASES", "theme_aliases.json")
+SCORING_RUBRIC = "Pemahaman konsep (40%), Kejelasan jawaban (30%), Contoh/referensi (20%), Bahasa (10%)"
+# Naikkan versi ini setiap kali prompt/rubrik penilaian berubah agar cache lama tidak dipakai
+SCORING_PROMPT_VERSION = "v1"
+SCORING_CACHE_MAX_MB = float(st.secrets.get("SCORING_CACHE_MAX_MB", 50))
+# Batas baris per file import jawaban (CSV/XLSX)
+IMPORT_MAX_ROWS = int(st.secrets.get("IMPORT_MAX_ROWS", 20_000))
+
+# Routing model: jawaban pendek -> tier "lite" + prompt ringkas, jawaban panjang -> "pro" (bila diisi di MODEL_TIERS).
+# ROUTING_ENABLED = False: semua panggilan memakai MODEL_NAME tanpa batas max_output_tokens (perilaku lama)
+ROUTING_ENABLED = bool(st.secrets.get("ROUTING_ENABLED", True))
+MODEL_TIERS = {'lite': "gemini-2.5-flash-lite", 'standard': MODEL_NAME, **dict(st.secrets.get("MODEL_TIERS", {}))}
+ROUTING_SHORT_WORDS = int(st.secrets.get("ROUTING_SHORT_WORDS", 25))
+ROUTING_LONG_WORDS = int(st.secrets.get("ROUTING_LONG_WORDS", 150))
+# Batas token output per jawaban yang dinilai dan per LKPD yang dibuat (0 = tanpa batas).
+# Model 2.5 ikut menghitung token "thinking": batas yang terlalu kecil memberi respons tanpa teks,
+# jadi hanya tier "lite" (tanpa thinking) yang dibatasi secara default
+ROUTING_SHORT_OUTPUT = int(st.secrets.get("ROUTING_SHORT_OUTPUT", 512))
+ROUTING_FULL_OUTPUT = int(st.secrets.get("ROUTING_FULL_OUTPUT", 0))
+ROUTING_LKPD_OUTPUT = int(st.secrets.get("ROUTING_LKPD_OUTPUT", 0))
+ROUTING_FALLBACK_TIER = st.secrets.get("ROUTING_FALLBACK_TIER", "lite")
+# Anggaran token (0 = tanpa batas). Bila habis, atau kuota API habis (429), panggilan turun ke ROUTING_FALLBACK_TIER;
+# panggilan yang sudah di tier itu ditolak selama anggaran habis (BudgetExceeded)
+TOKEN_BUDGET_DAILY = int(st.secrets.get("TOKEN_BUDGET_DAILY", 0))
+TOKEN_BUDGET_PER_LKPD = int(st.secrets.get("TOKEN_BUDGET_PER_LKPD", 0))
 
 # ========== GLOBAL VARIABLES ==========
-_model: Optional[genai.GenerativeModel] = None
-_init_success: bool = False
+# Satu klien model per proses, dibangun dari konfigurasi saat pertama dipakai
+_model_client = ModelClient(MODEL_PROVIDER, MODEL_NAME, API_KEY, MODEL_OPTIONS)
+# Klien untuk model tier lain (lite/pro), dibuat saat tier itu pertama kali dipakai
+_tier_clients: Dict[str, ModelClient] = {}
+_tier_clients_lock = threading.Lock()
+_model_installed = False
+_router = ModelRouter(
+    MODEL_TIERS if ROUTING_ENABLED else {'standard': MODEL_NAME},
+    short_words=ROUTING_SHORT_WORDS, long_words=ROUTING_LONG_WORDS, short_output=ROUTING_SHORT_OUTPUT,
+    full_output=ROUTING_FULL_OUTPUT, lkpd_output=ROUTING_LKPD_OUTPUT, fallback_tier=ROUTING_FALLBACK_TIER,
+)
+_token_budget: Optional[TokenBudget] = None
+_token_budget_lock = threading.Lock()
+_rate_limiter = RateLimiter(rpm=GEMINI_RPM, tpm=GEMINI_TPM)
+_scoring_cache: Optional[ScoringCache] = None
+_scoring_cache_lock = threading.Lock()
+_lkpd_cache: Optional[LkpdCache] = None
+_lkpd_cache_lock = threading.Lock()
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+# Cache LKPD & daftar jawaban, dipakai bersama oleh semua sesi Streamlit di proses ini
+_doc_cache = DocumentCache(max_entries=DOC_CACHE_MAX_ENTRIES)
+_page_cache = DocumentCache(max_entries=PAGE_CACHE_MAX_ENTRIES)
+_job_queue: Optional[JobQueue] = None
+_event_log: Optional[EventLog] = None
+_event_log_lock = threading.Lock()
+_job_queue_lock = threading.Lock()
+_metrics_started = False
+
+# ========== METRICS ==========
+_GEMINI_REQUESTS = REGISTRY.counter("eduai_gemini_requests_total", "Gemini calls by task and outcome")
+_GEMINI_LATENCY = REGISTRY.histogram("eduai_gemini_latency_seconds", "Latency of one Gemini API attempt")
+_GEMINI_RETRIES = REGISTRY.counter("eduai_gemini_retries_total", "Gemini attempts retried after 429/5xx")
+_GEMINI_TOKENS = REGISTRY.counter("eduai_gemini_tokens_total", "Tokens from response usage_metadata")
+_RATE_LIMIT_WAIT = REGISTRY.histogram("eduai_rate_limit_wait_seconds", "Time spent waiting for RPM/TPM quota")
+_STORAGE_LATENCY = REGISTRY.histogram("eduai_storage_seconds", "Storage I/O latency by operation")
+_STORAGE_ERRORS = REGISTRY.counter("eduai_storage_errors_total", "Failed storage operations")
+_SCORING_DEDUP = REGISTRY.counter("eduai_scoring_dedup_total", "Answers that reused a near-duplicate's score")
+_ROUTED_CALLS = REGISTRY.counter("eduai_routed_calls_total", "Gemini calls by routed tier and reason (route/budget/quota)")
 
 # ========== UTILITY FUNCTIONS ==========
 def ensure_directories() -> None:
     """Create all required directories (important for Streamlit Cloud storage)"""
     os.makedirs(LKPD_DIR, exist_ok=True)
     os.makedirs(JAWABAN_DIR, exist_ok=True)
-    logger.info("✅ Directories created: lkpd_outputs, jawaban_siswa")
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    logger.info("✅ Directories created: lkpd_outputs, jawaban_siswa, cache")
+
+def get_scoring_cache() -> ScoringCache:
+    """Process-wide persistent cache of graded answers"""
+    global _scoring_cache
+    with _scoring_cache_lock:
+        if _scoring_cache is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            _scoring_cache = ScoringCache(os.path.join(CACHE_DIR, "scoring.sqlite"),
+                                          max_bytes=int(SCORING_CACHE_MAX_MB * 1024 * 1024))
+    return _scoring_cache
+
+def get_lkpd_cache() -> LkpdCache:
+    """Disk-backed LKPD generation cache shared by all sessions/processes using CACHE_DIR"""
+    global _lkpd_cache
+    with _lkpd_cache_lock:
+        if _lkpd_cache is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            _lkpd_cache = LkpdCache(
+                os.path.join(CACHE_DIR, "lkpd_generation.sqlite"),
+                ttl_seconds=LKPD_CACHE_TTL_DAYS * 24 * 3600,
+                max_bytes=int(LKPD_CACHE_MAX_MB * 1024 * 1024),
+                aliases=load_aliases(LKPD_THEME_ALIASES),
+            )
+    return _lkpd_cache
+
+def get_token_budget() -> TokenBudget:
+    """Process-wide token ledger (shared by all processes using CACHE_DIR)"""
+    global _token_budget
+    with _token_budget_lock:
+        if _token_budget is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            _token_budget = TokenBudget(os.path.join(CACHE_DIR, "token_budget.sqlite"),
+                                        daily_limit=TOKEN_BUDGET_DAILY, lkpd_limit=TOKEN_BUDGET_PER_LKPD)
+    return _token_budget
+
+def token_budget_status(lkpd_id: str = "") -> Dict[str, int]:
+    """Tokens used today (and by `lkpd_id`) against their limits"""
+    return get_token_budget().usage(lkpd_id)
+
+def lkpd_cache_key(theme: str) -> str:
+    return get_lkpd_cache().key(theme, LKPD_PROMPT_VERSION, MODEL_NAME)
+
+def _scoring_prompt_version(variant: str) -> str:
+    return SCORING_PROMPT_VERSION if variant == "full" else f"{SCORING_PROMPT_VERSION}-{variant}"
+
+def _scoring_cache_key(pertanyaan: str, jawaban_text: str, route: Route) -> str:
+    """Cache key for a result graded with `route`'s model and prompt variant"""
+    return make_key(pertanyaan, jawaban_text, _scoring_prompt_version(route.variant), route.model)
 
 def validate_api_key() -> bool:
     """Validate GEMINI_API_KEY exists"""
@@ -38,106 +236,466 @@ def validate_api_key() -> bool:
     return True
 
 # ========== GEMINI INITIALIZATION (PERBAIKAN KRUSIAL ANTI-BLOKIR) ==========
-@st.cache_resource
-def init_gemini() -> Optional[genai.GenerativeModel]:
-    """Initialize Gemini model without an immediate test call to save quota."""
-    global _model, _init_success
-    
-    if _init_success and _model:
-        return _model
-    
-    if not validate_api_key():
+def init_gemini() -> Optional["genai.GenerativeModel"]:
+    """The configured model (built once per process by _model_client, no test call to save quota) with sidebar status"""
+    if MODEL_PROVIDER == "gemini" and not validate_api_key():
         return None
-        
+
+    model = _model_client.get()
+    if model is None:
+        st.sidebar.error(f"❌ Gemini Init Error: {_model_client.error}")
+        return None
+    st.sidebar.success(f"🤖 **Gemini {MODEL_NAME} READY**")
+    return model
+
+def _model_for(model_name: str) -> ModelClient:
+    """Client for one routed model; MODEL_NAME (and any model installed by set_model) uses _model_client"""
+    if model_name == MODEL_NAME or _model_installed:
+        return _model_client
+    with _tier_clients_lock:
+        if model_name not in _tier_clients:
+            _tier_clients[model_name] = ModelClient(MODEL_PROVIDER, model_name, API_KEY, MODEL_OPTIONS)
+        return _tier_clients[model_name]
+
+# ========== STORAGE (LKPD & JAWABAN) ==========
+def _storage_call(op: str, fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a storage backend call with latency/error metrics"""
+    with timed(_STORAGE_LATENCY, _STORAGE_ERRORS, op=op):
+        return fn(*args)
+
+def _storage_codec() -> Optional[DocCodec]:
+    if not STORAGE_FORMAT and STORAGE_COMPRESSION == "none":
+        return None
+    default_format = "json" if STORAGE_BACKEND == "json" else "compact"
+    return DocCodec(STORAGE_FORMAT or default_format, STORAGE_COMPRESSION)
+
+def get_storage() -> StorageBackend:
+    """Process-wide storage backend selected by STORAGE_BACKEND"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            ensure_directories()
+            _storage = create_backend(STORAGE_BACKEND, STORAGE_DB_PATH, LKPD_DIR, JAWABAN_DIR,
+                                      group_commit=STORAGE_GROUP_COMMIT, wal_dir=STORAGE_WAL_DIR,
+                                      codec=_storage_codec(), dsn=STORAGE_DSN, bucket=S3_BUCKET,
+                                      prefix=S3_PREFIX, endpoint_url=S3_ENDPOINT_URL)
+            logger.info(f"✅ Storage backend: {STORAGE_BACKEND}")
+    return _storage
+
+def _invalidate_jawaban(lkpd_id: str) -> None:
+    _doc_cache.invalidate(('jawaban', lkpd_id))
+    _doc_cache.invalidate(('summary', lkpd_id))
+
+# ========== CHANGE FEED ==========
+def get_event_log() -> EventLog:
+    global _event_log
+    with _event_log_lock:
+        if _event_log is None:
+            _event_log = EventLog(EVENTS_DIR, retention_days=EVENTS_RETENTION_DAYS)
+    return _event_log
+
+def _change_event(kind: str, filename: str, jawaban: Dict[str, Any]) -> Dict[str, Any]:
+    """Feed entry with the summary fields the monitor table shows (no answer bodies)"""
+    score = jawaban.get('total_score')
+    return {
+        'type': kind, 'ts': time.time(), 'lkpd_id': jawaban.get('lkpd_id', ''), 'filename': filename,
+        'nama_siswa': jawaban.get('nama_siswa'), 'waktu_submit': jawaban.get('waktu_submit'), 'total_score': score,
+        'dinilai': is_graded(jawaban),
+    }
+
+def _publish_changes(events: List[Dict[str, Any]]) -> None:
+    """Best effort: a failed publish never fails the save (the monitor resyncs on its next full load)"""
     try:
-        genai.configure(api_key=API_KEY)
-        _model = genai.GenerativeModel(MODEL_NAME)
-        
-        # PANGGILAN generate_content("Test") TELAH DIHAPUS.
-        
-        logger.info(f"✅ Gemini {MODEL_NAME} initialized successfully!")
-        _init_success = True
-        st.sidebar.success(f"🤖 **Gemini {MODEL_NAME} READY**")
-        return _model
+        get_event_log().publish(events)
     except Exception as e:
-        error_msg = f"❌ Gemini Init Error: {str(e)}"
-        st.sidebar.error(error_msg)
-        logger.error(error_msg)
-        _model = None
-        _init_success = False
-        return None
+        logger.error(f"Event publish error: {e}")
+
+def event_cursor() -> Cursor:
+    """Current end of the change feed; take it before loading a snapshot so no change is missed"""
+    return get_event_log().position()
+
+def read_changes(cursor: Cursor, lkpd_ids: List[str]) -> Tuple[List[Dict[str, Any]], Cursor]:
+    """Submission changes for `lkpd_ids` published after `cursor`, and the new cursor"""
+    try:
+        return get_event_log().read_since(cursor, lkpd_ids)
+    except Exception as e:
+        logger.error(f"Event read error: {e}")
+        return [], cursor
+
+def doc_cache_stats() -> Dict[str, Any]:
+    """Hit/miss stats of the shared LKPD & submission cache"""
+    return _doc_cache.stats()
+
+def save_lkpd(lkpd_id: str, lkpd_data: Dict[str, Any]) -> bool:
+    try:
+        _storage_call("save_lkpd", get_storage().save_lkpd, lkpd_id, lkpd_data)
+        _doc_cache.invalidate(('lkpd', lkpd_id))
+        logger.info(f"📝 LKPD saved: {lkpd_id}")
+        return True
+    except Exception as e:
+        logger.error(f"Save LKPD error: {e}")
+        return False
 
-# ... [Fungsi load_lkpd dan Jawaban Management tidak berubah] ...
 def load_lkpd(lkpd_id: str) -> Optional[Dict[str, Any]]:
-    filepath = os.path.join(LKPD_DIR, f"{lkpd_id}.json")
-    if os.path.exists(filepath):
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return data
-        except Exception as e:
-            logger.error(f"Load LKPD error: {e}")
+    try:
+        storage = get_storage()
+        data = _doc_cache.get_or_load(('lkpd', lkpd_id), storage.lkpd_version(lkpd_id),
+                                      lambda: _storage_call("load_lkpd", storage.load_lkpd, lkpd_id))
+        return dict(data) if data is not None else None
+    except Exception as e:
+        logger.error(f"Load LKPD error: {e}")
     return None
 
+def _new_jawaban(lkpd_id: str, nama_siswa: str, jawaban_data: Dict[str, Any]) -> Dict[str, Any]:
+    """A fresh, unscored submission document"""
+    return {
+        **jawaban_data,
+        'lkpd_id': lkpd_id,
+        'nama_siswa': nama_siswa,
+        'waktu_submit': datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+        'total_score': 0, # Nilai awal 0
+        'feedback': "",
+        'strengths': [],
+        'improvements': [],
+        'score_meta': None # Diisi saat penilaian (lihat _score_meta)
+    }
+
 def save_jawaban_siswa(lkpd_id: str, nama_siswa: str, jawaban_data: Dict[str, Any]) -> str:
     try:
         clean_nama = "".join(c if c.isalnum() or c.isspace() else '_' for c in nama_siswa).strip().replace(' ', '_')
         unique_id = uuid.uuid4().hex[:6]
         filename = f"{lkpd_id}_{clean_nama}_{unique_id}.json"
-        filepath = os.path.join(JAWABAN_DIR, filename)
         
-        full_data = {
-            **jawaban_data,
-            'lkpd_id': lkpd_id,
-            'nama_siswa': nama_siswa,
-            'waktu_submit': datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
-            'total_score': 0, # Nilai awal 0
-            'feedback': "",
-            'strengths': [],
-            'improvements': []
-        }
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(full_data, f, ensure_ascii=False, indent=2)
+        full_data = _new_jawaban(lkpd_id, nama_siswa, jawaban_data)
+        _storage_call("save_jawaban", get_storage().append_jawaban, filename, full_data)
+        _invalidate_jawaban(lkpd_id)
+        _publish_changes([_change_event("submitted", filename, full_data)])
         logger.info(f"📝 Jawaban saved: {nama_siswa} - {lkpd_id}")
         return filename
     except Exception as e:
         logger.error(f"Jawaban save error: {e}")
         return ""
 
+def import_jawaban(lkpd_id: str, fileobj: Any, filename: str, score: bool = False,
+                   background: bool = False, dry_run: bool = False) -> Dict[str, Any]:
+    """Bulk import of offline answers from a CSV/XLSX file (see bulk_import.parse_answers).
+
+    All valid submissions are written with one insert_jawaban_many call (one
+    transaction on SQLite/Postgres). With `score`, only the newly inserted submissions
+    are graded, with batched prompts: right away, or as a background job if
+    `background`. Returns {'imported', 'existing', 'rows', 'errors', 'scoring'}; `existing`
+    counts students whose identical answers were already stored (re-imported file).
+    """
+    from bulk_import import iter_rows, lkpd_questions, parse_answers, submission_id
+
+    result: Dict[str, Any] = {'imported': 0, 'existing': 0, 'rows': 0, 'errors': [], 'scoring': ""}
+    questions = lkpd_questions(load_lkpd(lkpd_id))
+    if not questions:
+        result['errors'].append(f"LKPD '{lkpd_id}' tidak ditemukan atau tidak punya pertanyaan pemantik")
+        return result
+    try:
+        students, result['errors'], result['rows'] = parse_answers(
+            iter_rows(fileobj, filename), questions, max_rows=IMPORT_MAX_ROWS)
+    except Exception as e:
+        logger.error(f"Import parse error {filename}: {e}")
+        result['errors'].append(f"File tidak dapat dibaca: {e}")
+        return result
+
+    records = [(submission_id(lkpd_id, nama, answers), _new_jawaban(lkpd_id, nama, {'jawaban': answers}))
+               for nama, answers in students.values()]
+    result['imported'] = len(records)
+    if dry_run or not records:
+        return result
+    try:
+        inserted = _storage_call("import_jawaban", get_storage().insert_jawaban_many, records)
+        result['imported'] = len(inserted)
+        result['existing'] = len(records) - result['imported']
+    except Exception as e:
+        logger.error(f"Import write error {lkpd_id}: {e}")
+        result['errors'].append(f"Gagal menyimpan: {e}")
+        result['imported'] = 0
+        return result
+    _invalidate_jawaban(lkpd_id)
+    # Submission yang sudah tersimpan (file diimpor ulang) tidak diumumkan dan tidak dinilai ulang
+    new_ids = set(inserted)
+    _publish_changes([_change_event("imported", sid, doc) for sid, doc in records if sid in new_ids])
+    logger.info(f"📥 Imported {result['imported']} submissions ({result['existing']} already stored, "
+                f"{result['rows']} rows) into {lkpd_id}")
+
+    if not inserted:
+        return result
+    if score and background:
+        job = enqueue_scoring_job(lkpd_id, incremental=True, submission_ids=inserted)
+        result['scoring'] = f"job {job['id']} ({job['status']})"
+    elif score:
+        stats = score_pending_jawaban(lkpd_id, submission_ids=inserted)
+        result['scoring'] = f"{stats['scored']} dinilai, {stats['skipped']} dilewati, {stats['failed']} gagal"
+    return result
+
 def load_all_jawaban(lkpd_id: str) -> List[Dict[str, Any]]:
-    jawaban_files = [f for f in os.listdir(JAWABAN_DIR) if f.startswith(lkpd_id) and f.endswith('.json')]
-    all_jawaban = []
-    for filename in jawaban_files:
-        filepath = os.path.join(JAWABAN_DIR, filename)
+    """Full submission documents for an LKPD; each carries its id under 'filename'"""
+    try:
+        storage = get_storage()
+        docs = _doc_cache.get_or_load(('jawaban', lkpd_id), storage.jawaban_version(lkpd_id),
+                                      lambda: _storage_call("list_jawaban", storage.list_jawaban, lkpd_id))
+        # Salinan dangkal: pemanggil boleh mengubah field level atas tanpa merusak cache
+        return [dict(d) for d in docs]
+    except Exception as e:
+        logger.error(f"Load jawaban error {lkpd_id}: {e}")
+        return []
+
+def load_jawaban_summary(lkpd_id: str) -> List[Dict[str, Any]]:
+    """Only filename / nama_siswa / waktu_submit / total_score per submission (no answer bodies)"""
+    try:
+        storage = get_storage()
+        rows = _doc_cache.get_or_load(('summary', lkpd_id), storage.jawaban_version(lkpd_id),
+                                      lambda: _storage_call("list_jawaban_summary", storage.list_jawaban_summary, lkpd_id))
+        return [dict(r) for r in rows]
+    except Exception as e:
+        logger.error(f"Load jawaban summary error {lkpd_id}: {e}")
+        return []
+
+def query_jawaban_page(lkpd_id: str, search: str = "", min_score: Optional[float] = None,
+                       max_score: Optional[float] = None, sort: str = "waktu", descending: bool = False,
+                       page: int = 1, page_size: int = 25) -> Tuple[List[Dict[str, Any]], int]:
+    """One page (1-based) of summary rows for the report view and the total number of matches"""
+    try:
+        storage = get_storage()
+        offset = max(0, page - 1) * page_size
+        rows, total = _page_cache.get_or_load(
+            ('summary_page', lkpd_id, search, min_score, max_score, sort, descending, offset, page_size),
+            storage.jawaban_version(lkpd_id),
+            lambda: _storage_call("query_jawaban_summary", storage.query_jawaban_summary, lkpd_id, search,
+                                  min_score, max_score, sort, descending, offset, page_size))
+        return [dict(r) for r in rows], total
+    except Exception as e:
+        logger.error(f"Query jawaban error {lkpd_id}: {e}")
+        return [], 0
+
+def load_jawaban_detail(submission_id: str) -> Optional[Dict[str, Any]]:
+    """Full document of one submission (for the per-student detail view)"""
+    try:
+        return _storage_call("load_jawaban", get_storage().load_jawaban, submission_id)
+    except Exception as e:
+        logger.error(f"Load jawaban detail error {submission_id}: {e}")
+        return None
+
+def export_report(lkpd_id: str, fmt: str = "csv", chunk_size: int = 500) -> str:
+    """Scoring report as CSV or XLSX in a temporary file; returns its path (the caller deletes it).
+
+    Submissions are read `chunk_size` at a time and written straight to disk,
+    so the export is never held in memory as a whole.
+    """
+    chunks = get_storage().iter_jawaban(lkpd_id, chunk_size)
+    with timed(_STORAGE_LATENCY, _STORAGE_ERRORS, op=f"export_{fmt}"):
+        with tempfile.NamedTemporaryFile(prefix=f"eduai-report-{lkpd_id}-", suffix=f".{fmt}", delete=False) as f:
+            try:
+                if fmt == "xlsx":
+                    write_xlsx(chunks, f)
+                else:
+                    f.writelines(iter_csv(chunks))
+            except BaseException:
+                f.close()
+                os.remove(f.name)
+                raise
+        return f.name
+
+# ========== CLASS ANALYTICS ==========
+def _analytics_frames(lkpd_id: str) -> Tuple[Any, Any]:
+    """(version token, build_frames result) for one LKPD, cached until its data changes"""
+    storage = get_storage()
+    token = (storage.jawaban_version(lkpd_id), storage.lkpd_version(lkpd_id))
+    token = None if None in token else token
+
+    def load():
+        from analytics import build_frames
+
+        docs = (doc for chunk in storage.iter_jawaban(lkpd_id) for doc in chunk)
+        return build_frames(lkpd_id, load_lkpd(lkpd_id), docs)
+
+    return token, _doc_cache.get_or_load(('analytics', lkpd_id), token, load)
+
+def class_analytics(lkpd_ids: List[str]) -> Dict[str, Any]:
+    """Dashboard statistics (see analytics.analyze) for one or many LKPDs; treat the frames as read-only"""
+    from analytics import analyze
+
+    ids = list(dict.fromkeys(i for i in lkpd_ids if i))
+    with timed(_STORAGE_LATENCY, _STORAGE_ERRORS, op="analytics"):
+        parts = [_analytics_frames(lkpd_id) for lkpd_id in ids]
+        tokens = tuple(token for token, _ in parts)
+        token = None if None in tokens else tokens
+        return _doc_cache.get_or_load(('analytics_all', tuple(ids)), token,
+                                      lambda: analyze([frames for _, frames in parts]))
+
+# ========== PLAGIARISM CHECK ==========
+def _find_similar_answers(lkpd_id: str) -> List[Dict[str, Any]]:
+    from dedup import copied_from, shingles, similar_groups
+
+    lkpd = load_lkpd(lkpd_id) or {}
+    materi = shingles(lkpd.get('materi_singkat', '')) if lkpd.get('materi_singkat') else None
+    by_question: Dict[str, List[Tuple[str, str]]] = {}
+    for chunk in get_storage().iter_jawaban(lkpd_id):
+        for doc in chunk:
+            for pertanyaan, answer in (doc.get('jawaban') or {}).items():
+                if answer and answer.strip():
+                    by_question.setdefault(pertanyaan, []).append((doc.get('nama_siswa') or 'Anonim', answer))
+
+    findings = []
+    for pertanyaan, entries in by_question.items():
+        names = [name for name, _ in entries]
+        texts = [answer for _, answer in entries]
+        for members, similarity in similar_groups(names, texts, SCORING_DEDUP_THRESHOLD, SCORING_DEDUP_MIN_WORDS):
+            findings.append({'pertanyaan': pertanyaan, 'sumber': 'siswa', 'kemiripan': round(similarity, 2),
+                             'siswa': sorted({names[m] for m in members}), 'contoh': texts[members[0]]})
+        if materi is None:
+            continue
+        copied = [(names[i], score) for i, text in enumerate(texts)
+                  if (score := copied_from(text, lkpd['materi_singkat'], SCORING_DEDUP_THRESHOLD,
+                                             SCORING_DEDUP_MIN_WORDS, materi)) is not None]
+        if copied:
+            findings.append({'pertanyaan': pertanyaan, 'sumber': 'materi', 'kemiripan': round(min(c for _, c in copied), 2),
+                             'siswa': sorted({name for name, _ in copied}), 'contoh': lkpd.get('materi_singkat', '')})
+    return findings
+
+def find_similar_answers(lkpd_id: str) -> List[Dict[str, Any]]:
+    """Possible plagiarism: answers to one question shared (near-verbatim) by several students or copied from materi_singkat"""
+    try:
+        storage = get_storage()
+        token = (storage.jawaban_version(lkpd_id), storage.lkpd_version(lkpd_id))
+        return _doc_cache.get_or_load(('similar', lkpd_id), None if None in token else token,
+                                      lambda: _find_similar_answers(lkpd_id))
+    except Exception as e:
+        logger.error(f"Similarity check error {lkpd_id}: {e}")
+        return []
+
+# ========== GEMINI CALL (RATE LIMIT + RETRY) ==========
+def _estimate_tokens(prompt: str, max_output: int = 512) -> int:
+    """Rough token estimate (±4 chars/token) for the TPM bucket"""
+    return len(prompt) // 4 + max_output
+
+def _record_usage(response: Any, task: str, route: Route, lkpd_id: str = "", estimate: int = 0) -> None:
+    """Add token counts from the response's usage_metadata to the metrics and the token budget"""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        get_token_budget().add(estimate, lkpd_id)
+        return
+    prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+    output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+    _GEMINI_TOKENS.inc(prompt_tokens, task=task, kind="prompt", model=route.model)
+    _GEMINI_TOKENS.inc(output_tokens, task=task, kind="output", model=route.model)
+    get_token_budget().add(getattr(usage, 'total_token_count', 0) or prompt_tokens + output_tokens, lkpd_id)
+
+def _budget_route(route: Route, lkpd_id: str) -> Tuple[Route, str]:
+    """`route`, or its fallback-tier version while the daily / per-LKPD token budget is used up.
+
+    Raises BudgetExceeded when the budget is used up and `route` already is the fallback tier.
+    """
+    exceeded = get_token_budget().exceeded(lkpd_id)
+    if exceeded:
+        cheaper = _router.downgrade(route)
+        if cheaper is None:
+            raise BudgetExceeded(f"Token budget ({exceeded}) used up, {route.model} is already the fallback model")
+        logger.warning(f"💸 Token budget ({exceeded}) used up: {route.model} -> {cheaper.model}")
+        return cheaper, f"budget_{exceeded}"
+    return route, "route"
+
+def _regrade_later(used: Route, route: Route, lkpd_id: str) -> bool:
+    """True if a grade from `used` instead of `route` should be graded again on the next run.
+
+    Only while the budget can recover (daily limit, model quota): once the per-LKPD
+    budget is used up a regrade would land on the fallback tier again, so it is kept.
+    """
+    return used != route and get_token_budget().exceeded(lkpd_id) != "lkpd"
+
+def _call_gemini(prompt: str, route: Route, task: str, stream: bool = False, lkpd_id: str = "",
+                 reason: str = "route") -> Tuple[Any, Route]:
+    """One rate-limited, retried generate_content call with latency/retry/error metrics.
+
+    Returns (response, route actually used): over budget, or when the quota of the
+    routed model is exhausted (429 after all retries), the call goes to the fallback tier.
+    """
+    routed, budget_reason = _budget_route(route, lkpd_id)
+    if routed != route:
+        route, reason = routed, budget_reason
+    # Routing nonaktif atau route tanpa batas: tanpa generation_config, sama seperti sebelum ada routing
+    options = {'generation_config': {'max_output_tokens': route.max_output}} if ROUTING_ENABLED and route.max_output else {}
+
+    def call():
+        _RATE_LIMIT_WAIT.observe(_rate_limiter.acquire(_estimate_tokens(prompt, route.expected_output)), task=task)
+        with timed(_GEMINI_LATENCY, task=task):
+            model = _model_for(route.model).get()
+            if model is None:
+                raise RuntimeError(f"Model {route.model} tidak tersedia: {_model_for(route.model).error}")
+            return model.generate_content(prompt, stream=True, **options) if stream else model.generate_content(prompt, **options)
+
+    _ROUTED_CALLS.inc(task=task, tier=route.tier, reason=reason)
+    try:
+        response = retry_call(call, max_retries=GEMINI_MAX_RETRIES,
+                              on_retry=lambda attempt, e: _GEMINI_RETRIES.inc(task=task))
+    except Exception as e:
+        _GEMINI_REQUESTS.inc(task=task, status="error")
+        cheaper = _router.downgrade(route) if is_quota_error(e) else None
+        if cheaper is None:
+            raise
+        logger.warning(f"💸 Quota {route.model} habis, pindah ke {cheaper.model}")
+        return _call_gemini(prompt, cheaper, task, stream, lkpd_id, reason="quota")
+    _GEMINI_REQUESTS.inc(task=task, status="ok")
+    return response, route
+
+def _generate(prompt: str, route: Route, task: str = "generate", lkpd_id: str = "") -> Tuple[Any, Route]:
+    """generate_content behind the shared RPM/TPM limiter, retrying 429/5xx with jittered backoff"""
+    response, used = _call_gemini(prompt, route, task, lkpd_id=lkpd_id)
+    _record_usage(response, task, used, lkpd_id, _estimate_tokens(prompt, used.expected_output))
+    return response, used
+
+def _generate_stream(prompt: str, route: Route, task: str = "generate_stream", lkpd_id: str = "") -> Iterator[str]:
+    """Streaming generate_content; only opening the stream is retried (chunks cannot be replayed)"""
+    start = time.perf_counter()
+    response, used = _call_gemini(prompt, route, task, stream=True, lkpd_id=lkpd_id)
+    for chunk in response:
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                data['filename'] = filename # Sisipkan filename untuk update skor nanti
-                all_jawaban.append(data)
-        except Exception as e:
-            logger.error(f"Load jawaban error {filename}: {e}")
-    return all_jawaban
+            text = chunk.text
+        except ValueError:
+            # Chunk tanpa teks (mis. hanya metadata/safety) dilewati
+            continue
+        if text:
+            yield text
+    # Untuk stream, latensi total (sampai chunk terakhir) dicatat terpisah dari pembukaan stream
+    _GEMINI_LATENCY.observe(time.perf_counter() - start, task=f"{task}_total")
+    _record_usage(response, task, used, lkpd_id, _estimate_tokens(prompt, used.expected_output))
+
+def _parse_json_response(text: str) -> Any:
+    """Strip markdown fences from an AI response and parse it as JSON"""
+    return json.loads(text.strip().replace("```json", "").replace("```", "").strip())
 
 # ========== AI GENERATION (LKPD) & SCORING ==========
-@st.cache_data(show_spinner=False)
-def generate_lkpd(theme: str) -> Optional[Dict[str, Any]]:
-    # ... [Logika generate_lkpd tidak berubah, dipanggil oleh app.py] ...
-    if not _model: return None
-    
-    prompt = f"""
+def _lkpd_prompt(theme: str) -> str:
+    return f"""
     Buat LKPD INTERAKTIF untuk tema "{theme}" SMP/SMA.
     **OUTPUT HANYA JSON VALID** (tanpa markdown/kode):
     {{...}} 
     """ # Isi prompt di sini
 
+def _validate_lkpd(data: Any) -> None:
+    if not isinstance(data, dict) or not all(key in data for key in LKPD_REQUIRED_KEYS):
+        raise ValueError("Missing required keys in JSON")
+
+def generate_lkpd(theme: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+    """Generate an LKPD, served from the disk cache when the normalized theme was generated before"""
+    cache_key = lkpd_cache_key(theme)
+    if use_cache:
+        cached = get_lkpd_cache().get(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ LKPD cache hit for theme: {theme}")
+            return cached
+
+    if not _model_client.get(): return None
+
     try:
-        response = _model.generate_content(prompt)
-        json_str = response.text.strip().replace("```json", "").replace("```", "").strip()
-        data = json.loads(json_str)
-        
-        required_keys = ['judul', 'tujuan_pembelajaran', 'materi_singkat', 'kegiatan']
-        if not all(key in data for key in required_keys):
-            raise ValueError("Missing required keys in JSON")
+        response, _ = _generate(_lkpd_prompt(theme), _router.route_lkpd(), task="lkpd")
+        data = _parse_json_response(response.text)
+        _validate_lkpd(data)
+        get_lkpd_cache().set(cache_key, theme, data)
         
         logger.info(f"✅ LKPD generated for theme: {theme}")
         return data
@@ -150,13 +708,72 @@ def generate_lkpd(theme: str) -> Optional[Dict[str, Any]]:
         logger.error(f"Generate error: {e}")
         return None
 
-def score_jawaban(jawaban_text: str, pertanyaan: str) -> Dict[str, Any]:
-    """AI Auto-Scoring for student answer"""
-    if not _model:
-        return {"score": 0, "feedback": "Model tidak tersedia"}
-    
-    prompt = f"""
-    **NILAI JAWABAN SISWA** (skala 0-100) berdasarkan kriteria: Pemahaman konsep (40%), Kejelasan jawaban (30%), Contoh/referensi (20%), Bahasa (10%):
+def generate_lkpd_stream(theme: str, use_cache: bool = True) -> Iterator[Tuple[Any, ...]]:
+    """Streaming variant of generate_lkpd for progressive rendering.
+
+    Yields ('field', key, value) as each top-level field completes,
+    ('kegiatan', index, kegiatan) for every finished activity, then either
+    ('done', data) after schema validation or ('error', message).
+    A cache hit replays the same events immediately.
+    """
+    cache_key = lkpd_cache_key(theme)
+    cached = get_lkpd_cache().get(cache_key) if use_cache else None
+    if cached is not None:
+        logger.info(f"⚡ LKPD cache hit for theme: {theme}")
+        for key, value in cached.items():
+            if key == 'kegiatan':
+                for index, kegiatan in enumerate(value):
+                    yield ('kegiatan', index, kegiatan)
+            else:
+                yield ('field', key, value)
+        yield ('done', cached)
+        return
+
+    if not _model_client.get():
+        yield ('error', "Model tidak tersedia")
+        return
+
+    parser = IncrementalJsonParser()
+    try:
+        for text in _generate_stream(_lkpd_prompt(theme), _router.route_lkpd(), task="lkpd_stream"):
+            for event in parser.feed(text):
+                if event[0] == 'item':
+                    if event[1] == 'kegiatan':
+                        yield ('kegiatan', event[2], event[3])
+                elif event[1] != 'kegiatan': # kegiatan sudah dikirim per elemen
+                    yield event
+        data = parser.result()
+        _validate_lkpd(data)
+        get_lkpd_cache().set(cache_key, theme, data)
+        logger.info(f"✅ LKPD streamed for theme: {theme}")
+        yield ('done', data)
+    except json.JSONDecodeError as e:
+        logger.error(f"JSON decode error: {e}")
+        yield ('error', f"JSON Error - AI response tidak valid: {e}")
+    except Exception as e:
+        logger.error(f"Generate stream error: {e}")
+        yield ('error', f"AI Error: {str(e)}")
+
+def score_jawaban(jawaban_text: str, pertanyaan: str, lkpd_id: str = "") -> Dict[str, Any]:
+    """AI Auto-Scoring for student answer (consults the scoring cache first)"""
+    route = _router.route_score([jawaban_text])
+    cached = get_scoring_cache().get(_scoring_cache_key(pertanyaan, jawaban_text, route))
+    if cached is not None:
+        cached.setdefault('model', route.model)
+        return cached
+    return _score_jawaban_uncached(jawaban_text, pertanyaan, lkpd_id)
+
+def _score_prompt(jawaban_text: str, pertanyaan: str, variant: str) -> str:
+    if variant == "short":
+        # Jawaban pendek: rubrik sama, instruksi & output lebih ringkas
+        return f"""
+    **NILAI JAWABAN SISWA** (0-100), kriteria: {SCORING_RUBRIC}.
+    Pertanyaan: "{pertanyaan}"
+    Jawaban: "{jawaban_text}"
+    **OUTPUT HANYA JSON VALID**: {{"score": 85, "feedback": "maks 20 kata", "strengths": ["..."], "improvements": ["..."]}}
+    """
+    return f"""
+    **NILAI JAWABAN SISWA** (skala 0-100) berdasarkan kriteria: {SCORING_RUBRIC}:
     
     Pertanyaan: "{pertanyaan}"
     Jawaban: "{jawaban_text}"
@@ -169,16 +786,30 @@ def score_jawaban(jawaban_text: str, pertanyaan: str) -> Dict[str, Any]:
       "improvements": ["Perbaikan 1", "Perbaikan 2"]
     }}
     """
+
+def _score_jawaban_uncached(jawaban_text: str, pertanyaan: str, lkpd_id: str = "") -> Dict[str, Any]:
+    """Single-answer Gemini call; successful results are written to the scoring cache"""
+    if not _model_client.get():
+        return {"score": 0, "feedback": "Model tidak tersedia", "error": True}
+    
+    route = _router.route_score([jawaban_text])
     try:
-        response = _model.generate_content(prompt)
-        json_str = response.text.strip().replace("```json", "").replace("```", "").strip()
-        score_data = json.loads(json_str)
+        response, used = _generate(_score_prompt(jawaban_text, pertanyaan, route.variant), route,
+                                   task="score", lkpd_id=lkpd_id)
+        score_data = _parse_json_response(response.text)
         
         # Validasi skor harus berupa integer/float
         score_value = int(score_data.get('score', 0))
         score_data['score'] = score_value
+        score_data['model'] = used.model
+        # Hasil dari model cadangan (anggaran/kuota habis) tidak di-cache; selama anggaran bisa pulih
+        # ditandai fallback agar score_pending_jawaban menilainya ulang pada run berikutnya
+        if used == route:
+            get_scoring_cache().set(_scoring_cache_key(pertanyaan, jawaban_text, route), score_data)
+        elif _regrade_later(used, route, lkpd_id):
+            score_data['fallback'] = True
         
-        logger.info(f"📊 Scored: {score_value}")
+        logger.info(f"📊 Scored: {score_value} ({used.model})")
         return score_data
     except Exception as e:
         logger.error(f"Scoring error: {e}")
@@ -186,71 +817,424 @@ def score_jawaban(jawaban_text: str, pertanyaan: str) -> Dict[str, Any]:
             "score": 0,
             "feedback": "Error dalam penilaian atau format JSON AI tidak valid.",
             "strengths": [],
-            "improvements": ["Perlu perbaikan format output AI"]
+            "improvements": ["Perlu perbaikan format output AI"],
+            "error": True
         }
 
+# ========== BATCH SCORING ==========
+def _split_batches(items: List[Dict[str, str]], max_items: int = SCORING_BATCH_MAX_ITEMS,
+                   max_chars: int = SCORING_BATCH_MAX_CHARS) -> List[List[Dict[str, str]]]:
+    """Split scoring items into batches bounded by item count and prompt size."""
+    batches, current, current_chars = [], [], 0
+    for item in items:
+        size = len(item['pertanyaan']) + len(item['jawaban'])
+        if current and (len(current) >= max_items or current_chars + size > max_chars):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(item)
+        current_chars += size
+    if current:
+        batches.append(current)
+    return batches
+
+def _score_one_batch(batch: List[Dict[str, str]], lkpd_id: str = "") -> Dict[str, Dict[str, Any]]:
+    """Grade one batch with a single Gemini call; items that fail to parse fall back to score_jawaban."""
+    results: Dict[str, Dict[str, Any]] = {}
+    cache = get_scoring_cache()
+    item_routes = {item['id']: _router.route_score([item['jawaban']]) for item in batch}
+    for item in batch:
+        item_route = item_routes[item['id']]
+        cached = cache.get(_scoring_cache_key(item['pertanyaan'], item['jawaban'], item_route))
+        if cached is not None:
+            cached.setdefault('model', item_route.model)
+            results[item['id']] = cached
+    batch = [item for item in batch if item['id'] not in results]
+    if not batch:
+        return results
+
+    if len(batch) == 1 or not _model_client.get():
+        results.update({item['id']: _score_jawaban_uncached(item['jawaban'], item['pertanyaan'], lkpd_id) for item in batch})
+        return results
+
+    route = _router.route_score([item['jawaban'] for item in batch])
+    feedback_rule = "maks 20 kata" if route.variant == "short" else "Feedback positif + saran (50 kata max)"
+    items_json = json.dumps(
+        [{'id': item['id'], 'pertanyaan': item['pertanyaan'], 'jawaban': item['jawaban']} for item in batch],
+        ensure_ascii=False, indent=1
+    )
+    prompt = f"""
+    **NILAI BEBERAPA JAWABAN SISWA** (skala 0-100) berdasarkan kriteria: {SCORING_RUBRIC}.
+    Nilai setiap item secara terpisah, jangan saling membandingkan.
+
+    Daftar item (JSON):
+    {items_json}
+
+    **OUTPUT HANYA JSON ARRAY VALID** (tanpa markdown/kode), tepat satu objek untuk setiap "id":
+    [
+      {{
+        "id": "<id item>",
+        "score": 85,
+        "feedback": "{feedback_rule}",
+        "strengths": ["Kelebihan 1", "Kelebihan 2"],
+        "improvements": ["Perbaikan 1", "Perbaikan 2"]
+      }}
+    ]
+    """
+    try:
+        response, used = _generate(prompt, route, task="score_batch", lkpd_id=lkpd_id)
+        parsed = _parse_json_response(response.text)
+        if not isinstance(parsed, list):
+            raise ValueError("Batch response is not a JSON array")
+        batch_by_id = {item['id']: item for item in batch}
+        for entry in parsed:
+            try:
+                item_id = str(entry['id'])
+                if item_id in batch_by_id and item_id not in results:
+                    entry['score'] = int(entry.get('score', 0))
+                    entry.pop('id')
+                    entry['model'] = used.model
+                    results[item_id] = entry
+                    item, item_route = batch_by_id[item_id], item_routes[item_id]
+                    if used != route:
+                        if _regrade_later(used, route, lkpd_id):
+                            entry['fallback'] = True
+                    # Batch mengikuti jawaban terpanjang: hanya di-cache bila sama dengan route item itu sendiri
+                    elif (item_route.model, item_route.variant) == (route.model, route.variant):
+                        cache.set(_scoring_cache_key(item['pertanyaan'], item['jawaban'], item_route), entry)
+            except (KeyError, TypeError, ValueError):
+                continue
+        logger.info(f"📊 Batch scored: {len(results)}/{len(batch)} items")
+    except Exception as e:
+        logger.error(f"Batch scoring error: {e}")
+
+    # Item yang hilang / gagal diparse dinilai satu per satu
+    for item in batch:
+        if item['id'] not in results:
+            results[item['id']] = _score_jawaban_uncached(item['jawaban'], item['pertanyaan'], lkpd_id)
+    return results
+
+def score_jawaban_batch(items: List[Dict[str, str]], lkpd_id: str = "") -> Dict[str, Dict[str, Any]]:
+    """Score many answers with as few Gemini calls as possible.
+
+    `items` is a list of {'id', 'pertanyaan', 'jawaban'}; returns {id: score_data}.
+    Oversized inputs are split by SCORING_BATCH_MAX_ITEMS / SCORING_BATCH_MAX_CHARS.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    for batch in _split_batches(items):
+        results.update(_score_one_batch(batch, lkpd_id))
+    return results
+
 # ========== BULK SCORING (LOGIC UPDATE) ==========
-def score_all_jawaban(lkpd_id: str) -> bool:
-    """Score all student answers for LKPD and save the results."""
+def _apply_scores(jawaban: Dict[str, Any], score_results: List[Dict[str, Any]]) -> None:
+    """Aggregate per-question results into the submission's total_score/feedback fields."""
+    total_score_sum = 0
+    all_feedback = []
+    all_strengths = []
+    all_improvements = []
+
+    for score_result in score_results:
+        total_score_sum += score_result.get('score', 0)
+        all_feedback.append(score_result.get('feedback', ''))
+        all_strengths.extend(score_result.get('strengths', []))
+        all_improvements.extend(score_result.get('improvements', []))
+
+    num_questions = len(score_results)
+    jawaban['total_score'] = total_score_sum // num_questions if num_questions > 0 else 0
+    jawaban['feedback'] = " | ".join(filter(None, all_feedback))
+    jawaban['strengths'] = list(set(all_strengths))[:3]
+    jawaban['improvements'] = list(set(all_improvements))[:3]
+
+def _save_scored_jawaban(jawaban: Dict[str, Any]) -> bool:
+    """Persist a submission with its latest scores, unless it was rewritten since it was loaded."""
+    filename_to_update = jawaban.pop('filename', None)
+    if not filename_to_update:
+        return False
+    try:
+        # Hanya menimpa versi yang dinilai; jika jawaban berubah selama penilaian, biarkan tetap "belum dinilai"
+        _storage_call("save_score", get_storage().save_jawaban, filename_to_update, jawaban, jawaban.get('version', 0))
+        _invalidate_jawaban(jawaban.get('lkpd_id', ''))
+        _publish_changes([_change_event("scored", filename_to_update, jawaban)])
+        logger.info(f"💾 Score saved for {jawaban['nama_siswa']}")
+        return True
+    except VersionConflict as e:
+        _invalidate_jawaban(jawaban.get('lkpd_id', ''))
+        logger.warning(f"Score not saved, submission changed while scoring: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"Error saving score for {filename_to_update}: {e}")
+        return False
+
+def _jawaban_hash(jawaban: Dict[str, Any]) -> str:
+    """Content hash of a submission's `jawaban` dict"""
+    payload = json.dumps(jawaban.get('jawaban', {}), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _score_meta(jawaban: Dict[str, Any], score_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Scoring state stored with a submission so unchanged ones can be skipped later.
+
+    `model` lists the models that actually graded the answers; `configured_model` is
+    the MODEL_NAME the run was routed from. Results from the fallback tier are marked
+    `fallback` (while the budget can recover) so incremental scoring grades them again.
+    """
+    meta = {
+        'scored_at': datetime.now().isoformat(timespec='seconds'),
+        'content_hash': _jawaban_hash(jawaban),
+        'model': ", ".join(sorted({r['model'] for r in score_results if r.get('model')})) or MODEL_NAME,
+        'configured_model': MODEL_NAME,
+        'prompt_version': SCORING_PROMPT_VERSION,
+    }
+    if any(r.get('fallback') for r in score_results):
+        meta['fallback'] = True
+    return meta
+
+def is_scored(jawaban: Dict[str, Any]) -> bool:
+    """True if the submission was scored for its current answers with the current model and rubric"""
+    meta = jawaban.get('score_meta') or {}
+    return (
+        meta.get('content_hash') == _jawaban_hash(jawaban)
+        # score_meta lama hanya punya 'model' (= MODEL_NAME saat itu)
+        and meta.get('configured_model', meta.get('model')) == MODEL_NAME
+        and meta.get('prompt_version') == SCORING_PROMPT_VERSION
+        and not meta.get('fallback')
+    )
+
+def _dedup_followers(items: List[Dict[str, Any]]) -> Dict[Any, List[Any]]:
+    """Per representative item key, the keys of its (near-)duplicate answers to the same question"""
+    from dedup import cluster_texts
+
+    by_question: Dict[str, List[Dict[str, Any]]] = {}
+    for item in items:
+        by_question.setdefault(item['pertanyaan'], []).append(item)
+    followers: Dict[Any, List[Any]] = {}
+    for q_items in by_question.values():
+        reps = cluster_texts([item['jawaban'] for item in q_items], SCORING_DEDUP_THRESHOLD, SCORING_DEDUP_MIN_WORDS)
+        for pos, rep in enumerate(reps):
+            if rep != pos:
+                followers.setdefault(q_items[rep]['key'], []).append(q_items[pos]['key'])
+    return followers
+
+def _build_scoring_units(all_jawaban: List[Dict[str, Any]], batch_mode: str, dedup: bool = False,
+                         lkpd_id: str = ""):
+    """Turn submissions into run_grouped work units: one per answer, or one per batch.
+
+    With `dedup`, only one representative per cluster of near-identical answers is scored;
+    its unit also resolves the keys of the other members.
+    """
+    units = []
+    expected = {}
+    items = []
+    for idx, jawaban in enumerate(all_jawaban):
+        answered = [(p, a) for p, a in jawaban.get('jawaban', {}).items() if a and a.strip()]
+        expected[idx] = len(answered)
+        for q_idx, (pertanyaan, answer_text) in enumerate(answered):
+            items.append({'id': f"{idx}-{q_idx}", 'key': (idx, q_idx), 'pertanyaan': pertanyaan, 'jawaban': answer_text})
+
+    followers = _dedup_followers(items) if dedup else {}
+    if followers:
+        skipped = {key for keys in followers.values() for key in keys}
+        items = [item for item in items if item['key'] not in skipped]
+        _SCORING_DEDUP.inc(len(skipped))
+        logger.info(f"🧬 {len(skipped)} duplicate answer(s) reuse a representative's score")
+
+    def keys_of(item):
+        return [item['key']] + followers.get(item['key'], [])
+
+    if batch_mode not in ("siswa", "pertanyaan"):
+        for item in items:
+            units.append((keys_of(item), lambda item=item: dict.fromkeys(
+                keys_of(item), score_jawaban(item['jawaban'], item['pertanyaan'], lkpd_id))))
+        return units, expected
+
+    # Kelompokkan per siswa atau per pertanyaan, lalu pecah sesuai batas ukuran batch
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for item in items:
+        group_key = item['key'][0] if batch_mode == "siswa" else item['pertanyaan']
+        groups.setdefault(group_key, []).append(item)
+
+    def run_batch(batch):
+        by_id = _score_one_batch(batch, lkpd_id)
+        return {key: by_id.get(item['id']) for item in batch for key in keys_of(item)}
+
+    for group_items in groups.values():
+        for batch in _split_batches(group_items):
+            units.append(([key for item in batch for key in keys_of(item)], lambda batch=batch: run_batch(batch)))
+    return units, expected
+
+def _score_submissions(lkpd_id: str, incremental: bool, max_workers: Optional[int],
+                       batch_mode: Optional[str],
+                       progress: Optional[Callable[[Dict[str, int]], None]] = None,
+                       submission_ids: Optional[List[str]] = None) -> Dict[str, int]:
+    """Shared scoring loop; returns counts of total / pending / scored / skipped / failed submissions.
+
+    `progress(stats)` is called after every saved submission and may raise to abort the run.
+    `submission_ids` limits the run to those submissions of the LKPD (e.g. one import).
+    """
     all_jawaban = load_all_jawaban(lkpd_id)
+    if submission_ids is not None:
+        wanted = set(submission_ids)
+        all_jawaban = [j for j in all_jawaban if j.get('filename') in wanted]
+    stats = {'total': len(all_jawaban), 'pending': len(all_jawaban), 'scored': 0, 'skipped': 0, 'failed': 0}
+    if incremental:
+        pending = [j for j in all_jawaban if not is_scored(j)]
+        stats['skipped'] = len(all_jawaban) - len(pending)
+        stats['pending'] = len(pending)
+        all_jawaban = pending
+    if progress:
+        progress(stats)
     if not all_jawaban:
-        logger.info(f"No answers found for scoring LKPD {lkpd_id}")
-        return False
+        logger.info(f"No answers to score for LKPD {lkpd_id} ({stats['skipped']} up to date)")
+        return stats
 
-    success_count = 0
-    
-    for jawaban in all_jawaban:
-        total_score_sum = 0
-        num_questions = 0
-        all_feedback = []
-        all_strengths = []
-        all_improvements = []
-        
-        for pertanyaan, answer_text in jawaban['jawaban'].items():
-            if answer_text and answer_text.strip():
-                score_result = score_jawaban(answer_text, pertanyaan)
-                total_score_sum += score_result.get('score', 0)
-                num_questions += 1
-                
-                all_feedback.append(score_result.get('feedback', ''))
-                all_strengths.extend(score_result.get('strengths', []))
-                all_improvements.extend(score_result.get('improvements', []))
-        
-        final_score = total_score_sum // num_questions if num_questions > 0 else 0
-        
-        # UPDATE DATA JAWABAN
-        jawaban['total_score'] = final_score
-        jawaban['feedback'] = " | ".join(filter(None, all_feedback))
-        jawaban['strengths'] = list(set(all_strengths))[:3]
-        jawaban['improvements'] = list(set(all_improvements))[:3]
-        
-        # SIMPAN ULANG FILE JAWABAN DENGAN SKOR TERBARU
-        filename_to_update = jawaban.pop('filename', None) 
-        if filename_to_update:
-            filepath = os.path.join(JAWABAN_DIR, filename_to_update)
-            try:
-                # Ambil data yang sudah diupdate
-                data_to_save = {k: v for k, v in jawaban.items() if k != 'filename'}
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(data_to_save, f, ensure_ascii=False, indent=2)
-                logger.info(f"💾 Score saved for {jawaban['nama_siswa']}")
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Error saving score for {filename_to_update}: {e}")
-                
-    return success_count > 0
+    units, expected = _build_scoring_units(all_jawaban, batch_mode or SCORING_BATCH_MODE, dedup=SCORING_DEDUP,
+                                           lkpd_id=lkpd_id)
+
+    def on_done(idx: int, results: Dict[int, Any]) -> None:
+        jawaban = all_jawaban[idx]
+        score_results = [results[q] or {"score": 0, "error": True} for q in sorted(results)]
+        # Penilaian yang (sebagian) gagal tidak disimpan: nilai lama atau status "belum dinilai" tetap,
+        # dan submission dinilai lagi pada run berikutnya (jawaban yang berhasil sudah ada di cache)
+        if any(r.get('error') for r in score_results):
+            stats['failed'] += 1
+            if progress:
+                progress(stats)
+            return
+        _apply_scores(jawaban, score_results)
+        # Skor per pertanyaan untuk analitik kelas (urutan sama dengan _build_scoring_units)
+        answered = [p for p, a in jawaban.get('jawaban', {}).items() if a and a.strip()]
+        jawaban['question_scores'] = {p: r.get('score', 0) for p, r in zip(answered, score_results)}
+        jawaban['score_meta'] = _score_meta(jawaban, score_results)
+        if _save_scored_jawaban(jawaban):
+            stats['scored'] += 1
+        else:
+            stats['failed'] += 1
+        if progress:
+            progress(stats)
+
+    run_grouped(units, expected, on_done, max_workers=max_workers or SCORING_CONCURRENCY)
+    logger.info(f"📊 LKPD {lkpd_id}: {stats['scored']} scored, {stats['skipped']} skipped, {stats['failed']} failed")
+    return stats
+
+def score_all_jawaban(lkpd_id: str, max_workers: Optional[int] = None, batch_mode: Optional[str] = None) -> bool:
+    """Score all student answers for LKPD concurrently and save each result as soon as it is ready.
+
+    Gemini calls run on a bounded thread pool (SCORING_CONCURRENCY) behind the shared
+    RPM/TPM limiter, so wall-clock time is bound by quota instead of summed latency.
+    `batch_mode` ("siswa" / "pertanyaan" / "off", default SCORING_BATCH_MODE) packs
+    many answers into one prompt to cut request count and repeated rubric tokens.
+    """
+    stats = _score_submissions(lkpd_id, incremental=False, max_workers=max_workers, batch_mode=batch_mode)
+    return stats['scored'] > 0
+
+def score_pending_jawaban(lkpd_id: str, max_workers: Optional[int] = None, batch_mode: Optional[str] = None,
+                          submission_ids: Optional[List[str]] = None) -> Dict[str, int]:
+    """Incremental scoring: only grade submissions that are new or changed since their last scoring.
+
+    `submission_ids` restricts the run to those submissions. Returns
+    {'total', 'pending', 'scored', 'skipped', 'failed'} submission counts.
+    """
+    return _score_submissions(lkpd_id, incremental=True, max_workers=max_workers, batch_mode=batch_mode,
+                              submission_ids=submission_ids)
+
+# ========== BACKGROUND SCORING JOBS ==========
+def _run_scoring_job(job: Dict[str, Any], report: Callable[[int, int, int, str], None]) -> str:
+    """Job handler: (incremental) scoring of one LKPD with progress reported to the job table"""
+    def progress(stats: Dict[str, int]) -> None:
+        report(stats['scored'] + stats['failed'], stats['pending'], stats['failed'], "")
+
+    stats = _score_submissions(job['lkpd_id'], incremental=job['params'].get('incremental', True),
+                               max_workers=None, batch_mode=None, progress=progress,
+                               submission_ids=job['params'].get('submission_ids'))
+    return f"{stats['scored']} dinilai, {stats['skipped']} dilewati, {stats['failed']} gagal"
+
+def get_job_queue() -> JobQueue:
+    """Process-wide worker pool; starting it resumes jobs interrupted by a restart"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(JobStore(JOBS_DB_PATH), {'score': _run_scoring_job}, workers=JOB_WORKERS)
+            _job_queue.start()
+    return _job_queue
+
+def enqueue_scoring_job(lkpd_id: str, incremental: bool = False,
+                        submission_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Queue background scoring for an LKPD, or only for `submission_ids` of it
+    (returns the queued job if the same request is already waiting)"""
+    params: Dict[str, Any] = {'incremental': incremental}
+    if submission_ids is not None:
+        params['submission_ids'] = sorted(submission_ids)
+    return get_job_queue().enqueue('score', lkpd_id, params)
+
+def get_scoring_job(lkpd_id: str) -> Optional[Dict[str, Any]]:
+    """Running (else latest) scoring job for an LKPD, including progress counters"""
+    store = get_job_queue().store
+    return store.latest_for(lkpd_id, kind='score', status=RUNNING) or store.latest_for(lkpd_id, kind='score')
+
+def cancel_job(job_id: str) -> None:
+    get_job_queue().store.request_cancel(job_id)
+
+# ========== METRICS EXPORT ==========
+def _cache_lookup_gauge() -> Dict[Any, float]:
+    values = {}
+    for name, stats in (('documents', _doc_cache.stats()), ('report_pages', _page_cache.stats()),
+                        ('scoring', get_scoring_cache().stats()),
+                        ('lkpd_generation', get_lkpd_cache().stats())):
+        values[(('cache', name), ('result', 'hit'))] = stats['hits']
+        values[(('cache', name), ('result', 'miss'))] = stats['misses']
+    return values
+
+REGISTRY.gauge_callback("eduai_cache_lookups", "Cache lookups since process start", _cache_lookup_gauge)
+REGISTRY.gauge_callback("eduai_tokens_today", "Tokens used today (shared token budget)",
+                        lambda: {(): token_budget_status()['today']})
+
+def start_metrics_export() -> None:
+    """Start the /metrics HTTP endpoint and/or textfile writer once per process (if configured)"""
+    global _metrics_started
+    if _metrics_started:
+        return
+    _metrics_started = True
+    try:
+        if METRICS_PORT:
+            start_http_server(METRICS_PORT)
+        if METRICS_FILE:
+            start_file_writer(METRICS_FILE)
+    except Exception as e:
+        logger.error(f"Metrics export error: {e}")
+
+def metrics_text() -> str:
+    """Prometheus exposition text of all metrics"""
+    return REGISTRY.render_prometheus()
+
+def metrics_snapshot() -> Dict[str, List[Dict[str, Any]]]:
+    """Metrics as table rows for the admin panel: {'latency': [...], 'counters': [...]}"""
+    latency_rows, counter_rows = [], []
+    for metric in REGISTRY.metrics():
+        if hasattr(metric, 'snapshot'):
+            for labels, s in sorted(metric.snapshot().items()):
+                latency_rows.append({
+                    'Metrik': metric.name, 'Label': ", ".join(f"{k}={v}" for k, v in labels),
+                    'Jumlah': s['count'], 'Rata-rata (ms)': round(s['avg'] * 1000, 1),
+                    'p95 (ms)': round(s['p95'] * 1000, 1),
+                })
+        elif hasattr(metric, 'values'):
+            for labels, value in sorted(metric.values().items()):
+                counter_rows.append({
+                    'Metrik': metric.name, 'Label': ", ".join(f"{k}={v}" for k, v in labels), 'Nilai': value,
+                })
+    return {'latency': latency_rows, 'counters': counter_rows}
 
 # ========== INITIALIZATION & GLOBAL ACCESSOR ==========
-def initialize_app():
-    ensure_directories()
-    model = init_gemini()
-    return model is not None
-
-def get_model() -> Optional[genai.GenerativeModel]:
-    global _model
-    if _model is None:
-        initialize_app()
-    return _model
-
-# Auto-init on import
-initialize_app()
+def initialize_app() -> None:
+    """Cheap per-process setup (directories, storage, metrics export); the model is built on first use"""
+    get_storage()
+    start_metrics_export()
+
+def set_model(model: Any) -> None:
+    """Install a model object in place of genai.GenerativeModel (e.g. the benchmark stand-in); it serves every routing tier"""
+    global _model_installed
+    _model_client.set(model)
+    _model_installed = model is not None
+
+def get_model() -> Optional["genai.GenerativeModel"]:
+    """The process-wide model, built (with sidebar status) on the first call"""
+    initialize_app()
+    return init_gemini()
@@ -0,0 +1,284 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+# ========== LOGGING SETUP ==========
+logger = logging.getLogger(__name__)
+
+# ========== CONSTANTS ==========
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+JOB_COLUMNS = [
+    'id', 'kind', 'lkpd_id', 'params', 'status', 'total', 'done', 'errors', 'message',
+    'cancel_requested', 'worker', 'created_at', 'started_at', 'updated_at', 'finished_at',
+]
+
+
+class JobCancelled(Exception):
+    """Raised inside a job handler when cancellation was requested"""
+
+
+# ========== JOB TABLE ==========
+class JobStore:
+    """Persisted job table (SQLite, WAL) shared by every worker process"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                lkpd_id TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                total INTEGER NOT NULL DEFAULT 0,
+                done INTEGER NOT NULL DEFAULT 0,
+                errors INTEGER NOT NULL DEFAULT 0,
+                message TEXT NOT NULL DEFAULT '',
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                updated_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_lkpd ON jobs(lkpd_id, created_at)")
+
+    def _row(self, row: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(zip(JOB_COLUMNS, row))
+        job['params'] = json.loads(job['params'])
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        return job
+
+    def enqueue(self, kind: str, lkpd_id: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Create a job, or return the queued job of the same kind and params for this LKPD.
+
+        A request that differs from the running job (e.g. a full re-score while an
+        incremental one runs) is queued behind it; claim() runs one job per LKPD at a time.
+        """
+        now = time.time()
+        params_json = json.dumps(params or {}, sort_keys=True)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE kind = ? AND lkpd_id = ? "
+                    "AND status = ? AND params = ? ORDER BY created_at LIMIT 1",
+                    (kind, lkpd_id, QUEUED, params_json)
+                ).fetchone()
+                if row is None:
+                    job_id = uuid.uuid4().hex[:12]
+                    self._conn.execute(
+                        "INSERT INTO jobs (id, kind, lkpd_id, params, status, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (job_id, kind, lkpd_id, params_json, QUEUED, now, now)
+                    )
+                    row = self._conn.execute(
+                        f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._row(row)
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job to running for `worker`.
+
+        Jobs of an LKPD that already has a running job wait until it finishes.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? AND lkpd_id NOT IN "
+                    "(SELECT lkpd_id FROM jobs WHERE status = ?) ORDER BY created_at LIMIT 1", (QUEUED, RUNNING)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, started_at = COALESCE(started_at, ?), "
+                        "updated_at = ? WHERE id = ?", (RUNNING, worker, now, now, row[0])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self.get(row[0]) if row else None
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def latest_for(self, lkpd_id: str, kind: Optional[str] = None,
+                   status: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        query = f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE lkpd_id = ?"
+        args: List[Any] = [lkpd_id]
+        if kind:
+            query += " AND kind = ?"
+            args.append(kind)
+        if status:
+            query += " AND status = ?"
+            args.append(status)
+        with self._lock:
+            row = self._conn.execute(query + " ORDER BY created_at DESC LIMIT 1", args).fetchone()
+        return self._row(row)
+
+    def update_progress(self, job_id: str, done: int, total: int, errors: int, message: str = "") -> bool:
+        """Store progress (also the worker heartbeat). Returns True if cancellation was requested."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET done = ?, total = ?, errors = ?, message = ?, updated_at = ? WHERE id = ?",
+                (done, total, errors, message, time.time(), job_id)
+            )
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def heartbeat(self, job_id: str) -> None:
+        """Mark a running job as alive without changing its progress"""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ? AND status = ?",
+                               (time.time(), job_id, RUNNING))
+
+    def finish(self, job_id: str, status: str, message: str = "") -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, message = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                (status, message, now, now, job_id)
+            )
+
+    def request_cancel(self, job_id: str) -> None:
+        """Queued jobs are cancelled at once; running jobs stop at their next progress report"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, now, now, job_id, QUEUED)
+            )
+            self._conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING))
+
+    def requeue_stale(self, stale_after: float, exclude_worker: Optional[str] = None) -> int:
+        """Put running jobs whose worker stopped heart-beating (e.g. process restart) back in the queue.
+
+        Jobs owned by `exclude_worker` (the caller's own, still running) are never requeued.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND updated_at < ? "
+                "AND worker IS NOT ?", (QUEUED, RUNNING, time.time() - stale_after, exclude_worker)
+            )
+        return cur.rowcount
+
+
+def job_eta(job: Dict[str, Any]) -> Optional[float]:
+    """Remaining seconds estimated from the job's throughput so far"""
+    if job['status'] != RUNNING or not job['started_at'] or not job['done'] or job['total'] <= job['done']:
+        return None
+    elapsed = time.time() - job['started_at']
+    return elapsed / job['done'] * (job['total'] - job['done'])
+
+
+# ========== WORKER POOL ==========
+JobHandler = Callable[[Dict[str, Any], Callable[[int, int, int, str], None]], str]
+
+
+class JobQueue:
+    """Local worker threads that claim jobs from a JobStore and run registered handlers.
+
+    A handler receives `(job, report)` and calls `report(done, total, errors, message)`
+    to publish progress; `report` raises JobCancelled once cancellation is requested.
+    The handler's return value becomes the job's final message. While a job runs, a
+    heartbeat thread keeps it from looking stale even if `report` is not called for
+    longer than `stale_after` (e.g. a slow batch under rate-limit back-off).
+    """
+
+    def __init__(self, store: JobStore, handlers: Dict[str, JobHandler], workers: int = 2,
+                 poll_interval: float = 1.0, stale_after: float = 600.0):
+        self.store = store
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        requeued = self.store.requeue_stale(self.stale_after)
+        if requeued:
+            logger.info(f"🔄 Resumed {requeued} interrupted job(s)")
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{n}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def enqueue(self, kind: str, lkpd_id: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        job = self.store.enqueue(kind, lkpd_id, params)
+        self._wake.set()
+        return job
+
+    def _loop(self) -> None:
+        last_stale_check = time.time()
+        while not self._stop.is_set():
+            if time.time() - last_stale_check > self.stale_after:
+                self.store.requeue_stale(self.stale_after, exclude_worker=self.worker_id)
+                last_stale_check = time.time()
+            job = self.store.claim(self.worker_id)
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job: Dict[str, Any]) -> None:
+        handler = self.handlers.get(job['kind'])
+        if handler is None:
+            self.store.finish(job['id'], FAILED, f"Unknown job kind: {job['kind']}")
+            return
+
+        def report(done: int, total: int, errors: int = 0, message: str = "") -> None:
+            if self.store.update_progress(job['id'], done, total, errors, message):
+                raise JobCancelled()
+
+        finished = threading.Event()
+
+        def beat() -> None:
+            while not finished.wait(self.stale_after / 4):
+                self.store.heartbeat(job['id'])
+
+        threading.Thread(target=beat, name=f"job-heartbeat-{job['id']}", daemon=True).start()
+        logger.info(f"▶️ Job {job['id']} ({job['kind']}) started for LKPD {job['lkpd_id']}")
+        try:
+            message = handler(job, report)
+            self.store.finish(job['id'], DONE, message or "")
+            logger.info(f"✅ Job {job['id']} done")
+        except JobCancelled:
+            self.store.finish(job['id'], CANCELLED, "Dibatalkan")
+            logger.info(f"⏹️ Job {job['id']} cancelled")
+        except Exception as e:
+            self.store.finish(job['id'], FAILED, str(e))
+            logger.error(f"Job {job['id']} failed: {e}")
+        finally:
+            finished.set()
@@ -0,0 +1,139 @@
+import json
+import logging
+from typing import Any, List, Optional, Tuple
+
+# ========== LOGGING SETUP ==========
+logger = logging.getLogger(__name__)
+
+# Event: ('field', key, value) untuk field level atas yang sudah lengkap,
+#        ('item', key, index, value) untuk setiap elemen array level atas yang sudah lengkap
+Event = Tuple[Any, ...]
+
+
+class IncrementalJsonParser:
+    """Incremental parser for a streamed top-level JSON object.
+
+    Feed text chunks as they arrive; `feed` returns events for every top-level
+    member whose value is complete, plus one event per completed element of
+    top-level arrays (so list items can render before the array closes).
+    Text before the first '{' (e.g. a ```json fence) is ignored. `result()`
+    parses the whole buffered object for final validation.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = 'key'          # 'key' | 'colon' | 'value' (hanya di depth 1)
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        self._array_key: Optional[str] = None
+        self._array_index = 0
+        self._elem_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Event]:
+        self._buf += chunk
+        events: List[Event] = []
+        buf = self._buf
+        while self._pos < len(buf) and not self.done:
+            i = self._pos
+            c = buf[i]
+            self._pos += 1
+
+            if self._start is None:
+                if c == '{':
+                    self._start = i
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect == 'key':
+                        self._key = json.loads(buf[self._key_start:i + 1])
+                        self._expect = 'colon'
+                continue
+
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._expect == 'key':
+                        self._key_start = i
+                    elif self._expect == 'value' and self._value_start is None:
+                        self._value_start = i
+                elif self._depth == 2 and self._array_key is not None and self._elem_start is None:
+                    self._elem_start = i
+                continue
+
+            if c.isspace():
+                continue
+
+            if self._depth == 1:
+                if self._expect == 'colon':
+                    if c == ':':
+                        self._expect = 'value'
+                        self._value_start = None
+                elif self._expect == 'value':
+                    if c in ',}':
+                        self._emit_field(buf[self._value_start:i], events)
+                        self._expect = 'key'
+                        if c == '}':
+                            self.done = True
+                    elif self._value_start is None:
+                        self._value_start = i
+                        if c in '[{':
+                            self._depth = 2
+                            if c == '[':
+                                self._array_key = self._key
+                                self._array_index = 0
+                                self._elem_start = None
+                elif c == '}':
+                    self.done = True
+                continue
+
+            # depth >= 2: di dalam nilai bertingkat
+            in_top_array = self._depth == 2 and self._array_key is not None
+            if c in '[{':
+                if in_top_array and self._elem_start is None:
+                    self._elem_start = i
+                self._depth += 1
+            elif c in ']}':
+                if in_top_array:
+                    if self._elem_start is not None:
+                        self._emit_item(buf[self._elem_start:i], events)
+                    self._array_key = None
+                self._depth -= 1
+            elif c == ',' and in_top_array:
+                self._emit_item(buf[self._elem_start:i], events)
+            elif in_top_array and self._elem_start is None:
+                self._elem_start = i
+        return events
+
+    def _emit_field(self, raw: str, events: List[Event]) -> None:
+        try:
+            events.append(('field', self._key, json.loads(raw)))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Stream field '{self._key}' tidak valid: {e}")
+
+    def _emit_item(self, raw: str, events: List[Event]) -> None:
+        try:
+            events.append(('item', self._array_key, self._array_index, json.loads(raw)))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Stream item {self._array_key}[{self._array_index}] tidak valid: {e}")
+        self._array_index += 1
+        self._elem_start = None
+
+    def result(self) -> Any:
+        """Parse the complete buffered object (raises json.JSONDecodeError if incomplete)."""
+        start = self._start if self._start is not None else 0
+        end = self._buf.rfind('}')
+        return json.loads(self._buf[start:end + 1])
@@ -0,0 +1,175 @@
+import argparse
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+# ========== LOGGING SETUP ==========
+logger = logging.getLogger(__name__)
+
+# Sinonim tema -> bentuk baku (setelah normalisasi). Bisa ditambah lewat file JSON.
+DEFAULT_THEME_ALIASES = {
+    "glb": "gerak lurus",
+    "glbb": "gerak lurus",
+    "glb glbb": "gerak lurus",
+    "gerak lurus beraturan": "gerak lurus",
+    "gerak lurus berubah beraturan": "gerak lurus",
+}
+
+
+# ========== THEME NORMALIZATION ==========
+def normalize_theme(theme: str, aliases: Optional[Dict[str, str]] = None) -> str:
+    """Casefold, strip punctuation, collapse whitespace and resolve aliases"""
+    text = re.sub(r"[^\w]+", " ", (theme or "").casefold())
+    text = " ".join(text.split())
+    aliases = DEFAULT_THEME_ALIASES if aliases is None else aliases
+    return aliases.get(text, text)
+
+def load_aliases(path: Optional[str]) -> Dict[str, str]:
+    """Built-in aliases merged with an optional JSON file of {"alias": "tema baku"}"""
+    aliases = dict(DEFAULT_THEME_ALIASES)
+    if path:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                extra = json.load(f)
+            aliases.update({normalize_theme(k, {}): normalize_theme(v, {}) for k, v in extra.items()})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Load theme aliases error: {e}")
+    return aliases
+
+
+# ========== SQLITE CACHE ==========
+class LkpdCache:
+    """Disk-backed cache of generated LKPD documents with TTL and LRU eviction by total size.
+
+    Keys combine the normalized theme with the prompt version and model name,
+    so prompt/model changes never serve stale documents.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 30 * 24 * 3600, max_bytes: int = 200 * 1024 * 1024,
+                 aliases: Optional[Dict[str, str]] = None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.aliases = aliases if aliases is not None else dict(DEFAULT_THEME_ALIASES)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lkpd_cache ("
+            " key TEXT PRIMARY KEY, theme TEXT NOT NULL, data TEXT NOT NULL,"
+            " size INTEGER NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_lkpd_cache_last_used ON lkpd_cache(last_used)")
+        self._conn.commit()
+
+    def key(self, theme: str, prompt_version: str, model_name: str) -> str:
+        payload = json.dumps([normalize_theme(theme, self.aliases), prompt_version, model_name])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT data, created_at FROM lkpd_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM lkpd_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE lkpd_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, theme: str, data: Dict[str, Any]) -> None:
+        raw = json.dumps(data, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lkpd_cache (key, theme, data, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, normalize_theme(theme, self.aliases), raw, len(raw.encode('utf-8')), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM lkpd_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM lkpd_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in self._conn.execute("SELECT key, size FROM lkpd_cache ORDER BY last_used ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM lkpd_cache WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.info(f"🧹 LKPD cache evicted {evicted} entries")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM lkpd_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'bytes': total,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+# ========== CLI (PRE-WARM) ==========
+def read_themes(path: str) -> List[str]:
+    """One theme per line; blank lines and '#' comments are ignored"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="LKPD generation cache tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    prewarm = sub.add_parser("prewarm", help="Pre-generate LKPDs for a curriculum theme list (off-hours job)")
+    prewarm.add_argument("themes_file", help="Text file, one theme per line")
+    sub.add_parser("stats", help="Show cache size and entry count")
+    args = parser.parse_args(argv)
+
+    # Impor di sini: gemini_config membaca Streamlit secrets; model Gemini dibuat saat generate pertama
+    import gemini_config
+
+    cache = gemini_config.get_lkpd_cache()
+    if args.command == "stats":
+        print(json.dumps(cache.stats(), indent=2))
+        return
+
+    themes = read_themes(args.themes_file)
+    generated = skipped = failed = 0
+    seen = set()
+    for theme in themes:
+        key = gemini_config.lkpd_cache_key(theme)
+        if key in seen or cache.get(key) is not None:
+            skipped += 1
+            continue
+        seen.add(key)
+        if gemini_config.generate_lkpd(theme):
+            generated += 1
+            print(f"✅ {theme}")
+        else:
+            failed += 1
+            print(f"❌ {theme}")
+    print(f"Selesai: {generated} dibuat, {skipped} sudah ada di cache, {failed} gagal")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
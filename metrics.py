@@ -0,0 +1,232 @@
+import bisect
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# http.server hanya diimpor bila METRICS_PORT dipakai (start_http_server)
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# ========== LOGGING SETUP ==========
+logger = logging.getLogger(__name__)
+
+# ========== CONSTANTS ==========
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+# ========== METRIC TYPES ==========
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._series: Dict[Labels, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+            series[0][idx] += 1
+            series[1] += value
+
+    def snapshot(self) -> Dict[Labels, Dict[str, float]]:
+        """count / sum / avg and bucket-estimated p50 / p95 / p99 per label set"""
+        with self._lock:
+            series = {k: (list(v[0]), v[1]) for k, v in self._series.items()}
+        result = {}
+        for labels, (counts, total) in series.items():
+            n = sum(counts)
+            result[labels] = {
+                'count': n,
+                'sum': total,
+                'avg': total / n if n else 0.0,
+                'p50': self._quantile(counts, n, 0.50),
+                'p95': self._quantile(counts, n, 0.95),
+                'p99': self._quantile(counts, n, 0.99),
+            }
+        return result
+
+    def _quantile(self, counts: List[int], n: int, q: float) -> float:
+        if not n:
+            return 0.0
+        rank = q * n
+        cumulative = 0
+        for idx, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= rank:
+                return self.buckets[idx] if idx < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: (list(v[0]), v[1]) for k, v in self._series.items()}
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', '+Inf'))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class CallbackGauge:
+    """Gauge whose values are read from `fn()` at render time: {labels dict as tuple: value}"""
+
+    def __init__(self, name: str, help_text: str, fn: Callable[[], Dict[Labels, float]]):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            for labels, value in sorted(self.fn().items()):
+                lines.append(f"{self.name}{_format_labels(labels)} {value:g}")
+        except Exception as e:
+            logger.error(f"Gauge {self.name} error: {e}")
+        return lines
+
+
+# ========== REGISTRY ==========
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, name: str, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get_or_create(name, lambda: Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(name, lambda: Histogram(name, help_text, buckets))
+
+    def gauge_callback(self, name: str, help_text: str, fn: Callable[[], Dict[Labels, float]]) -> CallbackGauge:
+        return self._get_or_create(name, lambda: CallbackGauge(name, help_text, fn))
+
+    def metrics(self) -> List[Any]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for metric in self.metrics():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path: str) -> None:
+        """Atomically write the exposition text (for node_exporter's textfile collector)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+
+REGISTRY = Registry()
+
+
+# ========== HELPERS ==========
+@contextmanager
+def timed(histogram: Histogram, errors: Optional[Counter] = None, **labels: Any) -> Iterator[None]:
+    """Observe the block's duration; count an error (and re-raise) if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if errors is not None:
+            errors.inc(**labels)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+def start_http_server(port: int, registry: Registry = REGISTRY, host: str = "0.0.0.0") -> "ThreadingHTTPServer":
+    """Serve GET /metrics in a daemon thread"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"📈 Metrics endpoint on :{port}/metrics")
+    return server
+
+
+def start_file_writer(path: str, interval: float = 15.0, registry: Registry = REGISTRY) -> threading.Thread:
+    """Rewrite `path` with the exposition text every `interval` seconds in a daemon thread"""
+
+    def loop():
+        while True:
+            try:
+                registry.write_file(path)
+            except Exception as e:
+                logger.error(f"Metrics file write error: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="metrics-file", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,86 @@
+import importlib
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, Optional
+
+# ========== LOGGING SETUP ==========
+logger = logging.getLogger(__name__)
+
+
+# ========== MODEL FACTORIES ==========
+def _gemini_factory(model_name: str, api_key: Optional[str], **options: Any) -> Any:
+    import google.generativeai as genai
+
+    if not api_key:
+        raise ValueError("GEMINI_API_KEY tidak ditemukan di Secrets")
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name, **options)
+
+
+def _import_factory(path: str) -> Callable[..., Any]:
+    """'package.module:callable' -> the callable (called with the model options as keywords)"""
+    module_name, _, attr = path.partition(':')
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def create_model(provider: str, model_name: str, api_key: Optional[str] = None,
+                 options: Optional[Dict[str, Any]] = None) -> Any:
+    """Build a generate_content-compatible model.
+
+    `provider` is "gemini" or a "module:callable" import path (e.g.
+    "benchmarks.fake_gemini:FakeGenerativeModel"), which is called with `options`.
+    """
+    if provider == "gemini":
+        return _gemini_factory(model_name, api_key, **(options or {}))
+    if ':' in provider:
+        return _import_factory(provider)(**(options or {}))
+    raise ValueError(f"Unknown model provider: {provider}")
+
+
+# ========== PER-PROCESS CLIENT ==========
+class ModelClient:
+    """Holds one model per process, built from config on first use (thread-safe).
+
+    Every replica/worker builds its own client from the same settings, so nothing
+    but configuration has to be shared between processes. A failed build is
+    remembered in `error` and retried on the next `get()` after `retry_after` seconds.
+    """
+
+    def __init__(self, provider: str, model_name: str, api_key: Optional[str] = None,
+                 options: Optional[Dict[str, Any]] = None, retry_after: float = 30.0):
+        self.provider = provider
+        self.model_name = model_name
+        self.api_key = api_key
+        self.options = options or {}
+        self.retry_after = retry_after
+        self.error: Optional[str] = None
+        self._model: Any = None
+        self._failed_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            retry_due = not self._failed_at or time.monotonic() - self._failed_at >= self.retry_after
+            if self._model is None and retry_due:
+                try:
+                    self._model = create_model(self.provider, self.model_name, self.api_key, self.options)
+                    self.error = None
+                    logger.info(f"✅ Model {self.provider}/{self.model_name} initialized")
+                except Exception as e:
+                    self.error = str(e)
+                    self._failed_at = time.monotonic()
+                    logger.error(f"Model init error ({self.provider}/{self.model_name}): {e}")
+        return self._model
+
+    def set(self, model: Any) -> None:
+        """Install a ready-made model (e.g. the benchmark stand-in)"""
+        with self._lock:
+            self._model = model
+            self.error = None
+
+    @property
+    def ready(self) -> bool:
+        return self._model is not None
@@ -0,0 +1,68 @@
+import csv
+import importlib.util
+import io
+from typing import IO, Any, Dict, Iterable, Iterator, List
+
+# Kolom export laporan penilaian (urutan = urutan kolom file)
+REPORT_COLUMNS = ['Nama Siswa', 'Waktu Submit', 'Nilai', 'Feedback', 'Kelebihan', 'Perbaikan']
+EXPORT_MIME = {
+    'csv': "text/csv",
+    'xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def xlsx_available() -> bool:
+    """XLSX export needs openpyxl (optional dependency)"""
+    return importlib.util.find_spec("openpyxl") is not None
+
+
+def is_graded(jawaban: Dict[str, Any]) -> bool:
+    """True if the submission has a complete AI score.
+
+    Only legacy documents without a `score_meta` key fall back to "total_score > 0"
+    (the old dashboard rule); newer ones are graded exactly when score_meta is set.
+    """
+    if 'score_meta' in jawaban:
+        return bool(jawaban['score_meta'])
+    score = jawaban.get('total_score')
+    return isinstance(score, (int, float)) and score > 0
+
+
+def report_row(jawaban: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'Nama Siswa': jawaban.get('nama_siswa', 'Anonim'),
+        'Waktu Submit': jawaban.get('waktu_submit', ''),
+        'Nilai': jawaban.get('total_score', 'N/A'),
+        'Feedback': jawaban.get('feedback', ''),
+        'Kelebihan': "; ".join(jawaban.get('strengths') or []),
+        'Perbaikan': "; ".join(jawaban.get('improvements') or []),
+    }
+
+
+def iter_csv(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """UTF-8 (with BOM, for Excel) CSV bytes, one piece per chunk of submissions"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=REPORT_COLUMNS)
+    buffer.write('\ufeff')
+    writer.writeheader()
+    for chunk in chunks:
+        writer.writerows(report_row(j) for j in chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def write_xlsx(chunks: Iterable[List[Dict[str, Any]]], output: IO[bytes]) -> None:
+    """XLSX workbook written row by row to `output` (openpyxl write-only mode keeps memory flat)"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Report")
+    sheet.append(REPORT_COLUMNS)
+    for chunk in chunks:
+        for jawaban in chunk:
+            row = report_row(jawaban)
+            sheet.append([row[c] for c in REPORT_COLUMNS])
+    workbook.save(output)
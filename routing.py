@@ -0,0 +1,172 @@
+import atexit
+import re
+import sqlite3
+import threading
+import time
+import logging
+from datetime import date
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+
+# ========== LOGGING SETUP ==========
+logger = logging.getLogger(__name__)
+
+# ========== CONSTANTS ==========
+# Urutan tier dari termurah ke termahal
+TIERS = ("lite", "standard", "pro")
+QUOTA_ERRORS = {"ResourceExhausted", "TooManyRequests"}
+# Perkiraan token output untuk limiter TPM (batas max_output jauh di atas pemakaian biasa)
+EXPECTED_OUTPUT = {'short': 150, 'full': 300, 'lkpd': 4096}
+_WORD = re.compile(r"\w+")
+
+
+class Route(NamedTuple):
+    """Where one Gemini call goes: model tier, model name, output token cap and prompt variant"""
+    tier: str
+    model: str
+    max_output: int  # 0 = tanpa batas
+    variant: str  # "short" (prompt ringkas) atau "full"
+    expected_output: int  # perkiraan untuk limiter TPM / anggaran bila usage_metadata tidak ada
+
+
+class BudgetExceeded(RuntimeError):
+    """Token budget used up while the call already goes to the fallback (cheapest) model"""
+
+
+def is_quota_error(exc: BaseException) -> bool:
+    """True for 429 / RESOURCE_EXHAUSTED errors (quota used up, not a transient 5xx)"""
+    code = getattr(exc, "code", None)
+    try:
+        if code is not None and int(code) == 429:
+            return True
+    except (TypeError, ValueError):
+        pass
+    return type(exc).__name__ in QUOTA_ERRORS
+
+
+# ========== ROUTING ==========
+class ModelRouter:
+    """Picks a Route per call from the task and the answer length.
+
+    `models` maps tier -> model name and must contain "standard"; missing tiers
+    resolve to the nearest configured tier ("lite" -> "standard", "pro" -> "standard").
+    Answers of at most `short_words` words go to the lite tier with the short
+    prompt; answers longer than `long_words` go to the pro tier (if configured).
+    Output caps are per graded answer, so a batch gets `n * cap`; a cap of 0 means
+    no max_output_tokens for that route.
+    """
+
+    def __init__(self, models: Dict[str, str], short_words: int = 25, long_words: int = 150,
+                 short_output: int = 512, full_output: int = 1024, lkpd_output: int = 8192,
+                 lkpd_tier: str = "standard", fallback_tier: str = "lite"):
+        if 'standard' not in models:
+            raise ValueError("models must define the 'standard' tier")
+        self.models = {tier: name for tier, name in models.items() if name}
+        self.short_words = short_words
+        self.long_words = long_words
+        self.short_output = short_output
+        self.full_output = full_output
+        self.lkpd_output = lkpd_output
+        self.lkpd_tier = lkpd_tier
+        self.fallback_tier = fallback_tier
+
+    def _tier(self, tier: str) -> str:
+        return tier if tier in self.models else 'standard'
+
+    def _route(self, tier: str, max_output: int, variant: str, expected_output: int) -> Route:
+        tier = self._tier(tier)
+        return Route(tier, self.models[tier], max_output, variant,
+                     min(max_output, expected_output) if max_output else expected_output)
+
+    def route_score(self, answers: Sequence[str]) -> Route:
+        """Route for grading `answers` in one call (a batch follows its longest answer)"""
+        longest = max((len(_WORD.findall(a or "")) for a in answers), default=0)
+        n = max(1, len(answers))
+        if longest <= self.short_words:
+            return self._route("lite", self.short_output * n, "short", EXPECTED_OUTPUT['short'] * n)
+        tier = "pro" if longest > self.long_words else "standard"
+        return self._route(tier, self.full_output * n, "full", EXPECTED_OUTPUT['full'] * n)
+
+    def route_lkpd(self) -> Route:
+        return self._route(self.lkpd_tier, self.lkpd_output, "full", EXPECTED_OUTPUT['lkpd'])
+
+    def downgrade(self, route: Route) -> Optional[Route]:
+        """Same call on the fallback (cheapest) tier, or None if `route` already uses that model"""
+        fallback = self._tier(self.fallback_tier)
+        if self.models[fallback] == route.model:
+            return None
+        return route._replace(tier=fallback, model=self.models[fallback])
+
+
+# ========== TOKEN BUDGET ==========
+class TokenBudget:
+    """Persistent token ledger with a daily and a per-LKPD limit (0 = unlimited).
+
+    Usage is stored in SQLite, so every process sharing the file shares the budget.
+    Tokens are buffered in memory and written at most every `flush_interval` seconds,
+    so other processes see this one's usage with that much lag. The daily total
+    resets at local midnight; the per-LKPD total never resets.
+    """
+
+    def __init__(self, path: str, daily_limit: int = 0, lkpd_limit: int = 0, flush_interval: float = 1.0):
+        self.path = path
+        self.daily_limit = daily_limit
+        self.lkpd_limit = lkpd_limit
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, str], int] = {}
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS token_usage ("
+            " scope TEXT NOT NULL, day TEXT NOT NULL, tokens INTEGER NOT NULL, PRIMARY KEY (scope, day))"
+        )
+        self._conn.commit()
+        atexit.register(self.flush)
+
+    def _used(self, scope: str, day: str) -> int:
+        row = self._conn.execute("SELECT tokens FROM token_usage WHERE scope = ? AND day = ?", (scope, day)).fetchone()
+        return (row[0] if row else 0) + self._pending.get((scope, day), 0)
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._conn.executemany(
+                "INSERT INTO token_usage (scope, day, tokens) VALUES (?, ?, ?) "
+                "ON CONFLICT(scope, day) DO UPDATE SET tokens = tokens + excluded.tokens",
+                [(scope, day, tokens) for (scope, day), tokens in self._pending.items()]
+            )
+            self._conn.commit()
+            self._pending.clear()
+        self._flushed_at = time.monotonic()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def add(self, tokens: int, lkpd_id: str = "") -> None:
+        if tokens <= 0:
+            return
+        entries = [("day", date.today().isoformat())] + ([(f"lkpd:{lkpd_id}", "")] if lkpd_id else [])
+        with self._lock:
+            for entry in entries:
+                self._pending[entry] = self._pending.get(entry, 0) + tokens
+            if time.monotonic() - self._flushed_at >= self.flush_interval:
+                self._flush()
+
+    def exceeded(self, lkpd_id: str = "") -> Optional[str]:
+        """"lkpd" or "daily" when that budget is used up, else None"""
+        with self._lock:
+            # Per-LKPD dicek dulu: batas itu tidak pernah reset, batas harian pulih besok
+            if self.lkpd_limit and lkpd_id and self._used(f"lkpd:{lkpd_id}", "") >= self.lkpd_limit:
+                return "lkpd"
+            if self.daily_limit and self._used("day", date.today().isoformat()) >= self.daily_limit:
+                return "daily"
+        return None
+
+    def usage(self, lkpd_id: str = "") -> Dict[str, int]:
+        with self._lock:
+            stats = {'today': self._used("day", date.today().isoformat()), 'daily_limit': self.daily_limit}
+            if lkpd_id:
+                stats.update(lkpd=self._used(f"lkpd:{lkpd_id}", ""), lkpd_limit=self.lkpd_limit)
+        return stats
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Dict, Optional
+
+# ========== LOGGING SETUP ==========
+logger = logging.getLogger(__name__)
+
+
+# ========== KEY HELPERS ==========
+def normalize_answer(text: str) -> str:
+    """Collapse whitespace and casefold so trivial edits hit the same cache entry"""
+    return " ".join((text or "").split()).casefold()
+
+def make_key(pertanyaan: str, jawaban: str, prompt_version: str, model_name: str) -> str:
+    """Content address for one graded answer"""
+    payload = json.dumps(
+        [pertanyaan.strip(), normalize_answer(jawaban), prompt_version, model_name],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# ========== SQLITE CACHE ==========
+class ScoringCache:
+    """Persistent, thread-safe score cache with LRU eviction by total size.
+
+    Entries are keyed by `make_key(...)` and store the score_jawaban result dict.
+    The stored size is tracked in memory, so a write only scans the table when the
+    cache is over `max_bytes`. Hit/miss counters are per process and reset on restart.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL DEFAULT 0, last_used REAL NOT NULL)"
+        )
+        # Cache dari sebelum batas ukuran belum punya kolom size
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(scores)")}
+        if 'size' not in columns:
+            self._conn.execute("ALTER TABLE scores ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("UPDATE scores SET size = length(CAST(value AS BLOB))")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scores_last_used ON scores(last_used)")
+        self._conn.commit()
+        self._bytes = self._total()
+
+    def _total(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM scores").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM scores WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE scores SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        raw = json.dumps(value, ensure_ascii=False)
+        size = len(raw.encode('utf-8'))
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM scores WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scores (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, raw, size, time.time())
+            )
+            self._bytes += size - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Proses lain ikut menulis ke file yang sama: hitung ulang total sebelum menghapus
+        total = self._total()
+        evicted = 0
+        if total > self.max_bytes:
+            for key, size in self._conn.execute("SELECT key, size FROM scores ORDER BY last_used ASC").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM scores WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+            logger.info(f"🧹 Scoring cache evicted {evicted} entries")
+        self._bytes = total
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM scores")
+            self._conn.commit()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM scores").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'bytes': total,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
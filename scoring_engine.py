@@ -0,0 +1,145 @@
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# ========== LOGGING SETUP ==========
+logger = logging.getLogger(__name__)
+
+# ========== CONSTANTS ==========
+# Status HTTP yang aman untuk diulang (quota habis / server sibuk)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+    "InternalServerError", "BadGateway", "GatewayTimeout", "DeadlineExceeded",
+}
+
+ItemKey = Tuple[Hashable, Hashable]  # (group, item) mis. (index siswa, index pertanyaan)
+
+
+# ========== RATE LIMITING ==========
+class TokenBucket:
+    """Thread-safe token bucket, refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        # Burst kecil (± 1 detik kuota) supaya jendela 60 detik tidak pernah melebihi kuota
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Block until `amount` tokens are available. Returns seconds waited."""
+        # Permintaan lebih besar dari kapasitas boleh "berutang" agar tidak menunggu selamanya
+        needed = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= needed:
+                    self._tokens -= amount
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimiter:
+    """Combined RPM + TPM limiter. A limit of 0 disables that bucket."""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0):
+        self.requests = TokenBucket(rpm) if rpm and rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm and tpm > 0 else None
+
+    def acquire(self, est_tokens: int = 0) -> float:
+        waited = 0.0
+        if self.requests:
+            waited += self.requests.acquire(1)
+        if self.tokens and est_tokens > 0:
+            waited += self.tokens.acquire(est_tokens)
+        return waited
+
+
+# ========== RETRY ==========
+def is_retryable(exc: BaseException) -> bool:
+    """True for 429 / 5xx style errors from the Gemini SDK (google.api_core)."""
+    code = getattr(exc, "code", None)
+    try:
+        if code is not None and int(code) in RETRYABLE_STATUS:
+            return True
+    except (TypeError, ValueError):
+        pass
+    return type(exc).__name__ in RETRYABLE_ERRORS
+
+
+def retry_call(fn: Callable[[], Any], max_retries: int = 4, base_delay: float = 1.0,
+               max_delay: float = 30.0, sleep: Callable[[float], None] = time.sleep,
+               on_retry: Optional[Callable[[int, BaseException], None]] = None) -> Any:
+    """Call `fn`, retrying retryable errors with full-jitter exponential backoff.
+
+    `on_retry(attempt, exc)` is called before each backoff sleep (e.g. for metrics).
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            attempt += 1
+            logger.warning(f"🔁 Retry {attempt}/{max_retries} dalam {delay:.1f}s: {e}")
+            if on_retry:
+                on_retry(attempt, e)
+            sleep(delay)
+
+
+# ========== CONCURRENT RUNNER ==========
+def run_grouped(units: Iterable[Tuple[List[ItemKey], Callable[[], Dict[ItemKey, Any]]]],
+                expected: Dict[Hashable, int],
+                on_group_done: Callable[[Hashable, Dict[Hashable, Any]], None],
+                max_workers: int = 8) -> None:
+    """Run work units on a bounded thread pool and fire `on_group_done` per group.
+
+    Each unit is `(keys, fn)`; `fn()` returns `{(group, item): result}` for its keys.
+    `expected` maps every group to its item count. As soon as all items of a group
+    are in, `on_group_done(group, {item: result})` runs on the calling thread, so
+    callers can persist each group without waiting for the whole run. Items whose
+    unit raised are reported as `None`. If `on_group_done` raises, units that have
+    not started yet are cancelled and the exception propagates.
+    """
+    results: Dict[Hashable, Dict[Hashable, Any]] = {g: {} for g in expected}
+    pending = dict(expected)
+
+    for group, count in expected.items():
+        if count == 0:
+            on_group_done(group, {})
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {pool.submit(fn): keys for keys, fn in units}
+        try:
+            for future in as_completed(futures):
+                keys = futures[future]
+                try:
+                    unit_result = future.result()
+                except Exception as e:
+                    logger.error(f"Scoring unit error: {e}")
+                    unit_result = {}
+                for group, item in keys:
+                    results[group][item] = unit_result.get((group, item))
+                    pending[group] -= 1
+                    if pending[group] == 0:
+                        on_group_done(group, results.pop(group))
+        except BaseException:
+            # on_group_done boleh menghentikan proses (mis. job dibatalkan): buang unit yang belum jalan
+            for future in futures:
+                future.cancel()
+            raise
@@ -0,0 +1,815 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+from datetime import datetime
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from doc_codec import COMPRESSIONS, FORMATS, DocCodec, decode
+
+try:
+    import fcntl
+except ImportError:  # Windows: kunci hanya berlaku antar-thread dalam satu proses
+    fcntl = None
+
+# ========== LOGGING SETUP ==========
+logger = logging.getLogger(__name__)
+
+# Kolom ringkas untuk dashboard (tanpa deserialisasi jawaban lengkap)
+SUMMARY_COLUMNS = ['filename', 'lkpd_id', 'nama_siswa', 'waktu_submit', 'total_score']
+LOCK_STRIPES = 64
+# Urutan laporan: waktu submit, nama siswa atau nilai
+SUMMARY_SORTS = ('waktu', 'nama', 'nilai')
+
+
+class VersionConflict(Exception):
+    """The stored submission changed since it was read (optimistic locking)"""
+
+
+def _score_value(row: Dict[str, Any]) -> float:
+    score = row.get('total_score')
+    return score if isinstance(score, (int, float)) else 0
+
+
+def _submit_time(row: Dict[str, Any]) -> datetime:
+    try:
+        return datetime.strptime(row.get('waktu_submit') or '', "%d/%m/%Y %H:%M:%S")
+    except ValueError:
+        return datetime.min
+
+
+def submission_order(doc: Dict[str, Any]) -> Tuple[datetime, str]:
+    """Sort key for submission order (waktu_submit, then id) for backends without a created_at column"""
+    return _submit_time(doc), doc.get('filename') or ""
+
+
+def summary_where(lkpd_id: str, search: str = "", min_score: Optional[float] = None,
+                  max_score: Optional[float] = None, param: str = "?", like: str = "LIKE") -> Tuple[str, List[Any]]:
+    """WHERE clause + args over the jawaban table's summary columns (SQL backends)"""
+    where, args = [f"lkpd_id = {param}"], [lkpd_id]
+    if search.strip():
+        escaped = search.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        where.append(f"nama_siswa {like} {param} ESCAPE '\\'")
+        args.append(f"%{escaped}%")
+    if min_score is not None:
+        where.append(f"COALESCE(total_score, 0) >= {param}")
+        args.append(min_score)
+    if max_score is not None:
+        where.append(f"COALESCE(total_score, 0) <= {param}")
+        args.append(max_score)
+    return " AND ".join(where), args
+
+
+def query_summary_rows(rows: List[Dict[str, Any]], search: str = "", min_score: Optional[float] = None,
+                       max_score: Optional[float] = None, sort: str = "waktu", descending: bool = False,
+                       offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """Filter / sort / page summary rows in memory (see StorageBackend.query_jawaban_summary)"""
+    if sort not in SUMMARY_SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    needle = search.strip().lower()
+    if needle:
+        rows = [r for r in rows if needle in (r.get('nama_siswa') or '').lower()]
+    if min_score is not None:
+        rows = [r for r in rows if _score_value(r) >= min_score]
+    if max_score is not None:
+        rows = [r for r in rows if _score_value(r) <= max_score]
+    key = {'waktu': _submit_time, 'nama': lambda r: (r.get('nama_siswa') or '').lower(), 'nilai': _score_value}[sort]
+    rows = sorted(rows, key=key, reverse=descending)
+    return rows[offset:offset + limit if limit is not None else None], len(rows)
+
+
+# ========== BACKEND INTERFACE ==========
+class StorageBackend:
+    """Storage interface for LKPD documents and student submissions.
+
+    Submissions are addressed by `submission_id` (historically the JSON filename);
+    documents returned by `list_jawaban` carry it under the 'filename' key and a
+    'version' counter that is incremented on every write.
+    """
+
+    def save_lkpd(self, lkpd_id: str, data: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def load_lkpd(self, lkpd_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def save_jawaban(self, submission_id: str, data: Dict[str, Any],
+                     expected_version: Optional[int] = None) -> int:
+        """Write a submission and return its new version.
+
+        With `expected_version` the write only happens if the stored version still
+        matches (0 = missing or written before versioning); otherwise VersionConflict.
+        """
+        raise NotImplementedError
+
+    def append_jawaban(self, submission_id: str, data: Dict[str, Any]) -> None:
+        """Store a new submission (backends may batch these, see GroupCommitBackend)"""
+        self.save_jawaban(submission_id, data)
+
+    def insert_jawaban_many(self, records: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Insert new submissions durably; ids that already exist are left untouched.
+
+        Returns the ids of the submissions actually inserted.
+        """
+        raise NotImplementedError
+
+    def list_jawaban(self, lkpd_id: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def list_jawaban_summary(self, lkpd_id: str) -> List[Dict[str, Any]]:
+        """Summary columns only (see SUMMARY_COLUMNS)"""
+        return [{k: j.get(k) for k in SUMMARY_COLUMNS} for j in self.list_jawaban(lkpd_id)]
+
+    def query_jawaban_summary(self, lkpd_id: str, search: str = "", min_score: Optional[float] = None,
+                              max_score: Optional[float] = None, sort: str = "waktu", descending: bool = False,
+                              offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of summary rows and the total number of matches.
+
+        `search` matches nama_siswa (case-insensitive substring), the score bounds are
+        inclusive (non-numeric scores count as 0) and `sort` is one of SUMMARY_SORTS.
+        """
+        return query_summary_rows(self.list_jawaban_summary(lkpd_id), search, min_score, max_score,
+                                  sort, descending, offset, limit)
+
+    def load_jawaban(self, submission_id: str) -> Optional[Dict[str, Any]]:
+        """One full submission document (with 'filename'), or None if it does not exist"""
+        raise NotImplementedError
+
+    def iter_jawaban(self, lkpd_id: str, chunk_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        """Full submission documents in submission order, `chunk_size` at a time"""
+        docs = self.list_jawaban(lkpd_id)
+        for start in range(0, len(docs), chunk_size):
+            yield docs[start:start + chunk_size]
+
+    def lkpd_version(self, lkpd_id: str) -> Any:
+        """Cheap token that changes whenever the LKPD document changes (None = unknown)"""
+        return None
+
+    def jawaban_version(self, lkpd_id: str) -> Any:
+        """Cheap token that changes whenever a submission of the LKPD is added or rewritten"""
+        return None
+
+
+# ========== JSON FILE BACKEND (LEGACY LAYOUT) ==========
+class JsonFileBackend(StorageBackend):
+    """One file per document in `lkpd_dir` / `jawaban_dir`, encoded with `codec`.
+
+    Documents may be indented or compact JSON, msgpack, and optionally compressed;
+    file names keep their .json suffix (they double as submission ids) and reads
+    detect the format. Files are replaced atomically (temp file + fsync + rename),
+    so readers never see a half-written document. Writes to one submission are
+    serialized by a striped lock: a thread lock plus, where available, an flock
+    on `jawaban_dir/.locks/`.
+    """
+
+    def __init__(self, lkpd_dir: str, jawaban_dir: str, codec: Optional[DocCodec] = None):
+        self.lkpd_dir = lkpd_dir
+        self.codec = codec or DocCodec("json")
+        self.jawaban_dir = jawaban_dir
+        self._lock_dir = os.path.join(jawaban_dir, ".locks")
+        self._generation_path = os.path.join(self._lock_dir, "generation")
+        os.makedirs(lkpd_dir, exist_ok=True)
+        os.makedirs(self._lock_dir, exist_ok=True)
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _write(self, filepath: str, data: Dict[str, Any], fsync: bool = True) -> None:
+        directory, name = os.path.split(filepath)
+        tmp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(self.codec.encode(data))
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _read(filepath: str) -> Dict[str, Any]:
+        with open(filepath, 'rb') as f:
+            return decode(f.read())
+
+    def save_lkpd(self, lkpd_id: str, data: Dict[str, Any]) -> None:
+        self._write(os.path.join(self.lkpd_dir, f"{lkpd_id}.json"), data)
+
+    def load_lkpd(self, lkpd_id: str) -> Optional[Dict[str, Any]]:
+        filepath = os.path.join(self.lkpd_dir, f"{lkpd_id}.json")
+        if not os.path.exists(filepath):
+            return None
+        return self._read(filepath)
+
+    @contextmanager
+    def _locked(self, submission_id: str) -> Iterator[None]:
+        stripe = int(hashlib.md5(submission_id.encode('utf-8')).hexdigest(), 16) % LOCK_STRIPES
+        with self._locks[stripe]:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self._lock_dir, f"{stripe}.lock"), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _bump_generation(self) -> None:
+        # Satu byte per penulisan; append (O_APPEND) atomik antar proses, jadi ukuran file
+        # selalu bertambah walau resolusi mtime filesystem kasar (±1 MB per sejuta penulisan)
+        with open(self._generation_path, 'ab') as f:
+            f.write(b".")
+
+    def save_jawaban(self, submission_id: str, data: Dict[str, Any],
+                     expected_version: Optional[int] = None) -> int:
+        doc = {k: v for k, v in data.items() if k != 'filename'}
+        filepath = os.path.join(self.jawaban_dir, submission_id)
+        with self._locked(submission_id):
+            current = self._read(filepath).get('version', 0) if os.path.exists(filepath) else 0
+            if expected_version is not None and current != expected_version:
+                raise VersionConflict(f"{submission_id}: stored version {current}, expected {expected_version}")
+            doc['version'] = current + 1
+            self._write(filepath, doc)
+            self._bump_generation()
+        return doc['version']
+
+    def insert_jawaban_many(self, records: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        inserted = []
+        for submission_id, data in records:
+            filepath = os.path.join(self.jawaban_dir, submission_id)
+            with self._locked(submission_id):
+                if not os.path.exists(filepath):
+                    doc = {k: v for k, v in data.items() if k != 'filename'}
+                    doc['version'] = doc.get('version') or 1
+                    self._write(filepath, doc)
+                    inserted.append(submission_id)
+        if inserted:
+            self._bump_generation()
+        return inserted
+
+    def lkpd_version(self, lkpd_id: str) -> Any:
+        try:
+            return os.stat(os.path.join(self.lkpd_dir, f"{lkpd_id}.json")).st_mtime_ns
+        except FileNotFoundError:
+            return -1
+
+    def jawaban_version(self, lkpd_id: str) -> Any:
+        # mtime direktori berubah pada setiap rename (juga dari proses lain), tapi bisa tetap sama
+        # untuk dua penulisan dalam satu tick; ukuran file generation selalu bertambah
+        try:
+            generation = os.stat(self._generation_path).st_size
+        except FileNotFoundError:
+            generation = 0
+        return os.stat(self.jawaban_dir).st_mtime_ns, generation
+
+    def list_jawaban(self, lkpd_id: str) -> List[Dict[str, Any]]:
+        prefix = f"{lkpd_id}_"
+        all_jawaban = []
+        for filename in os.listdir(self.jawaban_dir):
+            if not (filename.startswith(prefix) and filename.endswith('.json')):
+                continue
+            try:
+                data = self._read(os.path.join(self.jawaban_dir, filename))
+                data['filename'] = filename
+                all_jawaban.append(data)
+            except Exception as e:
+                logger.error(f"Load jawaban error {filename}: {e}")
+        return sorted(all_jawaban, key=submission_order)
+
+    def load_jawaban(self, submission_id: str) -> Optional[Dict[str, Any]]:
+        filepath = os.path.join(self.jawaban_dir, submission_id)
+        if not os.path.exists(filepath):
+            return None
+        data = self._read(filepath)
+        data['filename'] = submission_id
+        return data
+
+    def convert(self) -> Dict[str, int]:
+        """Rewrite every existing document with this backend's codec"""
+        counts = {'documents': 0, 'bytes_before': 0, 'bytes_after': 0, 'errors': 0}
+        for directory in (self.lkpd_dir, self.jawaban_dir):
+            for filename in sorted(os.listdir(directory)):
+                if not filename.endswith('.json'):
+                    continue
+                filepath = os.path.join(directory, filename)
+                try:
+                    with self._locked(filename):
+                        before = os.path.getsize(filepath)
+                        self._write(filepath, self._read(filepath), fsync=False)
+                        self._bump_generation()
+                    counts['documents'] += 1
+                    counts['bytes_before'] += before
+                    counts['bytes_after'] += os.path.getsize(filepath)
+                except Exception as e:
+                    counts['errors'] += 1
+                    logger.error(f"Convert error {filepath}: {e}")
+        return counts
+
+
+# ========== SQLITE BACKEND (DEFAULT) ==========
+class SQLiteBackend(StorageBackend):
+    """SQLite (WAL) store with submissions indexed by lkpd_id and summary columns denormalized"""
+
+    def __init__(self, path: str, codec: Optional[DocCodec] = None):
+        self.path = path
+        self.codec = codec or DocCodec("compact")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS lkpd (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS jawaban (
+                id TEXT PRIMARY KEY,
+                lkpd_id TEXT NOT NULL,
+                nama_siswa TEXT,
+                waktu_submit TEXT,
+                total_score INTEGER,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_jawaban_lkpd ON jawaban(lkpd_id, created_at);
+            CREATE TABLE IF NOT EXISTS versions (
+                key TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            );
+        """)
+        # Database dari sebelum penguncian optimistis belum punya kolom version
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jawaban)")}
+        if 'version' not in columns:
+            self._conn.execute("ALTER TABLE jawaban ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    def _bump(self, key: str) -> None:
+        self._conn.execute(
+            "INSERT INTO versions (key, version) VALUES (?, 1) "
+            "ON CONFLICT(key) DO UPDATE SET version = version + 1", (key,)
+        )
+
+    def _version(self, key: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM versions WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def lkpd_version(self, lkpd_id: str) -> Any:
+        return self._version(f"lkpd:{lkpd_id}")
+
+    def jawaban_version(self, lkpd_id: str) -> Any:
+        return self._version(f"jawaban:{lkpd_id}")
+
+    def save_lkpd(self, lkpd_id: str, data: Dict[str, Any], created_at: Optional[float] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO lkpd (id, data, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+                (lkpd_id, self._dump(data), created_at or time.time())
+            )
+            self._bump(f"lkpd:{lkpd_id}")
+            self._conn.commit()
+
+    def load_lkpd(self, lkpd_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM lkpd WHERE id = ?", (lkpd_id,)).fetchone()
+        return decode(row[0]) if row else None
+
+    def _dump(self, data: Dict[str, Any]) -> Any:
+        # JSON tanpa kompresi tetap disimpan sebagai TEXT agar database mudah diperiksa
+        raw = self.codec.encode(data)
+        return raw.decode('utf-8') if self.codec.is_text else raw
+
+    def _jawaban_row(self, submission_id: str, data: Dict[str, Any], created_at: float, version: int) -> tuple:
+        doc = {k: v for k, v in data.items() if k != 'filename'}
+        doc['version'] = version
+        score = doc.get('total_score')
+        return (
+            submission_id, doc.get('lkpd_id', ''), doc.get('nama_siswa'), doc.get('waktu_submit'),
+            score if isinstance(score, (int, float)) else None,
+            self._dump(doc), created_at, version,
+        )
+
+    def save_jawaban(self, submission_id: str, data: Dict[str, Any], expected_version: Optional[int] = None,
+                     created_at: Optional[float] = None) -> int:
+        with self._lock:
+            # BEGIN IMMEDIATE: baca-bandingkan-tulis versi tanpa diselip penulis dari proses lain
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                stored = self._conn.execute("SELECT version FROM jawaban WHERE id = ?", (submission_id,)).fetchone()
+                current = stored[0] if stored else 0
+                if expected_version is not None and current != expected_version:
+                    raise VersionConflict(f"{submission_id}: stored version {current}, expected {expected_version}")
+                row = self._jawaban_row(submission_id, data, created_at or time.time(), current + 1)
+                self._conn.execute(
+                    "INSERT INTO jawaban (id, lkpd_id, nama_siswa, waktu_submit, total_score, data, created_at, version) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                    "lkpd_id = excluded.lkpd_id, nama_siswa = excluded.nama_siswa, "
+                    "waktu_submit = excluded.waktu_submit, total_score = excluded.total_score, "
+                    "data = excluded.data, version = excluded.version",
+                    row
+                )
+                self._bump(f"jawaban:{row[1]}")
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return current + 1
+
+    def insert_jawaban_many(self, records: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        now = time.time()
+        rows = [self._jawaban_row(sid, data, now, data.get('version') or 1) for sid, data in records]
+        with self._lock:
+            # Log group-commit dipotong setelah ini, jadi transaksi ini harus benar-benar di-fsync
+            self._conn.execute("PRAGMA synchronous=FULL")
+            try:
+                with self._conn:
+                    # Satu transaksi, satu execute per baris: rowcount 0 = id sudah ada (OR IGNORE)
+                    inserted = [row[0] for row in rows if self._conn.execute(
+                        "INSERT OR IGNORE INTO jawaban "
+                        "(id, lkpd_id, nama_siswa, waktu_submit, total_score, data, created_at, version) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row).rowcount]
+                    if inserted:
+                        for lkpd_id in {row[1] for row in rows}:
+                            self._bump(f"jawaban:{lkpd_id}")
+            finally:
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+        return inserted
+
+    def list_jawaban(self, lkpd_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, data FROM jawaban WHERE lkpd_id = ? ORDER BY created_at", (lkpd_id,)
+            ).fetchall()
+        all_jawaban = []
+        for submission_id, raw in rows:
+            data = decode(raw)
+            data['filename'] = submission_id
+            all_jawaban.append(data)
+        return all_jawaban
+
+    def list_jawaban_summary(self, lkpd_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, lkpd_id, nama_siswa, waktu_submit, total_score FROM jawaban "
+                "WHERE lkpd_id = ? ORDER BY created_at", (lkpd_id,)
+            ).fetchall()
+        return [dict(zip(SUMMARY_COLUMNS, row)) for row in rows]
+
+    def query_jawaban_summary(self, lkpd_id: str, search: str = "", min_score: Optional[float] = None,
+                              max_score: Optional[float] = None, sort: str = "waktu", descending: bool = False,
+                              offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        if sort not in SUMMARY_SORTS:
+            raise ValueError(f"Unknown sort: {sort}")
+        clause, args = summary_where(lkpd_id, search, min_score, max_score)
+        order = {'waktu': "created_at", 'nama': "nama_siswa COLLATE NOCASE", 'nilai': "COALESCE(total_score, 0)"}[sort]
+        direction = "DESC" if descending else "ASC"
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM jawaban WHERE {clause}", args).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT id, lkpd_id, nama_siswa, waktu_submit, total_score FROM jawaban WHERE {clause} "
+                f"ORDER BY {order} {direction}, created_at {direction} LIMIT ? OFFSET ?",
+                args + [limit if limit is not None else -1, offset]
+            ).fetchall()
+        return [dict(zip(SUMMARY_COLUMNS, row)) for row in rows], total
+
+    def load_jawaban(self, submission_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jawaban WHERE id = ?", (submission_id,)).fetchone()
+        if row is None:
+            return None
+        data = decode(row[0])
+        data['filename'] = submission_id
+        return data
+
+    def iter_jawaban(self, lkpd_id: str, chunk_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        offset = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, data FROM jawaban WHERE lkpd_id = ? ORDER BY created_at, id LIMIT ? OFFSET ?",
+                    (lkpd_id, chunk_size, offset)
+                ).fetchall()
+            if not rows:
+                return
+            yield [dict(decode(raw), filename=submission_id) for submission_id, raw in rows]
+            offset += len(rows)
+
+    def import_json_dirs(self, lkpd_dir: str, jawaban_dir: str) -> Dict[str, int]:
+        """Import legacy JSON files; rows that already exist are left untouched."""
+        counts = {'lkpd': 0, 'jawaban': 0, 'errors': 0}
+        lkpd_rows, jawaban_rows = [], []
+        for directory, rows, kind in ((lkpd_dir, lkpd_rows, 'lkpd'), (jawaban_dir, jawaban_rows, 'jawaban')):
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                if not filename.endswith('.json'):
+                    continue
+                filepath = os.path.join(directory, filename)
+                try:
+                    with open(filepath, 'rb') as f:
+                        data = decode(f.read())
+                    mtime = os.path.getmtime(filepath)
+                    if kind == 'lkpd':
+                        rows.append((filename[:-len('.json')], self._dump(data), mtime))
+                    else:
+                        rows.append(self._jawaban_row(filename, data, mtime, data.get('version', 0)))
+                except Exception as e:
+                    counts['errors'] += 1
+                    logger.error(f"Migration error {filepath}: {e}")
+
+        with self._lock:
+            with self._conn:
+                cur = self._conn.executemany(
+                    "INSERT OR IGNORE INTO lkpd (id, data, created_at) VALUES (?, ?, ?)", lkpd_rows)
+                counts['lkpd'] = cur.rowcount
+                cur = self._conn.executemany(
+                    "INSERT OR IGNORE INTO jawaban "
+                    "(id, lkpd_id, nama_siswa, waktu_submit, total_score, data, created_at, version) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", jawaban_rows)
+                counts['jawaban'] = cur.rowcount
+                for key in {f"lkpd:{r[0]}" for r in lkpd_rows} | {f"jawaban:{r[1]}" for r in jawaban_rows}:
+                    self._bump(key)
+        logger.info(f"📦 Migrated {counts['lkpd']} LKPD, {counts['jawaban']} jawaban ({counts['errors']} errors)")
+        return counts
+
+    def convert(self) -> Dict[str, int]:
+        """Re-encode every stored document with this backend's codec"""
+        counts = {'documents': 0, 'bytes_before': 0, 'bytes_after': 0, 'errors': 0}
+        with self._lock:
+            with self._conn:
+                for table in ('lkpd', 'jawaban'):
+                    updates = []
+                    for doc_id, raw in self._conn.execute(f"SELECT id, data FROM {table}").fetchall():
+                        try:
+                            encoded = self._dump(decode(raw))
+                        except Exception as e:
+                            counts['errors'] += 1
+                            logger.error(f"Convert error {table}/{doc_id}: {e}")
+                            continue
+                        counts['bytes_before'] += len(raw if isinstance(raw, bytes) else raw.encode('utf-8'))
+                        counts['bytes_after'] += len(encoded if isinstance(encoded, bytes) else encoded.encode('utf-8'))
+                        updates.append((encoded, doc_id))
+                    self._conn.executemany(f"UPDATE {table} SET data = ? WHERE id = ?", updates)
+                    counts['documents'] += len(updates)
+            self._conn.execute("VACUUM")
+        return counts
+
+
+# ========== GROUP COMMIT ==========
+class GroupCommitBackend(StorageBackend):
+    """Wraps a backend so bursts of new submissions share one fsync.
+
+    `append_jawaban` queues the submission; a background thread gathers everything
+    queued within `window` seconds, appends it to a per-process write-ahead log with a
+    single fsync and then acknowledges the callers. The batch is applied to `inner`
+    right after (one transaction for SQLite) and the log is truncated. Until then the
+    submissions are served from memory. A log left by a crashed process is replayed
+    on start; replay only inserts missing ids, so it is safe to repeat.
+    """
+
+    def __init__(self, inner: StorageBackend, wal_dir: str, window: float = 0.01, max_batch: int = 256):
+        self.inner = inner
+        self.wal_dir = wal_dir
+        self.window = window
+        self.max_batch = max_batch
+        os.makedirs(wal_dir, exist_ok=True)
+        self._recover()
+        self._wal = open(os.path.join(wal_dir, f"submissions-{os.getpid()}-{uuid.uuid4().hex[:6]}.wal"), 'ab')
+        if fcntl is not None:
+            fcntl.flock(self._wal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._cond = threading.Condition()
+        self._queue: List[List[Any]] = []  # [submission_id, doc, event, error] menunggu fsync
+        self._pending: Dict[str, Dict[str, Any]] = {}  # sudah durable di log, belum di `inner`
+        self._generation = 0
+        threading.Thread(target=self._flush_loop, name="group-commit", daemon=True).start()
+
+    @staticmethod
+    def _read_wal(f) -> List[Tuple[str, Dict[str, Any]]]:
+        records = []
+        for line in f:
+            try:
+                record = json.loads(line)
+                records.append((record['id'], record['data']))
+            except (ValueError, KeyError):
+                # Baris terpotong = batch yang belum sempat di-fsync, belum pernah dikonfirmasi
+                continue
+        return records
+
+    def _recover(self) -> None:
+        for name in sorted(os.listdir(self.wal_dir)):
+            if not name.endswith('.wal'):
+                continue
+            path = os.path.join(self.wal_dir, name)
+            with open(path, 'rb') as f:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue  # log milik proses lain yang masih hidup
+                records = self._read_wal(f)
+                if records:
+                    self.inner.insert_jawaban_many(records)
+                    logger.info(f"🔁 Replayed {len(records)} submission(s) from {name}")
+                os.remove(path)
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+            time.sleep(self.window)
+            with self._cond:
+                batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            try:
+                self._wal.write(b"".join(
+                    json.dumps({'id': sid, 'data': doc}, ensure_ascii=False).encode('utf-8') + b"\n"
+                    for sid, doc, _, _ in batch
+                ))
+                self._wal.flush()
+                os.fsync(self._wal.fileno())
+            except Exception as e:
+                logger.error(f"Group commit write error: {e}")
+                for record in batch:
+                    record[3] = e
+                    record[2].set()
+                continue
+            with self._cond:
+                for sid, doc, _, _ in batch:
+                    self._pending[sid] = doc
+                self._generation += 1
+            for record in batch:
+                record[2].set()
+            self._apply()
+
+    def _apply(self) -> None:
+        with self._cond:
+            records = list(self._pending.items())
+        try:
+            self.inner.insert_jawaban_many(records)
+        except Exception as e:
+            # Tetap di memori dan di log; dicoba lagi pada batch berikutnya
+            logger.error(f"Group commit apply error: {e}")
+            return
+        with self._cond:
+            for sid, _ in records:
+                self._pending.pop(sid, None)
+            if not self._pending:
+                self._wal.truncate(0)
+            self._generation += 1
+            self._cond.notify_all()
+
+    def _in_flight(self, submission_id: str) -> bool:
+        return submission_id in self._pending or any(r[0] == submission_id for r in self._queue)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued submission has reached `inner`"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._pending, timeout)
+
+    def append_jawaban(self, submission_id: str, data: Dict[str, Any]) -> None:
+        doc = {k: v for k, v in data.items() if k != 'filename'}
+        doc['version'] = 1
+        record = [submission_id, doc, threading.Event(), None]
+        with self._cond:
+            self._queue.append(record)
+            self._cond.notify_all()
+        record[2].wait()
+        if record[3] is not None:
+            raise record[3]
+
+    def save_jawaban(self, submission_id: str, data: Dict[str, Any],
+                     expected_version: Optional[int] = None) -> int:
+        # Pembaruan (mis. nilai) baru boleh ditulis setelah submission-nya ada di `inner`
+        with self._cond:
+            self._cond.wait_for(lambda: not self._in_flight(submission_id), timeout=30)
+        return self.inner.save_jawaban(submission_id, data, expected_version)
+
+    def insert_jawaban_many(self, records: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        return self.inner.insert_jawaban_many(records)
+
+    def _pending_for(self, lkpd_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._cond:
+            return [(sid, doc) for sid, doc in self._pending.items() if doc.get('lkpd_id') == lkpd_id]
+
+    def list_jawaban(self, lkpd_id: str) -> List[Dict[str, Any]]:
+        # Ambil snapshot antrean dulu: yang sempat diterapkan di antaranya tersaring lewat id
+        pending = self._pending_for(lkpd_id)
+        docs = self.inner.list_jawaban(lkpd_id)
+        seen = {d['filename'] for d in docs}
+        docs.extend(dict(doc, filename=sid) for sid, doc in pending if sid not in seen)
+        return docs
+
+    def list_jawaban_summary(self, lkpd_id: str) -> List[Dict[str, Any]]:
+        pending = self._pending_for(lkpd_id)
+        rows = self.inner.list_jawaban_summary(lkpd_id)
+        seen = {r['filename'] for r in rows}
+        rows.extend({k: (sid if k == 'filename' else doc.get(k)) for k in SUMMARY_COLUMNS}
+                    for sid, doc in pending if sid not in seen)
+        return rows
+
+    def query_jawaban_summary(self, lkpd_id: str, *args: Any, **kwargs: Any) -> Tuple[List[Dict[str, Any]], int]:
+        if self._pending_for(lkpd_id):
+            return query_summary_rows(self.list_jawaban_summary(lkpd_id), *args, **kwargs)
+        return self.inner.query_jawaban_summary(lkpd_id, *args, **kwargs)
+
+    def load_jawaban(self, submission_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            doc = self._pending.get(submission_id)
+        if doc is not None:
+            return dict(doc, filename=submission_id)
+        return self.inner.load_jawaban(submission_id)
+
+    def iter_jawaban(self, lkpd_id: str, chunk_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        if self._pending_for(lkpd_id):
+            yield from super().iter_jawaban(lkpd_id, chunk_size)
+        else:
+            yield from self.inner.iter_jawaban(lkpd_id, chunk_size)
+
+    def jawaban_version(self, lkpd_id: str) -> Any:
+        token = self.inner.jawaban_version(lkpd_id)
+        return None if token is None else (token, self._generation)
+
+    def save_lkpd(self, lkpd_id: str, data: Dict[str, Any]) -> None:
+        self.inner.save_lkpd(lkpd_id, data)
+
+    def load_lkpd(self, lkpd_id: str) -> Optional[Dict[str, Any]]:
+        return self.inner.load_lkpd(lkpd_id)
+
+    def lkpd_version(self, lkpd_id: str) -> Any:
+        return self.inner.lkpd_version(lkpd_id)
+
+
+# ========== FACTORY ==========
+def create_backend(kind: str, db_path: str, lkpd_dir: str, jawaban_dir: str,
+                   group_commit: bool = False, wal_dir: str = "wal",
+                   codec: Optional[DocCodec] = None, dsn: str = "", bucket: str = "",
+                   prefix: str = "", endpoint_url: Optional[str] = None) -> StorageBackend:
+    """Build a backend from config. A fresh SQLite database imports existing JSON files once.
+
+    `codec` = None keeps each backend's default (indented JSON files, compact JSON rows).
+    "postgres" (`dsn`) and "s3" (`bucket`, `prefix`, `endpoint_url`, e.g. MinIO) are
+    shared by every replica; "sqlite" only by processes that see the same `db_path`.
+    """
+    if kind == "json":
+        backend: StorageBackend = JsonFileBackend(lkpd_dir, jawaban_dir, codec)
+    elif kind == "sqlite":
+        is_new = not os.path.exists(db_path)
+        backend = SQLiteBackend(db_path, codec)
+        if is_new:
+            backend.import_json_dirs(lkpd_dir, jawaban_dir)
+    elif kind == "postgres":
+        from storage_shared import PostgresBackend
+        backend = PostgresBackend(dsn, codec)
+    elif kind == "s3":
+        from storage_shared import S3Backend
+        backend = S3Backend(bucket, prefix, endpoint_url, codec)
+    else:
+        raise ValueError(f"Unknown storage backend: {kind}")
+    return GroupCommitBackend(backend, wal_dir) if group_commit else backend
+
+
+# ========== CLI ==========
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="EduAI storage tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Import lkpd_outputs/ and jawaban_siswa/ JSON files into SQLite")
+    migrate.add_argument("--db", default="eduai.sqlite")
+    migrate.add_argument("--lkpd-dir", default="lkpd_outputs")
+    migrate.add_argument("--jawaban-dir", default="jawaban_siswa")
+    convert = sub.add_parser("convert", help="Rewrite existing documents in another format/compression")
+    convert.add_argument("--backend", choices=["sqlite", "json"], default="sqlite")
+    convert.add_argument("--format", choices=FORMATS, default="compact")
+    convert.add_argument("--compression", choices=COMPRESSIONS, default="none")
+    convert.add_argument("--db", default="eduai.sqlite")
+    convert.add_argument("--lkpd-dir", default="lkpd_outputs")
+    convert.add_argument("--jawaban-dir", default="jawaban_siswa")
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        counts = SQLiteBackend(args.db).import_json_dirs(args.lkpd_dir, args.jawaban_dir)
+        print(f"✅ {counts['lkpd']} LKPD, {counts['jawaban']} jawaban diimpor ke {args.db} ({counts['errors']} error)")
+    elif args.command == "convert":
+        codec = DocCodec(args.format, args.compression)
+        if args.backend == "json":
+            backend: Any = JsonFileBackend(args.lkpd_dir, args.jawaban_dir, codec)
+        else:
+            backend = SQLiteBackend(args.db, codec)
+        counts = backend.convert()
+        ratio = counts['bytes_after'] / counts['bytes_before'] if counts['bytes_before'] else 1.0
+        print(f"✅ {counts['documents']} dokumen dikonversi ke {codec}: "
+              f"{counts['bytes_before']:,} → {counts['bytes_after']:,} byte ({ratio:.0%}, {counts['errors']} error)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,313 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from doc_codec import DocCodec, decode
+from storage import SUMMARY_COLUMNS, SUMMARY_SORTS, StorageBackend, VersionConflict, submission_order, summary_where
+
+# Dependensi opsional: boto3 (S3/MinIO) dan psycopg 3 (PostgreSQL)
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = None
+    ClientError = Exception
+
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+_MISSING_CODES = {'NoSuchKey', '404', 'NotFound'}
+_PRECONDITION_CODES = {'PreconditionFailed', '412', 'ConditionalRequestConflict', '409'}
+
+
+def _error_code(e: Exception) -> str:
+    return str(getattr(e, 'response', {}).get('Error', {}).get('Code', ''))
+
+
+# ========== S3 / MINIO BACKEND ==========
+class S3Backend(StorageBackend):
+    """Documents as objects in an S3-compatible bucket (AWS S3, MinIO) shared by every replica.
+
+    Layout under `prefix`: lkpd/<lkpd_id>.json, jawaban/<submission_id> and a marker
+    versions/jawaban/<lkpd_id> rewritten after every submission write; the marker's
+    ETag is the cache token. Optimistic locking uses conditional PUTs (If-Match /
+    If-None-Match), so two replicas cannot overwrite each other's submission writes.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 codec: Optional[DocCodec] = None, max_workers: int = 16, client: Any = None):
+        if client is None and boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 needs the 'boto3' package")
+        self.client = client or boto3.client("s3", endpoint_url=endpoint_url or None)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.codec = codec or DocCodec("compact")
+        self.max_workers = max_workers
+
+    def _key(self, *parts: str) -> str:
+        return self.prefix + "/".join(parts)
+
+    def _get(self, key: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if _error_code(e) in _MISSING_CODES:
+                return None
+            raise
+        return decode(obj['Body'].read()), obj['ETag']
+
+    def _etag(self, key: str) -> Any:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)['ETag']
+        except ClientError as e:
+            if _error_code(e) in _MISSING_CODES:
+                return -1
+            raise
+
+    def _touch(self, lkpd_id: str) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key("versions", "jawaban", lkpd_id),
+                               Body=uuid.uuid4().hex.encode('ascii'))
+
+    def save_lkpd(self, lkpd_id: str, data: Dict[str, Any]) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key("lkpd", f"{lkpd_id}.json"), Body=self.codec.encode(data))
+
+    def load_lkpd(self, lkpd_id: str) -> Optional[Dict[str, Any]]:
+        found = self._get(self._key("lkpd", f"{lkpd_id}.json"))
+        return found[0] if found else None
+
+    def lkpd_version(self, lkpd_id: str) -> Any:
+        return self._etag(self._key("lkpd", f"{lkpd_id}.json"))
+
+    def jawaban_version(self, lkpd_id: str) -> Any:
+        return self._etag(self._key("versions", "jawaban", lkpd_id))
+
+    def save_jawaban(self, submission_id: str, data: Dict[str, Any],
+                     expected_version: Optional[int] = None) -> int:
+        doc = {k: v for k, v in data.items() if k != 'filename'}
+        key = self._key("jawaban", submission_id)
+        found = self._get(key)
+        current = found[0].get('version', 0) if found else 0
+        if expected_version is not None and current != expected_version:
+            raise VersionConflict(f"{submission_id}: stored version {current}, expected {expected_version}")
+        doc['version'] = current + 1
+        condition = {'IfMatch': found[1]} if found else {'IfNoneMatch': '*'}
+        try:
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=self.codec.encode(doc), **condition)
+        except ClientError as e:
+            if _error_code(e) in _PRECONDITION_CODES:
+                raise VersionConflict(f"{submission_id}: changed by another writer") from e
+            raise
+        self._touch(doc.get('lkpd_id', ''))
+        return doc['version']
+
+    def insert_jawaban_many(self, records: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        def insert(record: Tuple[str, Dict[str, Any]]) -> bool:
+            submission_id, data = record
+            doc = {k: v for k, v in data.items() if k != 'filename'}
+            doc['version'] = doc.get('version') or 1
+            try:
+                self.client.put_object(Bucket=self.bucket, Key=self._key("jawaban", submission_id),
+                                       Body=self.codec.encode(doc), IfNoneMatch='*')
+                return True
+            except ClientError as e:
+                if _error_code(e) not in _PRECONDITION_CODES:
+                    raise
+                return False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            inserted = [sid for (sid, _), ok in zip(records, pool.map(insert, records)) if ok]
+        if inserted:
+            for lkpd_id in {data.get('lkpd_id', '') for _, data in records}:
+                self._touch(lkpd_id)
+        return inserted
+
+    def _list_ids(self, lkpd_id: str) -> List[str]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        prefix = self._key("jawaban", f"{lkpd_id}_")
+        base = len(self._key("jawaban", ""))
+        return [obj['Key'][base:] for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix)
+                for obj in page.get('Contents', [])]
+
+    def load_jawaban(self, submission_id: str) -> Optional[Dict[str, Any]]:
+        found = self._get(self._key("jawaban", submission_id))
+        if found is None:
+            return None
+        data = found[0]
+        data['filename'] = submission_id
+        return data
+
+    def list_jawaban(self, lkpd_id: str) -> List[Dict[str, Any]]:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            docs = list(pool.map(self.load_jawaban, self._list_ids(lkpd_id)))
+        # Listing S3 berurutan leksikografis menurut key; urutkan kembali ke urutan submit
+        return sorted((d for d in docs if d is not None), key=submission_order)
+
+
+# ========== POSTGRESQL BACKEND ==========
+class PostgresBackend(StorageBackend):
+    """PostgreSQL store with the same tables and version tokens as SQLiteBackend, for several nodes.
+
+    Documents are stored encoded by `codec` (BYTEA); summary columns are denormalized
+    for the dashboard and report queries.
+    """
+
+    def __init__(self, dsn: str, codec: Optional[DocCodec] = None):
+        if psycopg is None:
+            raise RuntimeError("STORAGE_BACKEND=postgres needs the 'psycopg' package")
+        self.codec = codec or DocCodec("compact")
+        self._lock = threading.Lock()
+        self._conn = psycopg.connect(dsn, autocommit=True)
+        with self._conn.transaction():
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS lkpd (
+                    id TEXT PRIMARY KEY,
+                    data BYTEA NOT NULL,
+                    created_at DOUBLE PRECISION NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jawaban (
+                    id TEXT PRIMARY KEY,
+                    lkpd_id TEXT NOT NULL,
+                    nama_siswa TEXT,
+                    waktu_submit TEXT,
+                    total_score INTEGER,
+                    data BYTEA NOT NULL,
+                    created_at DOUBLE PRECISION NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jawaban_lkpd ON jawaban(lkpd_id, created_at)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS versions (key TEXT PRIMARY KEY, version BIGINT NOT NULL)")
+
+    def _bump(self, key: str) -> None:
+        self._conn.execute(
+            "INSERT INTO versions (key, version) VALUES (%s, 1) "
+            "ON CONFLICT (key) DO UPDATE SET version = versions.version + 1", (key,)
+        )
+
+    def _version(self, key: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM versions WHERE key = %s", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def lkpd_version(self, lkpd_id: str) -> Any:
+        return self._version(f"lkpd:{lkpd_id}")
+
+    def jawaban_version(self, lkpd_id: str) -> Any:
+        return self._version(f"jawaban:{lkpd_id}")
+
+    def save_lkpd(self, lkpd_id: str, data: Dict[str, Any]) -> None:
+        with self._lock, self._conn.transaction():
+            self._conn.execute(
+                "INSERT INTO lkpd (id, data, created_at) VALUES (%s, %s, %s) "
+                "ON CONFLICT (id) DO UPDATE SET data = excluded.data",
+                (lkpd_id, self.codec.encode(data), time.time())
+            )
+            self._bump(f"lkpd:{lkpd_id}")
+
+    def load_lkpd(self, lkpd_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM lkpd WHERE id = %s", (lkpd_id,)).fetchone()
+        return decode(bytes(row[0])) if row else None
+
+    def _jawaban_row(self, submission_id: str, data: Dict[str, Any], created_at: float, version: int) -> tuple:
+        doc = {k: v for k, v in data.items() if k != 'filename'}
+        doc['version'] = version
+        score = doc.get('total_score')
+        return (
+            submission_id, doc.get('lkpd_id', ''), doc.get('nama_siswa'), doc.get('waktu_submit'),
+            round(score) if isinstance(score, (int, float)) else None,
+            self.codec.encode(doc), created_at, version,
+        )
+
+    def save_jawaban(self, submission_id: str, data: Dict[str, Any],
+                     expected_version: Optional[int] = None) -> int:
+        with self._lock, self._conn.transaction():
+            stored = self._conn.execute(
+                "SELECT version FROM jawaban WHERE id = %s FOR UPDATE", (submission_id,)).fetchone()
+            current = stored[0] if stored else 0
+            if expected_version is not None and current != expected_version:
+                raise VersionConflict(f"{submission_id}: stored version {current}, expected {expected_version}")
+            row = self._jawaban_row(submission_id, data, time.time(), current + 1)
+            self._conn.execute(
+                "INSERT INTO jawaban (id, lkpd_id, nama_siswa, waktu_submit, total_score, data, created_at, version) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s) ON CONFLICT (id) DO UPDATE SET "
+                "lkpd_id = excluded.lkpd_id, nama_siswa = excluded.nama_siswa, "
+                "waktu_submit = excluded.waktu_submit, total_score = excluded.total_score, "
+                "data = excluded.data, version = excluded.version",
+                row
+            )
+            self._bump(f"jawaban:{row[1]}")
+        return current + 1
+
+    def insert_jawaban_many(self, records: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        now = time.time()
+        rows = [self._jawaban_row(sid, data, now, data.get('version') or 1) for sid, data in records]
+        inserted = []
+        with self._lock, self._conn.transaction():
+            with self._conn.cursor() as cur:
+                # psycopg >= 3.1: satu result set per baris; kosong bila id sudah ada (DO NOTHING)
+                cur.executemany(
+                    "INSERT INTO jawaban (id, lkpd_id, nama_siswa, waktu_submit, total_score, data, created_at, version) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s) ON CONFLICT (id) DO NOTHING RETURNING id",
+                    rows, returning=True)
+                while True:
+                    inserted.extend(row[0] for row in cur.fetchall())
+                    if not cur.nextset():
+                        break
+            if inserted:
+                for lkpd_id in {row[1] for row in rows}:
+                    self._bump(f"jawaban:{lkpd_id}")
+        return inserted
+
+    def list_jawaban(self, lkpd_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, data FROM jawaban WHERE lkpd_id = %s ORDER BY created_at", (lkpd_id,)).fetchall()
+        return [dict(decode(bytes(raw)), filename=submission_id) for submission_id, raw in rows]
+
+    def list_jawaban_summary(self, lkpd_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, lkpd_id, nama_siswa, waktu_submit, total_score FROM jawaban "
+                "WHERE lkpd_id = %s ORDER BY created_at", (lkpd_id,)).fetchall()
+        return [dict(zip(SUMMARY_COLUMNS, row)) for row in rows]
+
+    def query_jawaban_summary(self, lkpd_id: str, search: str = "", min_score: Optional[float] = None,
+                              max_score: Optional[float] = None, sort: str = "waktu", descending: bool = False,
+                              offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        if sort not in SUMMARY_SORTS:
+            raise ValueError(f"Unknown sort: {sort}")
+        clause, args = summary_where(lkpd_id, search, min_score, max_score, param="%s", like="ILIKE")
+        order = {'waktu': "created_at", 'nama': "lower(nama_siswa)", 'nilai': "COALESCE(total_score, 0)"}[sort]
+        direction = "DESC" if descending else "ASC"
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM jawaban WHERE {clause}", args).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT id, lkpd_id, nama_siswa, waktu_submit, total_score FROM jawaban WHERE {clause} "
+                f"ORDER BY {order} {direction}, created_at {direction} LIMIT %s OFFSET %s",
+                args + [limit, offset]
+            ).fetchall()
+        return [dict(zip(SUMMARY_COLUMNS, row)) for row in rows], total
+
+    def load_jawaban(self, submission_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jawaban WHERE id = %s", (submission_id,)).fetchone()
+        return dict(decode(bytes(row[0])), filename=submission_id) if row else None
+
+    def iter_jawaban(self, lkpd_id: str, chunk_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        offset = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, data FROM jawaban WHERE lkpd_id = %s ORDER BY created_at, id LIMIT %s OFFSET %s",
+                    (lkpd_id, chunk_size, offset)).fetchall()
+            if not rows:
+                return
+            yield [dict(decode(bytes(raw)), filename=submission_id) for submission_id, raw in rows]
+            offset += len(rows)